@@ -0,0 +1,169 @@
+# agents/horizon.py
+import datetime
+from datetime import datetime as dt, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from data.schemas import Task, CalendarEvent
+from agents.scheduler import (
+    _parse_time,
+    _get_fixed_blocks,
+    _get_preferred_work_blocks,
+    _sort_tasks,
+    _fixed_block_events,
+    _task_event,
+)
+
+MINUTES_PER_DAY = 24 * 60
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def _working_days(config: dict, start_date: datetime.date, days: int) -> List[datetime.date]:
+    """Dates in [start_date, start_date + days) that are listed in user.work_days."""
+    work_days = config.get("user", {}).get("work_days") or WEEKDAYS
+    dates = (start_date + timedelta(days=i) for i in range(days))
+    return [d for d in dates if WEEKDAYS[d.weekday()] in work_days]
+
+
+def _minute_of_day(t: dt, day: datetime.date) -> int:
+    """Minutes from the day's midnight to t, clipped to [0, 1440]."""
+    minutes = int((t - dt.combine(day, datetime.time.min)).total_seconds() // 60)
+    return min(max(minutes, 0), MINUTES_PER_DAY)
+
+
+def _build_grids(config: dict, days: List[datetime.date]) -> Tuple[np.ndarray, np.ndarray, list]:
+    """
+    Availability and morning-work minute grids, shape (len(days), 1440).
+
+    Blocks with the same minute range on several days are applied as one
+    fancy-indexed slice over those rows.
+    """
+    user_cfg = config.get("user", {})
+    evening_reflect = config.get("schedule", {}).get("evening_reflect", "21:00")
+    avail = np.zeros((len(days), MINUTES_PER_DAY), dtype=bool)
+    morning = np.zeros_like(avail)
+
+    fixed_blocks = []
+    # (start_minute, end_minute) -> day rows sharing that range
+    open_ranges: dict = {}
+    busy_ranges: dict = {}
+    morning_ranges: dict = {}
+    for i, day in enumerate(days):
+        wake = _minute_of_day(_parse_time(user_cfg.get("wake_time", "08:00"), day), day)
+        day_end = _minute_of_day(_parse_time(evening_reflect, day), day)
+        open_ranges.setdefault((wake, day_end), []).append(i)
+
+        blocks = _get_fixed_blocks(config, day)
+        fixed_blocks.extend(blocks)
+        for start, end, _ in blocks:
+            busy_ranges.setdefault((_minute_of_day(start, day), _minute_of_day(end, day)), []).append(i)
+
+        noon = dt.combine(day, datetime.time(12, 0))
+        for start, end in _get_preferred_work_blocks(config, day):
+            if start < noon:
+                morning_ranges.setdefault((_minute_of_day(start, day), _minute_of_day(end, day)), []).append(i)
+
+    for (start, end), rows in open_ranges.items():
+        avail[rows, start:end] = True
+    for (start, end), rows in busy_ranges.items():
+        avail[rows, start:end] = False
+    for (start, end), rows in morning_ranges.items():
+        morning[rows, start:end] = True
+    return avail, morning, fixed_blocks
+
+
+def _cumsum_rows(grid: np.ndarray) -> np.ndarray:
+    """Row-wise prefix sums with a leading zero column, shape (rows, 1441)."""
+    csum = np.zeros((grid.shape[0], MINUTES_PER_DAY + 1), dtype=np.int32)
+    np.cumsum(grid, axis=1, out=csum[:, 1:])
+    return csum
+
+
+def _fit_starts(csum: np.ndarray, duration: int) -> np.ndarray:
+    """fits[d, m] is True when minutes [m, m + duration) of day d are all set."""
+    if duration > MINUTES_PER_DAY:
+        return np.zeros((csum.shape[0], 0), dtype=bool)
+    return (csum[:, duration:] - csum[:, :-duration]) == duration
+
+
+def _first_slot(fits: np.ndarray, preferred: np.ndarray = None) -> Optional[Tuple[int, int]]:
+    """
+    (row, minute) of the earliest row with any fit; within that row the first
+    preferred minute if there is one, else the first fitting minute.
+    """
+    if fits.size == 0:
+        return None
+    rows = np.flatnonzero(fits.any(axis=1))
+    if rows.size == 0:
+        return None
+    row = int(rows[0])
+    if preferred is not None:
+        both = fits[row] & preferred[row]
+        if both.any():
+            return row, int(both.argmax())
+    return row, int(fits[row].argmax())
+
+
+def schedule_horizon(tasks: List[Task], config: dict, start_date: datetime.date = None,
+                     days: int = 7) -> List[CalendarEvent]:
+    """
+    Spread tasks over the working days of a multi-day horizon.
+
+    Each day is a boolean minute grid (True = free). Tasks go, in priority
+    order, to the earliest day that still has room (agents.planner.max_tasks_per_day)
+    and a free run of minutes long enough; deep tasks prefer a morning work
+    block on that day. A task that does not fit rolls forward to the next
+    working day. Tasks keep agents.scheduler.buffer_min apart, as on a
+    single day. Returns fixed-block and task events for the whole horizon.
+    """
+    if not tasks:
+        return []
+    start_date = start_date or datetime.date.today()
+    day_list = _working_days(config, start_date, days)
+    if not day_list:
+        print(f"⚠️ Warning: no working days in the {days}-day horizon from {start_date}")
+        return []
+
+    avail, morning, fixed_blocks = _build_grids(config, day_list)
+    cap = config.get("agents", {}).get("planner", {}).get("max_tasks_per_day", 5)
+    scheduler_cfg = config.get("agents", {}).get("scheduler", {})
+    deep_work_morning = scheduler_cfg.get("deep_work_morning", True)
+    buffer = int(scheduler_cfg.get("buffer_min", 10))
+    counts = np.zeros(len(day_list), dtype=np.int32)
+    csum = _cumsum_rows(avail)
+    morning_csum = _cumsum_rows(morning)
+    first_open = 0
+
+    events: List[CalendarEvent] = _fixed_block_events(fixed_blocks)
+    for task in _sort_tasks(tasks):
+        duration = max(task.duration_est_min, 1)
+        # Days before first_open are full; try the first open day alone, then
+        # search the rest a week at a time
+        while first_open < len(day_list) and counts[first_open] >= cap:
+            first_open += 1
+
+        slot = None
+        bounds = [first_open] + list(range(first_open + 1, len(day_list), 7)) + [len(day_list)]
+        for lo, hi in zip(bounds, bounds[1:]):
+            fits = _fit_starts(csum[lo:hi], duration) & (counts[lo:hi] < cap)[:, None]
+            preferred = None
+            if deep_work_morning and task.energy == "deep":
+                preferred = _fit_starts(morning_csum[lo:hi], duration)
+            slot = _first_slot(fits, preferred)
+            if slot is not None:
+                slot = (lo + slot[0], slot[1])
+                break
+        if slot is None:
+            print(f"⚠️ Warning: Could not schedule task '{task.title}' within {days} days")
+            continue
+
+        day_i, minute = slot
+        avail[day_i, max(minute - buffer, 0):minute + duration + buffer] = False
+        np.cumsum(avail[day_i], out=csum[day_i, 1:])
+        counts[day_i] += 1
+        start = dt.combine(day_list[day_i], datetime.time.min) + timedelta(minutes=minute)
+        events.append(_task_event(task, start))
+
+    events.sort(key=lambda e: e.start_time)
+    return events
@@ -0,0 +1,131 @@
+# agents/intervals.py
+import bisect
+from datetime import datetime as dt, timedelta
+from typing import List, Optional, Tuple
+
+
+class Timeline:
+    """
+    Fixed blocks of a day as sorted, merged busy intervals.
+
+    Lookups ("is this slot free?", "which block covers t?") are bisections
+    instead of a scan over every block.
+    """
+
+    def __init__(self, blocks: List[Tuple[dt, dt, str]]):
+        # Keep each block's position in the original list: when blocks overlap,
+        # the scheduler jumps past the first listed block that covers t.
+        ordered = sorted(
+            ((start, end, i) for i, (start, end, _) in enumerate(blocks)),
+            key=lambda b: (b[0], b[1]),
+        )
+        self.starts: List[dt] = []
+        self.ends: List[dt] = []
+        self.members: List[List[Tuple[int, dt, dt]]] = []
+        for start, end, i in ordered:
+            if self.starts and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+                self.members[-1].append((i, start, end))
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+                self.members.append([(i, start, end)])
+        for m in self.members:
+            m.sort()
+
+    def _busy_index(self, t: dt) -> int:
+        """Index of the last busy interval starting at or before t (-1 if none)."""
+        return bisect.bisect_right(self.starts, t) - 1
+
+    def block_end_at(self, t: dt) -> Optional[dt]:
+        """End of the first listed block with start <= t < end, or None if t is free."""
+        i = self._busy_index(t)
+        if i < 0 or t >= self.ends[i]:
+            return None
+        for _, start, end in self.members[i]:
+            if start <= t < end:
+                return end
+        return None
+
+    def next_busy_start(self, t: dt) -> Optional[dt]:
+        """Start of the first busy interval beginning after t."""
+        i = bisect.bisect_right(self.starts, t)
+        return self.starts[i] if i < len(self.starts) else None
+
+    def is_free(self, start: dt, end: dt) -> bool:
+        """True if [start, end) overlaps no block."""
+        if self.block_end_at(start) is not None:
+            return False
+        nxt = self.next_busy_start(start)
+        return nxt is None or end <= nxt
+
+    def next_slot(self, t: dt, duration: timedelta, day_end: dt, buffer: timedelta,
+                  step: timedelta) -> Tuple[Optional[dt], dt]:
+        """
+        First slot start at or after t found by the scheduler's stepping rule:
+        jump to (block end + buffer) when inside a block, else advance by `step`.
+        Runs of steps are taken in one jump. Returns (start or None, cursor).
+        """
+        while t + duration <= day_end:
+            block_end = self.block_end_at(t)
+            if block_end is not None:
+                t = block_end + buffer
+                continue
+            nxt = self.next_busy_start(t)
+            if nxt is None or t + duration <= nxt:
+                return t, t
+            # Steps strictly before nxt cannot fit either; stop early at day end
+            steps_to_block = -((t - nxt) // step)
+            steps_to_end = (day_end - duration - t) // step + 1
+            t = t + min(steps_to_block, steps_to_end) * step
+        return None, t
+
+    def free_intervals(self, lo: dt, hi: dt) -> List[Tuple[dt, dt]]:
+        """Free [start, end) intervals between lo and hi, in order."""
+        free = []
+        cursor = lo
+        for start, end in zip(self.starts, self.ends):
+            if end <= cursor:
+                continue
+            if start >= hi:
+                break
+            if start > cursor:
+                free.append((cursor, start))
+            cursor = max(cursor, end)
+        if cursor < hi:
+            free.append((cursor, hi))
+        return free
+
+
+class FreeIntervals:
+    """Sorted free [start, end) intervals that shrink as slots are reserved."""
+
+    def __init__(self, intervals: List[Tuple[dt, dt]]):
+        self.starts = [s for s, _ in intervals]
+        self.ends = [e for _, e in intervals]
+
+    def first_fit(self, duration: timedelta, lo: dt = None, hi: dt = None) -> Optional[dt]:
+        """Earliest start >= lo such that [start, start + duration) is free and ends by hi."""
+        i = 0
+        if lo is not None:
+            i = max(bisect.bisect_right(self.starts, lo) - 1, 0)
+        for j in range(i, len(self.starts)):
+            start = self.starts[j] if lo is None else max(self.starts[j], lo)
+            if hi is not None and start + duration > hi:
+                return None
+            if start + duration <= self.ends[j]:
+                return start
+        return None
+
+    def reserve(self, start: dt, end: dt):
+        """Remove [start, end) from the free intervals."""
+        i = max(bisect.bisect_right(self.starts, start) - 1, 0)
+        while i < len(self.starts) and self.starts[i] < end:
+            s, e = self.starts[i], self.ends[i]
+            if e <= start:
+                i += 1
+                continue
+            pieces = [(a, b) for a, b in ((s, start), (end, e)) if a < b]
+            self.starts[i:i + 1] = [a for a, _ in pieces]
+            self.ends[i:i + 1] = [b for _, b in pieces]
+            i += len(pieces)
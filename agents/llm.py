@@ -0,0 +1,110 @@
+# agents/llm.py
+import os
+import json
+import threading
+from types import SimpleNamespace
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+_clients: dict = {}
+_lock = threading.Lock()
+
+
+class LazyChatModel:
+    """
+    Stand-in for a ChatOpenAI client that builds it on first invoke/stream.
+
+    Importing langchain_openai and constructing the client costs over a
+    second, so paths that never call the model (cache hits, scheduling from
+    stored tasks, re-sending a brief) never pay for it. `model_name` is
+    available without building the client, which is all the LLM cache needs.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, **kwargs):
+        self.model_name = model
+        self.kwargs = kwargs
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            with _lock:
+                if self._client is None:
+                    from langchain_openai import ChatOpenAI
+                    self._client = ChatOpenAI(
+                        model=self.model_name,
+                        api_key=os.getenv("OPENAI_API_KEY"),
+                        **self.kwargs,
+                    )
+        return self._client
+
+    def invoke(self, *args, **kwargs):
+        return self.client.invoke(*args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        return self.client.stream(*args, **kwargs)
+
+    def structured(self, schema) -> "StructuredChatModel":
+        """This client constrained to a Pydantic schema (one wrapper per schema)."""
+        with _lock:
+            wrappers = self.__dict__.setdefault("_structured", {})
+            if schema not in wrappers:
+                wrappers[schema] = StructuredChatModel(self, schema)
+            return wrappers[schema]
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set above (e.g. with_structured_output)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+
+class StructuredChatModel:
+    """
+    A chat model that answers with the model's native structured output
+    (function calling) for a Pydantic schema.
+
+    invoke returns a message-like object whose content is the validated
+    result as JSON text, so responses go through the same cache, token
+    accounting and parsing as plain-text ones. If the model's arguments do
+    not validate, content is the raw arguments, left for local JSON repair.
+    """
+
+    def __init__(self, base: LazyChatModel, schema):
+        self.base = base
+        self.schema = schema
+        self.model_name = f"{base.model_name}:{schema.__name__}"  # separate cache entries
+
+    def invoke(self, prompt, max_tokens: int = None):
+        client = self.base.client
+        if max_tokens is not None:
+            client = client.model_copy(update={"max_tokens": max_tokens})
+        out = client.with_structured_output(self.schema, include_raw=True).invoke(prompt)
+        raw = out["raw"]
+        if out.get("parsed") is not None:
+            content = out["parsed"].model_dump_json()
+        else:
+            calls = getattr(raw, "tool_calls", None) or []
+            invalid = getattr(raw, "invalid_tool_calls", None) or []
+            if calls:
+                content = json.dumps(calls[0]["args"])
+            elif invalid:
+                content = invalid[0].get("args") or ""
+            else:
+                content = getattr(raw, "content", "")
+        return SimpleNamespace(content=content, usage_metadata=getattr(raw, "usage_metadata", None))
+
+
+def get_llm(model: str = None, **kwargs) -> LazyChatModel:
+    """
+    Shared chat model client for the agents, one per (model, options).
+
+    The model defaults to COACH_MODEL or gpt-4o-mini. Nothing is imported or
+    connected until the first call.
+    """
+    model = model or os.getenv("COACH_MODEL", DEFAULT_MODEL)
+    key = (model, tuple(sorted(kwargs.items())))
+    with _lock:
+        if key not in _clients:
+            _clients[key] = LazyChatModel(model, **kwargs)
+        return _clients[key]
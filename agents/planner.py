@@ -2,96 +2,196 @@
 
 import json
 import uuid
+import hashlib
 import datetime
 import os
-import sqlite3
+from typing import Iterable, Iterator
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from data.schemas import Task
+from data.schemas import Task, TaskPlan
+from tools.llm_cache import cached_invoke, cache_options, cache_lookup, cache_store
+from tools.json_repair import parse_json
+from tools.context import build_context, context_options
+from tools.storage import get_connection
+from tools.tokens import (TokenBudgetExceeded, estimate_tokens, prompt_allowance, record_usage,
+                          reserve, token_options)
+from agents.llm import get_llm
 
 # Load environment variables
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ENV_PATH = os.path.join(BASE_DIR, "..", ".env")
 load_dotenv(ENV_PATH)
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+# Shared LLM client, built on first call
+llm = get_llm()
 
 
-def _clean_json_output(text: str) -> str:
-    """Remove markdown fences or language tags from LLM output."""
-    text = text.strip()
-    if text.startswith("```"):
-        text = text.strip("`")
-        if text.startswith("json"):
-            text = text[len("json"):].strip()
-    return text
+def _as_int(value, default: int) -> int:
+    try:
+        return int(float(value)) or default
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_datetime(value) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        return value
+    try:
+        return datetime.datetime.fromisoformat(str(value))
+    except ValueError:
+        return datetime.datetime.now()
+
+
+def _as_str_list(value) -> list[str]:
+    if not isinstance(value, list):
+        return [str(value)] if value else []
+    return [str(v) for v in value]
 
 
 def _normalize_values(t: dict) -> dict:
-    """Ensure values match schema patterns, apply safe defaults."""
+    """Ensure values match schema patterns and types, apply safe defaults."""
     allowed_priority = {"P1", "P2", "P3"}
     allowed_energy = {"deep", "steady", "light"}
     allowed_pillar = {"Connection", "Curiosity", "Presence", "Contribution"}
     allowed_status = {"todo", "doing", "done", "blocked"}
+    allowed_source = {"goal", "reflection"}
 
     return {
-        "task_id": t.get("task_id") or str(uuid.uuid4()),
-        "title": t.get("title") or t.get("task") or "Untitled task",
-        "why": t.get("why") or "No reason provided",
-        "steps": t.get("steps") or [],
+        "task_id": str(t.get("task_id") or uuid.uuid4()),
+        "title": str(t.get("title") or t.get("task") or "Untitled task"),
+        "why": str(t.get("why") or "No reason provided"),
+        "steps": _as_str_list(t.get("steps")),
         "priority": t.get("priority") if t.get("priority") in allowed_priority else "P3",
         "energy": t.get("energy") if t.get("energy") in allowed_energy else "steady",
-        "duration_est_min": t.get("duration_est_min") or 30,
-        "due": t.get("due") or datetime.datetime.now().isoformat(),
+        "duration_est_min": _as_int(t.get("duration_est_min"), 30),
+        "due": _as_datetime(t.get("due") or datetime.datetime.now()),
         "pillar": t.get("pillar") if t.get("pillar") in allowed_pillar else "Contribution",
-        "deps": t.get("deps") or [],
+        "deps": _as_str_list(t.get("deps")),
         "status": t.get("status") if t.get("status") in allowed_status else "todo",
-        "artifact_link": t.get("artifact_link"),
-        "source": t.get("source", "goal"),
+        "artifact_link": None if t.get("artifact_link") is None else str(t["artifact_link"]),
+        "source": t.get("source") if t.get("source") in allowed_source else "goal",
     }
 
 
-def _get_yesterdays_actions(db_path="data/store.sqlite") -> list[str]:
-    """Fetch actionable lessons from yesterday's reflection (if any)."""
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute(
-        "CREATE TABLE IF NOT EXISTS journal (date TEXT PRIMARY KEY, summary TEXT, insights TEXT, actions TEXT, created_at TEXT)"
-    )
-    yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+def _to_task(t: dict) -> Task:
+    """
+    Task from a raw model dict, normalized and then validated: model output
+    is never trusted (see data.schemas.trusted for rows we stored ourselves).
+    """
+    return Task(**_normalize_values(t))
+
+
+def _parse(text: str, agent: str = None) -> list:
+    """
+    Parse the planner's full response into a list of raw task dicts, repairing
+    fences, trailing commas and truncation (tools.json_repair). With `agent`
+    the outcome counts toward parse_stats(). Raises ValueError if unrecoverable.
+    """
+    value = parse_json(text, agent)
+    if isinstance(value, dict):
+        value = value.get("tasks", [value])  # structured output wraps the list
+    if not isinstance(value, list):
+        raise ValueError(f"Planner output is not a list of tasks:\n{text[:500]}")
+    return [t for t in value if isinstance(t, dict)]
+
+
+def _iter_json_objects(chunks: Iterable[str]) -> Iterator[dict]:
+    """
+    Yield each object of a streamed JSON list as soon as its closing brace arrives.
+
+    Text before the first `[` (fences, prose) is skipped; objects nested
+    inside list items are part of their item, not yielded separately. Each
+    object goes through tools.json_repair (e.g. a trailing comma); one that
+    cannot be repaired is skipped with a warning, not the rest of the list.
+    """
+    buf = ""
+    pos = 0
+    depth = 0
+    list_depth = None  # depth just inside the first list
+    obj_start = None
+    in_string = escaped = False
+    for chunk in chunks:
+        buf += chunk
+        while pos < len(buf):
+            c = buf[pos]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif c == "\\":
+                    escaped = True
+                elif c == '"':
+                    in_string = False
+            elif c == '"' and depth > 0:
+                in_string = True
+            elif c in "[{":
+                depth += 1
+                if c == "[" and list_depth is None:
+                    list_depth = depth
+                elif c == "{" and list_depth is not None and depth == list_depth + 1:
+                    obj_start = pos
+            elif c in "]}" and depth > 0:
+                if c == "}" and obj_start is not None and depth == list_depth + 1:
+                    try:
+                        yield parse_json(buf[obj_start:pos + 1])
+                    except ValueError:
+                        print(f"⚠️ Warning: skipping an unparseable task in the planner stream: "
+                              f"{buf[obj_start:pos + 1][:200]!r}")
+                    obj_start = None
+                depth -= 1
+            pos += 1
+        # Keep only the unfinished object (if any) in the buffer
+        keep = obj_start if obj_start is not None else pos
+        buf, pos = buf[keep:], pos - keep
+        if obj_start is not None:
+            obj_start = 0
+
+
+def _get_yesterdays_actions(db_path="data/store.sqlite", day: datetime.date = None) -> list[str]:
+    """Fetch actionable lessons from the reflection of the day before `day` (default today)."""
+    cur = get_connection(db_path).cursor()
+    yesterday = ((day or datetime.date.today()) - datetime.timedelta(days=1)).isoformat()
     cur.execute(
         "SELECT actions FROM journal WHERE date = ? ORDER BY created_at DESC LIMIT 1",
         (yesterday,),
     )
 
     row = cur.fetchone()
-    conn.close()
     if row and row[0]:
         return [row[0]]
     return []
 
 
-def plan_tasks(goals: list, db_path="data/store.sqlite") -> list[Task]:
-    """Generate tasks from goals + yesterday’s actions using the LLM and map into Task schema."""
+def _get_past_reflections(goals: list, db_path="data/store.sqlite", config: dict = None) -> list[str]:
+    """
+    Past reflections and notes most relevant to the goals, from the local
+    vector index (tools.rag). `agents.planner.past_reflections` sets how many
+    (0, the default, disables retrieval).
+    """
+    k = (config or {}).get("agents", {}).get("planner", {}).get("past_reflections", 0)
+    if not k or not goals:
+        return []
+    from tools.rag import get_embedder, index_notes, query_docs
 
-    yest_actions = _get_yesterdays_actions(db_path)
+    embedder = get_embedder(config)
+    notes_dir = config.get("rag", {}).get("notes_dir")
+    if notes_dir:
+        index_notes(notes_dir, db_path, embedder)
+    query = " ".join(g.get("description", "") if isinstance(g, dict) else str(g) for g in goals)
+    return [f"({d['date'][:10]}) {d['text']}" for d in query_docs(query, k, db_path, embedder)]
 
-    prompt = f"""
-    You are the Planner. Convert these weekly goals and yesterday's actions into <=5 tasks for today.
 
-    Weekly Goals:
-    {goals}
+def _get_history(db_path="data/store.sqlite", config: dict = None, day: datetime.date = None) -> list[str]:
+    """
+    Summaries of the last days, weeks and months within a fixed token budget
+    (tools.context), per `agents.planner.history`; empty when that is unset.
+    """
+    options = context_options(config)
+    return build_context(db_path, day, **options) if options else []
 
-    Yesterday’s Actions (from reflections):
-    {yest_actions}
 
+_TASK_SCHEMA_PROSE = """
     Each task must strictly follow this JSON schema:
 
-    {{
+    {
       "task_id": "string (UUID)",
       "title": "short descriptive title",
       "why": "reason this task matters (1 sentence)",
@@ -104,26 +204,216 @@ def plan_tasks(goals: list, db_path="data/store.sqlite") -> list[Task]:
       "deps": [],
       "status": "todo|doing|done|blocked",
       "artifact_link": null
-    }}
+    }
+"""
+
+
+def _structured(config: dict = None) -> bool:
+    return bool((config or {}).get("agents", {}).get("planner", {}).get("structured_output", False))
+
+
+def _build_prompt(goals: list, yest_actions: list[str], past_reflections: list[str] = None,
+                  structured: bool = False, history: list[str] = None) -> str:
+    """
+    Planner prompt for the goals, yesterday's actions, any history summaries
+    and any retrieved past reflections.
+    In structured-output mode the Task schema travels as a function definition,
+    so it is left out of the prompt text.
+    """
+    past = ""
+    if history:
+        past += "\n    Recent History (summaries, for continuity; do not copy as tasks):\n    " + \
+            "\n    ".join(f"- {h}" for h in history) + "\n"
+    if past_reflections:
+        past += "\n    Relevant Past Reflections (for context, do not copy as tasks):\n    " + \
+            "\n    ".join(f"- {r}" for r in past_reflections) + "\n"
+    return f"""
+    You are the Planner. Convert these weekly goals and yesterday's actions into <=5 tasks for today.
 
+    Weekly Goals:
+    {goals}
+
+    Yesterday’s Actions (from reflections):
+    {yest_actions}
+{past}{"" if structured else _TASK_SCHEMA_PROSE}
     Rules:
     - Tasks that directly come from Yesterday’s Actions must include `"source": "reflection"`.
     - Tasks that come from Weekly Goals must include `"source": "goal"`.
-    - Return ONLY a valid JSON list of Task objects.
+    - {"Return the tasks with the provided function." if structured else "Return ONLY a valid JSON list of Task objects."}
     """
 
-    result = llm.invoke(prompt)
-    result_text = getattr(result, "content", str(result))
-    result_text = _clean_json_output(result_text)
 
-    try:
-        raw_tasks = json.loads(result_text)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"LLM did not return valid JSON: {e}\nOutput was:\n{result_text}")
+def _fit_prompt(goals: list, yest_actions: list[str], past_reflections: list[str],
+                allowance: int = None, structured: bool = False, history: list[str] = None) -> str:
+    """
+    Planner prompt trimmed to at most `allowance` estimated tokens (None = no limit).
+
+    Context is dropped lowest priority first: past reflections (least relevant
+    first), then history summaries (months before weeks before days), then
+    yesterday's actions, then goals (P3 before P1 when goals carry a
+    priority, else from the end of the list). The first goal is never dropped.
+    """
+    goals, yest_actions, past = list(goals), list(yest_actions), list(past_reflections or [])
+    history = list(history or [])
+    rank = {"P1": 1, "P2": 2, "P3": 3}
+    dropped = 0
+    while True:
+        prompt = _build_prompt(goals, yest_actions, past, structured, history)
+        if allowance is None or estimate_tokens(prompt) <= allowance:
+            if dropped:
+                print(f"✂️ Trimmed {dropped} planner context item(s) to fit the token budget")
+            return prompt
+        if past:
+            past.pop()
+        elif history:
+            history.pop()
+        elif yest_actions:
+            yest_actions.pop()
+        elif len(goals) > 1:
+            worst = max(range(1, len(goals)), key=lambda i: (
+                rank.get(goals[i].get("priority") if isinstance(goals[i], dict) else None, 2), i))
+            goals.pop(worst)
+        else:
+            raise TokenBudgetExceeded(
+                f"Planner prompt needs ~{estimate_tokens(prompt)} tokens, only {allowance} left in the budget"
+            )
+        dropped += 1
+
+
+def _planner_prompt(goals: list, db_path: str, config: dict, tokens: dict, day: datetime.date = None) -> str:
+    return _fit_prompt(goals, _get_yesterdays_actions(db_path, day),
+                       _get_past_reflections(goals, db_path, config), prompt_allowance(**tokens),
+                       _structured(config), _get_history(db_path, config, day))
+
+
+def plan_fingerprint(goals: list, db_path="data/store.sqlite", config: dict = None,
+                     day: datetime.date = None) -> str:
+    """
+    Hash of the inputs a plan for `day` (default today) depends on: goals, the
+    previous day's reflection actions, the history summaries, the model and the planner, scheduler
+    and user settings. A stored draft with the same fingerprint is still valid.
+    """
+    config = config or {}
+    agents = config.get("agents", {})
+    inputs = {
+        "day": (day or datetime.date.today()).isoformat(),
+        "goals": goals,
+        "actions": _get_yesterdays_actions(db_path, day),
+        "history": _get_history(db_path, config, day),
+        "model": getattr(llm, "model_name", None),
+        "planner": agents.get("planner"),
+        "scheduler": agents.get("scheduler"),
+        "user": config.get("user"),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _deduplicator(db_path: str, config: dict = None, day: datetime.date = None):
+    """tools.dedup.Deduplicator per `agents.planner.dedup`, or None when that is unset."""
+    options = (config or {}).get("agents", {}).get("planner", {}).get("dedup")
+    if not options:
+        return None
+    from tools.dedup import Deduplicator  # numpy only loads when deduplicating
+
+    return Deduplicator(db_path, day, **{k: options[k] for k in ("threshold", "window_days") if k in options})
+
+
+def plan_tasks(goals: list, db_path="data/store.sqlite", config: dict = None,
+               bypass_cache: bool = False, day: datetime.date = None) -> list[Task]:
+    """
+    Generate tasks from goals + yesterday’s actions using the LLM and map into Task schema.
+    Identical prompts are answered from the LLM cache (see `cache:` in config.yaml)
+    unless bypass_cache is set. The prompt and completion are kept within the
+    run's token budget (see tools.tokens).
+
+    With `agents.planner.structured_output: true` the model answers through
+    native function calling with the TaskPlan schema instead of free text.
+
+    `day` (default today) is the day being planned; its previous day's
+    reflection supplies the carry-over actions, and with
+    `agents.planner.history` summaries of the days, weeks and months before
+    it are added within a fixed token budget (tools.context).
+
+    With `agents.planner.dedup`, tasks that repeat a recent open task (or one
+    already planned for `day`) keep that task's id instead of adding a row
+    (tools.dedup).
+    """
+    tokens = token_options(config, "planner")
+    prompt = _planner_prompt(goals, db_path, config, tokens, day)
+    model, agent = (llm.structured(TaskPlan), "planner:structured") if _structured(config) else (llm, "planner")
+
+    result_text = cached_invoke(model, prompt, db_path, validate=lambda text: _parse(text, agent),
+                                tokens=tokens, **cache_options(config, bypass_cache))
+    raw_tasks = _parse(result_text)
 
     tasks: list[Task] = []
     for t in raw_tasks:
-        mapped = _normalize_values(t)
-        tasks.append(Task(**mapped))
+        tasks.append(_to_task(t))
+
+    dedup = _deduplicator(db_path, config, day)
+    return dedup.apply(tasks) if dedup else tasks
+
+
+def plan_tasks_stream(goals: list, db_path="data/store.sqlite", config: dict = None,
+                      bypass_cache: bool = False, day: datetime.date = None) -> Iterator[Task]:
+    """
+    Like plan_tasks, but yields each Task as soon as its JSON object is complete
+    in the model's token stream, so callers can save or show it before
+    generation finishes. A cached response is replayed without calling the model;
+    a fully streamed response is cached if it parses as a whole. Token
+    usage is recorded even if the caller stops iterating early, but only a
+    response streamed to its end is cached.
+    Structured-output mode does not stream; its tasks are yielded once parsed.
+    `day` and duplicates of recent tasks are handled as in plan_tasks, task by task.
+    """
+    if _structured(config):
+        yield from plan_tasks(goals, db_path, config, bypass_cache, day)
+        return
 
-    return tasks
+    dedup = _deduplicator(db_path, config, day)
+    try:
+        for task in _stream_tasks(goals, db_path, config, bypass_cache, day):
+            task = dedup(task) if dedup else task
+            if task is not None:
+                yield task
+    finally:
+        if dedup:
+            dedup.finish()
+
+
+def _stream_tasks(goals: list, db_path: str, config: dict, bypass_cache: bool,
+                  day: datetime.date = None) -> Iterator[Task]:
+    tokens = token_options(config, "planner")
+    prompt = _planner_prompt(goals, db_path, config, tokens, day)
+    options = cache_options(config, bypass_cache)
+
+    cached = cache_lookup(llm, prompt, db_path, **options)
+    if cached is not None:
+        record_usage(llm, prompt, cached, cached=True, **tokens)
+        for t in _parse(cached):
+            yield _to_task(t)
+        return
+
+    received: list[str] = []
+
+    def _chunks():
+        for chunk in llm.stream(prompt, max_tokens=reserve(prompt, **tokens)):
+            text = getattr(chunk, "content", str(chunk))
+            received.append(text)
+            yield text
+
+    try:
+        for t in _iter_json_objects(_chunks()):
+            yield _to_task(t)
+    finally:
+        # Also when the caller breaks out (GeneratorExit): the tokens streamed so far are spent
+        full_text = "".join(received)
+        record_usage(llm, prompt, full_text, **tokens)
+    # Only reached when the stream ran to its end. The tasks are already out, so a
+    # response that does not parse as a whole is just not cached.
+    try:
+        _parse(full_text, "planner")
+    except ValueError:
+        print("⚠️ Warning: streamed plan does not parse as a whole, not caching it")
+        return
+    cache_store(llm, prompt, full_text, db_path, **options)
@@ -1,19 +1,24 @@
 # agents/reflector.py
-import os
 import json
-from langchain_openai import ChatOpenAI
+from data.schemas import Reflection
+from tools.llm_cache import cached_invoke, cache_options
+from tools.json_repair import parse_json
+from agents.llm import get_llm
+from tools.tokens import CHARS_PER_TOKEN, TokenBudgetExceeded, estimate_tokens, prompt_allowance, token_options
 
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+llm = get_llm()
 
-def reflect_on_day(journal_text: str, config: dict = None) -> dict:
+def reflect_on_day(journal_text: str, config: dict = None, bypass_cache: bool = False) -> dict:
     """
     Summarize the reflection into structured JSON with optional mood/gratitude.
     Config may enable:
       - agents.reflector.mood_tracking (bool)
       - agents.reflector.gratitude_prompt (bool)
+      - agents.reflector.structured_output (bool): answer via native function
+        calling with the Reflection schema instead of free-text JSON
+
+    Identical journal text is answered from the LLM cache unless bypass_cache is set.
+    A journal entry too long for the remaining token budget is cut short.
 
     Returns a dict with keys: summary, insights, actions, mood?, gratitude?
     """
@@ -33,31 +38,49 @@ def reflect_on_day(journal_text: str, config: dict = None) -> dict:
         if refl_cfg.get("gratitude_prompt", False):
             schema["gratitude"] = "one thing you feel grateful for today"
 
-    prompt = f"""
+    structured = bool((config or {}).get("agents", {}).get("reflector", {}).get("structured_output", False))
+
+    def _prompt(text: str) -> str:
+        if structured:
+            fields = "; ".join(f"{k}: {v}" for k, v in schema.items())
+            return f"""
+    You are the Reflector. Analyze this journal entry and fill in: {fields}.
+
+    Journal Entry:
+    {text}
+    """
+        return f"""
     You are the Reflector. Analyze this journal entry and output ONLY valid JSON.
     Follow this schema exactly:
 
     {json.dumps(schema, indent=2)}
 
     Journal Entry:
-    {journal_text}
+    {text}
     """
 
-    result = llm.invoke(prompt)
-
-    # LangChain returns an object with .content
-    raw_text = getattr(result, "content", str(result)).strip()
+    # Keep the prompt within the run's token budget by cutting the end of the entry
+    tokens = token_options(config, "reflector")
+    allowance = prompt_allowance(**tokens)
+    prompt = _prompt(journal_text)
+    if allowance is not None and estimate_tokens(prompt) > allowance:
+        room = len(journal_text) - (estimate_tokens(prompt) - allowance) * CHARS_PER_TOKEN - 2
+        if room <= 0:
+            raise TokenBudgetExceeded(f"Reflector prompt needs ~{estimate_tokens(prompt)} tokens, only {allowance} left")
+        print(f"✂️ Journal entry cut to {room} characters to fit the token budget")
+        prompt = _prompt(journal_text[:room] + " …")
 
-    # Remove accidental code fences if present
-    if raw_text.startswith("```"):
-        raw_text = raw_text.strip("`")
-        if raw_text.startswith("json"):
-            raw_text = raw_text[len("json"):].strip()
+    def _parse(text: str, agent: str = None) -> dict:
+        parsed = parse_json(text, agent)
+        if not isinstance(parsed, dict):
+            raise ValueError(f"Reflector did not return a JSON object.\nGot:\n{text}")
+        return parsed
 
-    try:
-        parsed = json.loads(raw_text)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Reflector did not return valid JSON.\nGot:\n{raw_text}") from e
+    db_path = (config or {}).get("storage", {}).get("database", "data/store.sqlite")
+    model, agent = (llm.structured(Reflection), "reflector:structured") if structured else (llm, "reflector")
+    raw_text = cached_invoke(model, prompt, db_path, validate=lambda text: _parse(text, agent),
+                             tokens=tokens, **cache_options(config, bypass_cache))
+    parsed = _parse(raw_text)
 
     # Normalize fields into strings (DB safe)
     reflection = {
@@ -66,9 +89,9 @@ def reflect_on_day(journal_text: str, config: dict = None) -> dict:
         "actions": "\n".join(parsed.get("actions", [])),
     }
 
-    if "mood" in parsed:
+    if parsed.get("mood") is not None:
         reflection["mood"] = str(parsed["mood"])
-    if "gratitude" in parsed:
+    if parsed.get("gratitude"):
         reflection["gratitude"] = parsed["gratitude"].strip()
 
     return reflection
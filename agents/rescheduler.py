@@ -0,0 +1,169 @@
+# agents/rescheduler.py
+from datetime import datetime as dt, timedelta
+from typing import List, Optional, Tuple
+from data.schemas import Task, CalendarEvent
+from agents.intervals import Timeline
+from agents.scheduler import STEP, _parse_time, _task_event
+from tools.storage import get_task, iter_calendar_events, save_schedule_changes
+
+STATUSES = ("todo", "doing", "done", "blocked")
+
+
+def _change(kind: str, event: CalendarEvent, old: Optional[CalendarEvent]) -> dict:
+    return {
+        "change": kind,
+        "event_id": event.event_id,
+        "task_id": event.task_id,
+        "title": event.title,
+        "old_start": old.start_time if old else None,
+        "old_end": old.end_time if old else None,
+        "new_start": None if kind == "removed" else event.start_time,
+        "new_end": None if kind == "removed" else event.end_time,
+    }
+
+
+def _at(event: CalendarEvent, start: dt, end: dt) -> CalendarEvent:
+    return event.model_copy(update={
+        "start_time": start, "end_time": end, "duration_min": int((end - start).total_seconds() // 60),
+    })
+
+
+def _overlaps(event: CalendarEvent, intervals: List[Tuple[dt, dt]], buffer: timedelta) -> bool:
+    return any(event.start_time < end + buffer and event.end_time + buffer > start for start, end in intervals)
+
+
+def reschedule(events: List[CalendarEvent], task: Task, config: dict,
+               now: dt = None) -> Tuple[List[CalendarEvent], List[dict]]:
+    """
+    Adapt one day's events to `task`'s new status or duration, without replanning.
+
+    Only the task's own event and the work events it now collides with are
+    touched: events that have started and fixed blocks never move, and later tasks
+    stay where they are unless the changed task overlaps them. Those are
+    moved to the next free slot after it (in start order, so pushes cascade),
+    or removed if nothing fits before the evening reflection. Time freed by a
+    task finishing early or getting blocked is left free.
+
+    Returns (events after the change, sorted by start; changes as dicts with
+    change "added" | "moved" | "resized" | "removed", event_id, task_id,
+    title, old_start/old_end, new_start/new_end).
+    """
+    now = now or dt.now()
+    day = events[0].start_time.date() if events else now.date()
+    scheduler_cfg = config.get("agents", {}).get("scheduler", {})
+    buffer = timedelta(minutes=scheduler_cfg.get("buffer_min", 10))
+    day_end = _parse_time(config.get("schedule", {}).get("evening_reflect", "21:00"), day)
+    day_start = max(now, _parse_time(config.get("user", {}).get("wake_time", "08:00"), day))
+    duration = timedelta(minutes=task.duration_est_min)
+
+    own = next((e for e in events if e.task_id == task.task_id and e.block_type == "work"), None)
+    others = [e for e in events if e is not own]
+    changes: List[dict] = []
+    moved: List[Tuple[dt, dt]] = []  # intervals that other events must now keep clear of
+
+    def next_slot(start: dt, length: timedelta, exclude=()) -> Optional[dt]:
+        # Blocks are padded so a slot keeps the buffer after any block and before a work event
+        timeline = Timeline([(e.start_time - buffer if e.block_type == "work" else e.start_time,
+                              e.end_time + buffer, "") for e in others if e not in exclude])
+        return timeline.next_slot(start, length, day_end, timedelta(0), STEP)[0]
+
+    placed: List[CalendarEvent] = []  # events already re-placed by the cascade
+
+    def movable(e: CalendarEvent) -> bool:
+        return e is not updated and e not in placed and e.block_type == "work" and e.start_time >= now
+
+    updated = own
+    if task.status in ("done", "blocked"):
+        if own is not None and own.end_time > now:
+            if own.start_time < now:  # stopped part-way: the event ends now
+                updated = _at(own, own.start_time, now)
+                changes.append(_change("resized", updated, own))
+            else:
+                updated = None
+                changes.append(_change("removed", own, own))
+    elif own is None:
+        if task.status == "doing":
+            start = now
+        else:
+            start = next_slot(day_start, duration)
+        if start is not None and start + duration <= day_end:
+            updated = _task_event(task, start)
+            changes.append(_change("added", updated, None))
+        else:
+            print(f"⚠️ Warning: no free slot left today for '{task.title}'")
+    else:
+        start = own.start_time
+        if task.status == "doing" and own.start_time > now:
+            start = now  # started early
+        elif task.status == "todo" and own.start_time < now < own.end_time:
+            start = next_slot(day_start, duration)  # put back
+        if start is None or start + duration > day_end:
+            updated = None
+            changes.append(_change("removed", own, own))
+        elif (start, start + duration) != (own.start_time, own.end_time):
+            updated = _at(own, start, start + duration)
+            kind = "resized" if start == own.start_time else "moved"
+            changes.append(_change(kind, updated, own))
+            # Only time the event did not occupy before can collide with others
+            if start < own.start_time or start + duration > own.end_time:
+                moved.append((start, start + duration))
+
+    if updated is not None:
+        others.append(updated)
+
+    # Cascade: later work events that collide with a moved interval are re-placed
+    if moved:
+        for event in sorted(others, key=lambda e: e.start_time):
+            if not movable(event) or not _overlaps(event, moved, buffer):
+                continue
+            # Events that collide too are moving anyway: their slots count as free
+            colliding = [e for e in others if movable(e) and _overlaps(e, moved, buffer)]
+            length = event.end_time - event.start_time
+            start = next_slot(event.start_time, length, exclude=colliding)
+            others.remove(event)
+            if start is None:
+                changes.append(_change("removed", event, event))
+                print(f"⚠️ Warning: '{event.title}' no longer fits today")
+                continue
+            new = _at(event, start, start + length)
+            others.append(new)
+            placed.append(new)
+            moved.append((start, start + length))
+            changes.append(_change("moved", new, event))
+
+    others.sort(key=lambda e: e.start_time)
+    return others, changes
+
+
+def update_task(task_id: str, config: dict, status: str = None, duration_min: int = None,
+                now: dt = None, db_path: str = None) -> List[dict]:
+    """
+    Set a stored task's status and/or duration and adapt today's schedule
+    with reschedule(): no LLM call and no full reschedule. The task, the
+    changed events and a log of the changes (schedule_changes) are saved in
+    one transaction; the changes are returned.
+    """
+    db_path = db_path or config["storage"]["database"]
+    if status is not None and status not in STATUSES:
+        raise ValueError(f"Unknown status {status!r}, expected one of {', '.join(STATUSES)}")
+    if duration_min is not None and duration_min <= 0:
+        raise ValueError("duration_min must be positive")
+    task = get_task(task_id, db_path)
+    if task is None:
+        raise KeyError(f"No task {task_id}")
+
+    update = {}
+    if status is not None:
+        update["status"] = status
+    if duration_min is not None:
+        update["duration_est_min"] = int(duration_min)
+    task = task.model_copy(update=update)
+
+    now = now or dt.now()
+    events = list(iter_calendar_events(db_path, now.date(), now.date()))
+    schedule, changes = reschedule(events, task, config, now)
+    by_id = {e.event_id: e for e in schedule}
+    reason = ", ".join(f"{k}={v}" for k, v in update.items())
+    save_schedule_changes(changes, [by_id[c["event_id"]] for c in changes if c["change"] != "removed"],
+                          reason, db_path, tasks=[task])
+    return changes
@@ -2,8 +2,12 @@
 import uuid
 import datetime
 from datetime import datetime as dt, timedelta
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from data.schemas import Task, CalendarEvent
+from agents.intervals import Timeline, FreeIntervals
+
+STEP = timedelta(minutes=15)    # Search granularity after a slot doesn't fit
+BUFFER = timedelta(minutes=10)  # Buffer between tasks
 
 
 def _parse_time(time_str: str, date: datetime.date = None) -> dt:
@@ -44,7 +48,12 @@ def _get_fixed_blocks(config: dict, date: datetime.date = None) -> List[Tuple[dt
         reflect_start = _parse_time(evening_reflect, date)
         reflect_end = reflect_start + timedelta(minutes=30)
         fixed_blocks.append((reflect_start, reflect_end, "📝 Evening Reflection"))
-    
+
+    # Busy events from the user's .ics calendars (cached, see tools.calendar)
+    if config.get("calendar", {}).get("ics_paths"):
+        from tools.calendar import calendar_blocks
+        fixed_blocks.extend(calendar_blocks(config, date))
+
     return fixed_blocks
 
 
@@ -73,7 +82,48 @@ def _get_preferred_work_blocks(config: dict, date: datetime.date = None) -> List
     return work_blocks
 
 
-def schedule_tasks(tasks: List[Task], config: dict) -> List[CalendarEvent]:
+def _sort_tasks(tasks: List[Task]) -> List[Task]:
+    """Sort tasks by priority (P1 > P2 > P3) and energy (deep > steady > light)."""
+    priority_order = {"P1": 1, "P2": 2, "P3": 3}
+    energy_order = {"deep": 1, "steady": 2, "light": 3}
+    
+    return sorted(
+        tasks,
+        key=lambda t: (priority_order.get(t.priority, 3), energy_order.get(t.energy, 2))
+    )
+
+
+def _fixed_block_events(fixed_blocks: List[Tuple[dt, dt, str]]) -> List[CalendarEvent]:
+    """Fixed blocks as CalendarEvents (for display purposes)."""
+    return [
+        CalendarEvent(
+            event_id=str(uuid.uuid4()),
+            task_id=None,
+            title=label,
+            start_time=block_start,
+            end_time=block_end,
+            duration_min=int((block_end - block_start).total_seconds() / 60),
+            block_type="fixed",
+            created_at=dt.now()
+        )
+        for block_start, block_end, label in fixed_blocks
+    ]
+
+
+def _task_event(task: Task, slot_start: dt) -> CalendarEvent:
+    return CalendarEvent(
+        event_id=str(uuid.uuid4()),
+        task_id=task.task_id,
+        title=f"[{task.priority}] {task.title}",
+        start_time=slot_start,
+        end_time=slot_start + timedelta(minutes=task.duration_est_min),
+        duration_min=task.duration_est_min,
+        block_type="work",
+        created_at=dt.now()
+    )
+
+
+def schedule_tasks(tasks: List[Task], config: dict, date: datetime.date = None) -> List[CalendarEvent]:
     """
     Map tasks to calendar time blocks respecting constraints.
     
@@ -87,6 +137,13 @@ def schedule_tasks(tasks: List[Task], config: dict) -> List[CalendarEvent]:
     Args:
         tasks: List of Task objects from planner
         config: User config with wake_time, gym_time, work_blocks, etc.
+        date: Day to schedule (default today)
+    
+    With `agents.scheduler.horizon_days` > 1 tasks are spread over that many
+    days instead (see agents.horizon.schedule_horizon). With
+    `agents.scheduler.mode: solver` placement is optimized by agents.solver,
+    falling back to the greedy placement if its time budget runs out; the
+    solver plans a single day, so a multi-day horizon ignores the mode.
     
     Returns:
         List of CalendarEvent objects with scheduled time blocks
@@ -97,8 +154,12 @@ def schedule_tasks(tasks: List[Task], config: dict) -> List[CalendarEvent]:
     user_cfg = config.get("user", {})
     scheduler_cfg = config.get("agents", {}).get("scheduler", {})
     
-    # Get today's date
-    today = datetime.date.today()
+    if scheduler_cfg.get("horizon_days", 1) > 1:
+        from agents.horizon import schedule_horizon
+        return schedule_horizon(tasks, config, start_date=date, days=scheduler_cfg["horizon_days"])
+    
+    # Get the day to schedule (today unless given)
+    today = date or datetime.date.today()
     
     # Parse wake time and end-of-day
     wake_time_str = user_cfg.get("wake_time", "08:00")
@@ -115,106 +176,103 @@ def schedule_tasks(tasks: List[Task], config: dict) -> List[CalendarEvent]:
     work_blocks = _get_preferred_work_blocks(config, today)
     
     # Sort tasks by priority (P1 > P2 > P3) and energy (deep > steady > light)
-    priority_order = {"P1": 1, "P2": 2, "P3": 3}
-    energy_order = {"deep": 1, "steady": 2, "light": 3}
-    
-    sorted_tasks = sorted(
-        tasks,
-        key=lambda t: (priority_order.get(t.priority, 3), energy_order.get(t.energy, 2))
-    )
-    
-    # Generate scheduled events
-    events: List[CalendarEvent] = []
-    current_time = wake_time
+    sorted_tasks = _sort_tasks(tasks)
     
-    # Add fixed blocks first (for display purposes)
-    for block_start, block_end, label in fixed_blocks:
-        events.append(CalendarEvent(
-            event_id=str(uuid.uuid4()),
-            task_id=None,
-            title=label,
-            start_time=block_start,
-            end_time=block_end,
-            duration_min=int((block_end - block_start).total_seconds() / 60),
-            block_type="fixed",
-            created_at=dt.now()
-        ))
+    # Generate scheduled events, fixed blocks first (for display purposes)
+    events: List[CalendarEvent] = _fixed_block_events(fixed_blocks)
     
     # Schedule tasks
-    for task in sorted_tasks:
-        duration = timedelta(minutes=task.duration_est_min)
-        buffer = timedelta(minutes=10)  # Buffer between tasks
-        
-        # For deep work, prefer morning work blocks if configured
-        prefer_morning = (
-            scheduler_cfg.get("deep_work_morning", True) and 
-            task.energy == "deep"
+    timeline = Timeline(fixed_blocks)
+    noon = dt.combine(today, datetime.time(12, 0))
+    # For deep work, prefer morning work blocks if configured
+    morning_blocks = [(s, e) for s, e in work_blocks if s < noon]
+    deep_work_morning = scheduler_cfg.get("deep_work_morning", True)
+    buffer = timedelta(minutes=scheduler_cfg.get("buffer_min", 10))
+    placements = None
+    if scheduler_cfg.get("mode", "greedy") == "solver":
+        from agents.solver import solve_day
+        placements = solve_day(
+            sorted_tasks, timeline.free_intervals(wake_time, day_end), wake_time, noon, day_end,
+            max_priority_one=config.get("agents", {}).get("planner", {}).get("max_priority_one", 3),
+            buffer_min=scheduler_cfg.get("buffer_min", 10),
+            budget_s=scheduler_cfg.get("solver_time_budget_ms", 200) / 1000,
         )
-        
-        # Try to find a suitable time slot
-        scheduled = False
-        search_start = current_time
-        
-        # If prefer morning and we have work blocks, try those first
-        if prefer_morning and work_blocks:
-            for work_start, work_end in work_blocks:
-                if work_start < dt.combine(today, datetime.time(12, 0)):  # Morning blocks
-                    # Try to fit task in this work block
-                    slot_start = max(search_start, work_start)
-                    slot_end = slot_start + duration
-                    
-                    if slot_end <= work_end and _is_time_available(slot_start, slot_end, fixed_blocks):
-                        # Found a good slot
-                        events.append(CalendarEvent(
-                            event_id=str(uuid.uuid4()),
-                            task_id=task.task_id,
-                            title=f"[{task.priority}] {task.title}",
-                            start_time=slot_start,
-                            end_time=slot_end,
-                            duration_min=task.duration_est_min,
-                            block_type="work",
-                            created_at=dt.now()
-                        ))
-                        current_time = slot_end + buffer
-                        scheduled = True
-                        break
-        
-        # If not scheduled yet, find next available slot
-        if not scheduled:
-            while current_time + duration <= day_end:
-                slot_end = current_time + duration
-                
-                if _is_time_available(current_time, slot_end, fixed_blocks):
-                    # Found an available slot
-                    events.append(CalendarEvent(
-                        event_id=str(uuid.uuid4()),
-                        task_id=task.task_id,
-                        title=f"[{task.priority}] {task.title}",
-                        start_time=current_time,
-                        end_time=slot_end,
-                        duration_min=task.duration_est_min,
-                        block_type="work",
-                        created_at=dt.now()
-                    ))
-                    current_time = slot_end + buffer
-                    scheduled = True
-                    break
-                else:
-                    # Skip past the blocking fixed event
-                    for block_start, block_end, _ in fixed_blocks:
-                        if block_start <= current_time < block_end:
-                            current_time = block_end + buffer
-                            break
-                    else:
-                        # No blocking event found, just increment by 15 min
-                        current_time += timedelta(minutes=15)
-        
-        if not scheduled:
+        if placements is None:
+            print("⏱️ Solver time budget exhausted, using greedy schedule")
+    if placements is None and scheduler_cfg.get("fill_gaps", False):
+        placements = _place_first_fit(sorted_tasks, timeline, morning_blocks, wake_time, day_end,
+                                      deep_work_morning, buffer)
+    elif placements is None:
+        placements = _place_sequential(sorted_tasks, timeline, morning_blocks, wake_time, day_end,
+                                       deep_work_morning, buffer)
+    
+    for task, slot_start in placements:
+        if slot_start is None:
             # Task couldn't be scheduled - add to end of day or skip
             # For now, let's add it unscheduled with a warning
             print(f"⚠️ Warning: Could not schedule task '{task.title}' - no available time slots")
+            continue
+        events.append(_task_event(task, slot_start))
     
     # Sort all events by start time for clean display
     events.sort(key=lambda e: e.start_time)
     
     return events
+
+
+def _place_sequential(sorted_tasks: List[Task], timeline: Timeline, morning_blocks: List[Tuple[dt, dt]],
+                      day_start: dt, day_end: dt, deep_work_morning: bool = True,
+                      buffer: timedelta = BUFFER, step: timedelta = STEP) -> List[Tuple[Task, Optional[dt]]]:
+    """
+    Place tasks in order behind a moving cursor (the default scheduling rule).
+
+    A deep task first tries the earliest morning work block it fits in;
+    otherwise it takes the next slot found by Timeline.next_slot. The cursor
+    moves to the end of each placed task plus the buffer, so earlier gaps are
+    not revisited. Returns (task, start or None) per task.
+    """
+    placements = []
+    current_time = day_start
+    for task in sorted_tasks:
+        duration = timedelta(minutes=task.duration_est_min)
+        slot_start = None
+        
+        if deep_work_morning and task.energy == "deep":
+            for work_start, work_end in morning_blocks:
+                candidate = max(current_time, work_start)
+                if candidate + duration <= work_end and timeline.is_free(candidate, candidate + duration):
+                    slot_start = candidate
+                    break
+        
+        if slot_start is None:
+            slot_start, current_time = timeline.next_slot(current_time, duration, day_end, buffer, step)
+        
+        if slot_start is not None:
+            current_time = slot_start + duration + buffer
+        placements.append((task, slot_start))
+    return placements
+
+
+def _place_first_fit(sorted_tasks: List[Task], timeline: Timeline, morning_blocks: List[Tuple[dt, dt]],
+                     day_start: dt, day_end: dt, deep_work_morning: bool = True,
+                     buffer: timedelta = BUFFER) -> List[Tuple[Task, Optional[dt]]]:
+    """
+    Place each task in the earliest free gap of the day (`fill_gaps: true`),
+    so short tasks can back-fill time left before longer ones.
+    """
+    free = FreeIntervals(timeline.free_intervals(day_start, day_end))
+    placements = []
+    for task in sorted_tasks:
+        duration = timedelta(minutes=task.duration_est_min)
+        slot_start = None
+        if deep_work_morning and task.energy == "deep":
+            for work_start, work_end in morning_blocks:
+                slot_start = free.first_fit(duration, work_start, work_end)
+                if slot_start is not None:
+                    break
+        if slot_start is None:
+            slot_start = free.first_fit(duration, day_start, day_end)
+        if slot_start is not None:
+            free.reserve(slot_start - buffer, slot_start + duration + buffer)
+        placements.append((task, slot_start))
+    return placements
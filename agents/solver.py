@@ -0,0 +1,171 @@
+# agents/solver.py
+import time
+from datetime import datetime as dt, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from data.schemas import Task
+
+PRIORITY_WEIGHT = {"P1": 3, "P2": 2, "P3": 1}
+OFF_WINDOW_FACTOR = 0.5  # value kept by a task placed outside its energy window
+
+Interval = Tuple[int, int]  # [start, end) in minutes from day start
+
+
+def _topological_order(sorted_tasks: List[Task]) -> List[Task]:
+    """
+    Order tasks so every task comes after its deps (Task.deps holds task_ids).
+
+    Among tasks that are ready, the incoming (priority, energy) order is kept.
+    Deps on tasks outside the list are ignored; tasks in a cycle are appended
+    in their incoming order.
+    """
+    ids = {t.task_id for t in sorted_tasks}
+    pending = {t.task_id: {d for d in t.deps if d in ids and d != t.task_id} for t in sorted_tasks}
+    ordered: List[Task] = []
+    done = set()
+    remaining = list(sorted_tasks)
+    while remaining:
+        ready = [t for t in remaining if pending[t.task_id] <= done]
+        if not ready:
+            print(f"⚠️ Warning: dependency cycle among {[t.title for t in remaining]}")
+            ordered.extend(remaining)
+            break
+        task = ready[0]
+        ordered.append(task)
+        done.add(task.task_id)
+        remaining.remove(task)
+    return ordered
+
+
+def _first_fit(free: List[Interval], duration: int, lo: int, hi: int) -> Optional[int]:
+    """Earliest start >= lo with [start, start + duration) free and ending by hi."""
+    for start, end in free:
+        if start >= hi:
+            return None
+        slot = max(start, lo)
+        if slot + duration <= min(end, hi):
+            return slot
+    return None
+
+
+def _reserve(free: List[Interval], a: int, b: int) -> List[Interval]:
+    """Copy of free with [a, b) removed."""
+    out = []
+    for start, end in free:
+        if end <= a or start >= b:
+            out.append((start, end))
+            continue
+        if start < a:
+            out.append((start, a))
+        if b < end:
+            out.append((b, end))
+    return out
+
+
+def solve_day(sorted_tasks: List[Task], free_intervals: List[Tuple[dt, dt]], day_start: dt,
+              noon: dt, day_end: dt, max_priority_one: int = 3, buffer_min: int = 10,
+              budget_s: float = 0.2) -> Optional[List[Tuple[Task, Optional[dt]]]]:
+    """
+    Branch-and-bound over which tasks to place, maximizing priority-weighted minutes.
+
+    Tasks are visited in dependency order; each included task takes the
+    earliest free slot that starts after its deps end, either inside its
+    energy window (deep before noon, light after, steady anywhere) or, at
+    OFF_WINDOW_FACTOR of its value, anywhere in the day. P1 tasks beyond
+    max_priority_one are weighted as P2, and placed tasks keep buffer_min apart.
+
+    Returns (task, start or None) in the incoming order, or None when the
+    time budget ran out before the search finished.
+    """
+    def minute(t: dt) -> int:
+        return int((t - day_start).total_seconds() // 60)
+
+    order = _topological_order(sorted_tasks)
+    n = len(order)
+    free0 = [(minute(s), minute(e)) for s, e in free_intervals]
+    noon_m, end_m = minute(noon), minute(day_end)
+    windows = {"deep": (0, noon_m), "light": (noon_m, end_m)}
+    weights = [PRIORITY_WEIGHT.get(t.priority, 1) * t.duration_est_min for t in order]
+    capped_weights = [PRIORITY_WEIGHT["P2"] * t.duration_est_min for t in order]
+    index = {t.task_id: i for i, t in enumerate(order)}
+    deps = [[index[d] for d in t.deps if d in index and index[d] < i] for i, t in enumerate(order)]
+    # suffix_weight[i]: best case value of tasks i.. if all were placed
+    suffix_weight = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_weight[i] = suffix_weight[i + 1] + weights[i]
+    max_weight = max(PRIORITY_WEIGHT.values())
+
+    deadline = time.perf_counter() + budget_s
+    best_value = -1
+    best_starts: List[Optional[int]] = [None] * n
+    starts: List[Optional[int]] = [None] * n
+    nodes = 0
+
+    class _Timeout(Exception):
+        pass
+
+    def search(i: int, free: List[Interval], value: int, p1_used: int):
+        nonlocal best_value, best_starts, nodes
+        nodes += 1
+        if nodes % 256 == 0 and time.perf_counter() > deadline:
+            raise _Timeout
+        free_minutes = sum(e - s for s, e in free)
+        if value + min(suffix_weight[i], max_weight * free_minutes) <= best_value:
+            return
+        if i == n:
+            best_value = value
+            best_starts = list(starts)
+            return
+
+        task = order[i]
+        duration = task.duration_est_min
+        over_cap = task.priority == "P1" and p1_used >= max_priority_one
+        weight = capped_weights[i] if over_cap else weights[i]
+        if all(starts[d] is not None for d in deps[i]):
+            earliest = 0
+            for d in deps[i]:
+                earliest = max(earliest, starts[d] + order[d].duration_est_min + buffer_min)
+            win_lo, win_hi = windows.get(task.energy, (0, end_m))
+            in_window = _first_fit(free, duration, max(earliest, win_lo), win_hi)
+            anywhere = _first_fit(free, duration, earliest, end_m)
+            options = [(in_window, weight)]
+            if anywhere is not None and anywhere != in_window:
+                options.append((anywhere, int(weight * OFF_WINDOW_FACTOR)))
+            for slot, gain in options:
+                if slot is None:
+                    continue
+                starts[i] = slot
+                search(i + 1, _reserve(free, slot - buffer_min, slot + duration + buffer_min),
+                       value + gain, p1_used + (task.priority == "P1" and not over_cap))
+                starts[i] = None
+        search(i + 1, free, value, p1_used)
+
+    try:
+        search(0, free0, 0, 0)
+    except _Timeout:
+        return None
+
+    by_task: Dict[int, Optional[int]] = {id(t): s for t, s in zip(order, best_starts)}
+    return [
+        (t, None if by_task[id(t)] is None else day_start + timedelta(minutes=by_task[id(t)]))
+        for t in sorted_tasks
+    ]
+
+
+def placement_value(placements: List[Tuple[Task, Optional[dt]]], noon: dt, max_priority_one: int = 3) -> int:
+    """The solver's objective for any placement (e.g. the greedy one), for comparison."""
+    value = 0
+    p1_used = 0
+    for task, start in sorted((p for p in placements if p[1] is not None), key=lambda p: p[1]):
+        priority = task.priority
+        if priority == "P1":
+            if p1_used >= max_priority_one:
+                priority = "P2"
+            else:
+                p1_used += 1
+        gain = PRIORITY_WEIGHT.get(priority, 1) * task.duration_est_min
+        end = start + timedelta(minutes=task.duration_est_min)
+        if (task.energy == "deep" and end > noon) or (task.energy == "light" and start < noon):
+            gain = int(gain * OFF_WINDOW_FACTOR)
+        value += gain
+    return value
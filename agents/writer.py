@@ -1,4 +1,5 @@
 # agents/writer.py
+import datetime
 from typing import List, Optional
 from data.schemas import Task, CalendarEvent
 
@@ -25,8 +26,14 @@ def format_daily_brief(user, tasks: List[Task], schedule: Optional[List[Calendar
 
     # Add schedule if available
     if schedule:
-        md += "\n---\n\n## 📅 Today's Schedule\n\n"
+        multi_day = len({e.start_time.date() for e in schedule}) > 1
+        md += "\n---\n\n## 📅 " + ("Schedule" if multi_day else "Today's Schedule") + "\n\n"
+        current_day = None
         for event in schedule:
+            # Horizon schedules get one sub-heading per day
+            if multi_day and event.start_time.date() != current_day:
+                current_day = event.start_time.date()
+                md += f"\n### {current_day.strftime('%a %d %b')}\n"
             start_str = event.start_time.strftime("%H:%M")
             end_str = event.end_time.strftime("%H:%M")
             
@@ -44,3 +51,72 @@ def format_daily_brief(user, tasks: List[Task], schedule: Optional[List[Calendar
 
     return md
 
+
+def format_reflection(reflection: dict) -> str:
+    """Create the Markdown evening message for a reflect_on_day result."""
+    msg = (
+        f"# 🌙 Evening Reflection\n\n"
+        f"**Summary**:\n{reflection['summary']}\n\n"
+        f"**Insights**:\n- " + reflection['insights'].replace("\n", "\n- ") + "\n\n"
+        f"**Actions for Tomorrow**:\n- " + reflection['actions'].replace("\n", "\n- ")
+    )
+    # Add mood & gratitude if present
+    if reflection.get("mood"):
+        msg += f"\n\n**Mood Rating (1-10):** {reflection['mood']}"
+    if reflection.get("gratitude"):
+        msg += f"\n\n**Gratitude:** {reflection['gratitude']}"
+    return msg
+
+
+def format_weekly_review(user, goals: list, stats: dict) -> str:
+    """Create the Markdown weekly review from weekly_stats-style numbers."""
+    md = f"# 📊 Weekly Review for {user['name']}\n\n"
+    md += f"🗓 {stats['start']} – {stats['end']}\n\n"
+    mood = stats.get("avg_mood")
+    md += f"**Reflections:** {stats['entries']}" + (f" (average mood {mood:.1f}/10)" if mood else "") + "\n"
+    previous = stats.get("previous_moods", {})
+    if mood and previous:
+        week, last = max(previous.items())
+        change = mood - last
+        trend = "↗️" if change >= 0.5 else "↘️" if change <= -0.5 else "➡️"
+        md += f"**Mood trend:** {trend} {change:+.1f} vs the week of {week}"
+        md += f" ({len(previous) + 1}-week average {(sum(previous.values()) + mood) / (len(previous) + 1):.1f})\n"
+    if stats.get("daily_moods"):
+        days = stats["daily_moods"]
+        md += "**Daily mood:** " + " · ".join(
+            f"{datetime.date.fromisoformat(d):%a} {round(m, 1):g}" for d, m in days.items())
+        if stats.get("mood_sd") is not None:
+            md += f" (±{stats['mood_sd']:.1f})"
+        md += "\n"
+    md += f"**Tasks done:** {stats['done']}/{stats['tasks']}\n"
+    if stats.get("p1"):
+        md += f"**P1 completion:** {stats['p1_done']}/{stats['p1']} ({stats['p1_done'] / stats['p1']:.0%})\n"
+    if stats.get("month_tasks"):
+        md += f"**Month so far:** {stats['month_done']}/{stats['month_tasks']} tasks done\n"
+
+    md += "\n## 🎯 Weekly Goals\n"
+    pillars = stats.get("pillars", {})
+    for g in goals:
+        counts = pillars.get(g["pillar"], {"done": 0, "tasks": 0})
+        md += f"- **{g['pillar']}**: {g['description']} ({counts['done']}/{counts['tasks']} tasks done)\n"
+    return md
+
+
+def format_search_results(query: str, results: list[dict]) -> str:
+    """Create the Markdown list of tools.search results for `query`."""
+    if not results:
+        return f"🔎 Nothing in your journal matches “{query}”."
+    md = f"🔎 **{len(results)}** reflection(s) matching “{query}”:\n"
+    for r in results:
+        md += f"\n- **{r['date']}**: {r['snippet']}"
+    return md
+
+
+def format_last_mention(query: str, result: Optional[dict], today=None) -> str:
+    """Answer "when did I last mention X" from tools.search.last_mention."""
+    if result is None:
+        return f"🔎 You haven't mentioned “{query}” in your journal yet."
+    today = today or datetime.date.today()
+    days = (today - datetime.date.fromisoformat(result["date"])).days
+    ago = "today" if days == 0 else "yesterday" if days == 1 else f"{days} days ago"
+    return f"🔎 You last mentioned “{query}” on **{result['date']}** ({ago}):\n{result['snippet']}"
@@ -1,16 +1,24 @@
 # app.py
-import sqlite3
 import datetime
 import yaml
 import os
+import sys
+import glob
+import time
+import threading
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from dotenv import load_dotenv
 
-from agents.planner import plan_tasks
+from agents.planner import plan_fingerprint, plan_tasks, plan_tasks_stream
 from agents.scheduler import schedule_tasks
-from agents.writer import format_daily_brief
+from agents.writer import format_daily_brief, format_reflection, format_weekly_review
 from agents.reflector import reflect_on_day
-from tools.telegram import send_message
-from tools.storage import init_db, save_tasks, save_calendar_events
+from tools.storage import (init_db, get_connection, save_tasks, save_calendar_events, load_plan_draft,
+                           save_plan_draft, get_rollups)
+from tools.llm_cache import cache_stats
+from tools.tokens import run_usage, start_run
+from tools.json_repair import parse_stats
 
 CONFIG_PATH = "config.yaml"
 
@@ -18,78 +26,322 @@ CONFIG_PATH = "config.yaml"
 load_dotenv(dotenv_path=".env")
 
 
-def load_config():
-    with open(CONFIG_PATH, "r") as f:
+def load_config(path=CONFIG_PATH):
+    with open(path, "r") as f:
         return yaml.safe_load(f)
 
 
-def save_journal_entry(entry: dict, db_path="data/store.sqlite"):
-    """Save reflection into SQLite (one or multiple per day, with mood & gratitude)."""
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute(
-        """CREATE TABLE IF NOT EXISTS journal
-           (id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT,
-            summary TEXT,
-            insights TEXT,
-            actions TEXT,
-            mood TEXT,
-            gratitude TEXT,
-            created_at TEXT)"""
-    )
+def load_configs(pattern: str) -> list[dict]:
+    """Load every user config matching a glob pattern (e.g. users/*.yaml)."""
+    return [load_config(p) for p in sorted(glob.glob(pattern))]
+
+
+@lru_cache(maxsize=None)
+def _zone(name: str):
+    try:
+        return ZoneInfo(name)
+    except ZoneInfoNotFoundError:
+        print(f"⚠️ Unknown timezone {name!r}, using the server's")
+        return None
+
+
+def user_timezone(config: dict = None):
+    """The tzinfo of `user.timezone`, or the server's when it is unset or unknown."""
+    name = (config or {}).get("user", {}).get("timezone")
+    return (_zone(name) if name else None) or datetime.datetime.now().astimezone().tzinfo
+
+
+def user_today(config: dict = None) -> datetime.date:
+    """Today's date where the user is (user.timezone), which may not be the server's."""
+    return datetime.datetime.now(user_timezone(config)).date()
+
+
+def save_journal_entry(entry: dict, db_path="data/store.sqlite", config: dict = None,
+                       day: datetime.date = None):
+    """
+    Save reflection into SQLite (one or multiple per day, with mood & gratitude)
+    under `day` (default the user's today, see user_today) and append it to the
+    retrieval index (tools.rag). With
+    `agents.planner.preplan: true` the next day's plan is then drafted in the background.
+    """
     def normalize(val):
         # Convert LangChain messages or other objects into plain text
         if hasattr(val, "content"):
             return val.content
         return str(val) if val is not None else ""
-    cur.execute(
-        "INSERT INTO journal (date, summary, insights, actions, mood, gratitude, created_at) VALUES (?,?,?,?,?,?,?)",
-        (
-            datetime.date.today().isoformat(),
-            normalize(entry.get("summary")),
-            normalize(entry.get("insights")),
-            normalize(entry.get("actions")),
-            normalize(entry.get("mood")),
-            normalize(entry.get("gratitude")),
-            datetime.datetime.now().isoformat(),
-        ),
-    )
-    conn.commit()
-    conn.close()
+    day = day or user_today(config)
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO journal (date, summary, insights, actions, mood, gratitude, created_at) VALUES (?,?,?,?,?,?,?)",
+            (
+                day.isoformat(),
+                normalize(entry.get("summary")),
+                normalize(entry.get("insights")),
+                normalize(entry.get("actions")),
+                normalize(entry.get("mood")),
+                normalize(entry.get("gratitude")),
+                datetime.datetime.now().isoformat(),
+            ),
+        )
+    try:
+        from tools.rag import get_embedder, index_journal  # numpy only loads when a reflection is saved
+        index_journal(db_path, get_embedder(config))
+    except Exception as e:
+        # The entry is saved; the next query_docs call indexes it instead
+        print(f"⚠️ Warning: could not index journal entry: {e}")
+    if _preplan_enabled(config):
+        preplan_in_background(config, day + datetime.timedelta(days=1))
+
+
+def _preplan_enabled(config: dict = None) -> bool:
+    return bool((config or {}).get("agents", {}).get("planner", {}).get("preplan", False))
+
+
+def _goals(config):
+    return [g["description"] for g in config["weekly_goals"]]
 
 
-def run_morning(config):
-    """Morning cycle: fetch goals + yesterday’s actions → plan tasks → save + brief"""
+def prepare_morning_draft(config, day: datetime.date = None):
+    """
+    Plan and schedule `day` (default tomorrow in user.timezone) ahead of time and store it as a
+    draft keyed by plan_fingerprint. run_morning uses the draft as long as its
+    inputs (goals, last reflection, settings) are unchanged.
+    """
+    day = day or user_today(config) + datetime.timedelta(days=1)
+    db_path = config["storage"]["database"]
+    user = config["user"]["name"]
+    goals = _goals(config)
+    fingerprint = plan_fingerprint(goals, db_path, config, day)
+    draft = load_plan_draft(user, day, db_path)
+    if draft and draft["fingerprint"] == fingerprint:
+        return draft
+    start_run(user)  # tomorrow's planning gets its own token budget
+    max_tasks = config.get("agents", {}).get("planner", {}).get("max_tasks_per_day", 5)
+    tasks = plan_tasks(goals, db_path=db_path, config=config, day=day)[:max_tasks]
+    events = schedule_tasks(tasks, config, date=day)
+    save_plan_draft(user, day, fingerprint, tasks, events, db_path)
+    print(f"🌒 Pre-planned {len(tasks)} task(s) for {day.isoformat()}")
+    return load_plan_draft(user, day, db_path)
+
+
+_preplan_pool = None
+_preplan_lock = threading.Lock()
+
+
+def preplan_in_background(config, day: datetime.date = None):
+    """
+    Run prepare_morning_draft for `day` on a background thread; returns its Future.
+    A failed draft only means the morning run plans as usual.
+    """
+    global _preplan_pool
+    from concurrent.futures import ThreadPoolExecutor
+
+    with _preplan_lock:
+        if _preplan_pool is None:
+            # Drafts are finished before the interpreter exits (e.g. after run_evening)
+            _preplan_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="preplan")
+
+    def _prepare():
+        try:
+            return prepare_morning_draft(config, day)
+        except Exception as e:
+            print(f"⚠️ Warning: could not pre-plan tomorrow: {type(e).__name__}: {e}")
+
+    return _preplan_pool.submit(_prepare)
+
+
+def _usable_draft(config, goals, day: datetime.date = None):
+    """Tonight's draft for `day` (default the user's today) if its fingerprint still matches, else None."""
+    db_path = config["storage"]["database"]
+    today = day or user_today(config)
+    draft = load_plan_draft(config["user"]["name"], today, db_path)
+    if draft is None:
+        return None
+    if draft["fingerprint"] != plan_fingerprint(goals, db_path, config, today):
+        print("🔄 Inputs changed since the overnight draft, replanning")
+        return None
+    return draft
+
+
+def _plan_morning(config, day: datetime.date = None):
+    """
+    Morning stage 1 (LLM): goals + yesterday’s actions → tasks for `day` (default the user's today).
+    Returns (tasks, schedule); the schedule is None unless an overnight draft was used.
+    """
+    day = day or user_today(config)
     # Init DB
     init_db(config["storage"]["database"])
 
     # Goals → Planner (with yesterday’s actions) → Tasks
-    goals = [g["description"] for g in config["weekly_goals"]]
+    goals = _goals(config)
+    if _preplan_enabled(config):
+        draft = _usable_draft(config, goals, day)
+        if draft is not None:
+            print("⚡ Using the overnight plan draft")
+            return draft["tasks"], draft["events"]
 
-    max_tasks = config.get("agents", {}).get("planner", {}).get("max_tasks_per_day", 5)
-    tasks = plan_tasks(goals, db_path=config["storage"]["database"])
-    tasks = tasks[:max_tasks]
+    planner_cfg = config.get("agents", {}).get("planner", {})
+    max_tasks = planner_cfg.get("max_tasks_per_day", 5)
+    if planner_cfg.get("streaming", False):
+        # Scheduling ranks the whole plan, so nothing is placed before the stream ends;
+        # each task is shown as it arrives and all are saved in one batch by _store_morning.
+        # The stream is read to its end (not broken off at max_tasks) so the response is cached.
+        tasks = []
+        for task in plan_tasks_stream(goals, db_path=config["storage"]["database"], config=config, day=day):
+            if len(tasks) < max_tasks:
+                print(f"🧩 Planned: {task.title}")
+                tasks.append(task)
+        return tasks, None
+    tasks = plan_tasks(goals, db_path=config["storage"]["database"], config=config, day=day)
+    return tasks[:max_tasks], None
 
-    # Save to DB
+
+def _store_morning(config, tasks, schedule=None, day: datetime.date = None):
+    """Morning stage 2 (DB): save tasks, schedule them (unless drafted) and build the brief."""
+    day = day or user_today(config)
+    # Save to DB (one transaction for the whole plan)
     save_tasks(tasks, config["storage"]["database"])
 
     # Schedule tasks to calendar blocks
-    schedule = schedule_tasks(tasks, config)
+    if schedule is None:
+        schedule = schedule_tasks(tasks, config, date=day)
     save_calendar_events(schedule, config["storage"]["database"])
 
     # Daily brief with schedule
-    brief = format_daily_brief(config["user"], tasks, schedule)
+    return format_daily_brief(config["user"], tasks, schedule)
 
-    # Send
-    if config.get("delivery", {}).get("telegram", False):  ### CHANGED: toggle delivery
-        send_message(brief)
+
+def _deliver(config, text, label="brief"):
+    """Send text via Telegram, or print it when delivery is disabled."""
+    delivery = config.get("delivery", {})
+    if delivery.get("telegram", False):  ### CHANGED: toggle delivery
+        from tools.telegram import send_message  # python-telegram-bot is slow to import
+        send_message(text, chat_id=delivery.get("telegram_chat_id"))
     else:
-        print("📭 Delivery disabled, printing brief:\n", brief)
+        print(f"📭 Delivery disabled, printing {label}:\n", text)
+
+
+def run_morning(config, day: datetime.date = None):
+    """
+    Morning cycle: fetch goals + yesterday’s actions → plan tasks → save + brief.
+    `day` is the user's local date (default user_today: today in user.timezone).
+    """
+    tasks, schedule = _plan_morning(config, day)
+    brief = _store_morning(config, tasks, schedule, day)
+
+    # Send
+    _deliver(config, brief)
 
     print("🌅 Morning Brief sent")
     print(brief)
 
+
+async def _run_user_morning(config, loop, pool, llm_sem, io_sem):
+    """Run one user's morning cycle; failures are captured, never raised."""
+    user = config.get("user", {}).get("name", "?")
+    start = time.perf_counter()
+    try:
+        async with llm_sem:
+            tasks, schedule = await loop.run_in_executor(pool, _plan_morning, config)
+        async with io_sem:
+            brief = await loop.run_in_executor(pool, _store_morning, config, tasks, schedule)
+        async with io_sem:
+            await loop.run_in_executor(pool, _deliver, config, brief)
+        result = {"user": user, "ok": True, "tasks": len(tasks)}
+    except Exception as e:
+        result = {"user": user, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    result["latency_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _check_distinct_databases(configs: list[dict]):
+    """
+    Raise ValueError if two users share storage.database: the tasks, calendar
+    and plan tables have no user column, so their mornings would overwrite
+    each other's schedule and plan from each other's history.
+    """
+    owners = {}
+    for c in configs:
+        path = os.path.realpath(c["storage"]["database"])
+        user = c.get("user", {}).get("name", "?")
+        if path in owners:
+            raise ValueError(f"Users {owners[path]!r} and {user!r} share storage.database {path}; "
+                             f"give each user config its own database")
+        owners[path] = user
+
+
+async def run_morning_batch_async(configs: list[dict], max_llm_concurrency: int = 8,
+                                  max_io_concurrency: int = 16) -> dict:
+    """
+    Morning cycle for many users as an asyncio pipeline.
+
+    At most `max_llm_concurrency` planner calls are in flight at once; DB writes
+    and Telegram sends of finished users overlap with other users' LLM calls.
+    A failing user is reported in the result and does not stop the batch.
+    Each user needs their own storage.database (ValueError otherwise).
+
+    Returns a report dict: per-user results plus total time and throughput.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from tools.dedup import dedup_stats
+
+    _check_distinct_databases(configs)
+    loop = asyncio.get_running_loop()
+    llm_sem = asyncio.Semaphore(max_llm_concurrency)
+    io_sem = asyncio.Semaphore(max_io_concurrency)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_llm_concurrency + max_io_concurrency) as pool:
+        results = await asyncio.gather(
+            *(_run_user_morning(c, loop, pool, llm_sem, io_sem) for c in configs)
+        )
+    total = time.perf_counter() - start
+    ok = sum(1 for r in results if r["ok"])
+    latencies = sorted(r["latency_s"] for r in results)
+    return {
+        "users": results,
+        "succeeded": ok,
+        "failed": len(results) - ok,
+        "total_s": round(total, 3),
+        "throughput_users_per_min": round(len(results) / total * 60, 1) if total else 0.0,
+        "latency_p50_s": latencies[len(latencies) // 2] if latencies else 0.0,
+        "latency_max_s": latencies[-1] if latencies else 0.0,
+        "llm_cache": cache_stats(),
+        "tokens": run_usage(),
+        "parse": parse_stats(),
+        "dedup": dedup_stats(),
+    }
+
+
+def run_morning_batch(configs: list[dict], max_llm_concurrency: int = 8,
+                      max_io_concurrency: int = 16) -> dict:
+    """Blocking wrapper around run_morning_batch_async that prints the report."""
+    import asyncio  # only batch runs need the event loop
+
+    report = asyncio.run(run_morning_batch_async(configs, max_llm_concurrency, max_io_concurrency))
+    for r in report["users"]:
+        status = "✅" if r["ok"] else f"❌ {r['error']}"
+        print(f"{r['user']}: {r['latency_s']:.2f}s {status}")
+    print(
+        f"🌅 Batch done: {report['succeeded']}/{len(report['users'])} users in {report['total_s']:.2f}s "
+        f"({report['throughput_users_per_min']} users/min, p50 {report['latency_p50_s']:.2f}s)"
+    )
+    cache = report["llm_cache"]
+    print(f"🧠 LLM cache: {cache['hits']} hits / {cache['misses']} misses (hit rate {cache['hit_rate']:.0%})")
+    used = report["tokens"].values()
+    print(f"🔢 Tokens: {sum(u['prompt_tokens'] for u in used)} prompt + "
+          f"{sum(u['completion_tokens'] for u in used)} completion over {sum(u['calls'] for u in used)} LLM calls")
+    for agent, counts in report["parse"].items():
+        print(f"🧩 {agent} output: {counts['clean']} clean, {counts['repaired']} repaired, "
+              f"{counts['failed']} failed (success {counts['success_rate']:.0%})")
+    dedup = report["dedup"]
+    if dedup["planned"]:
+        print(f"♻️ Dedup: {dedup['carried']} carried over, {dedup['merged']} merged, {dedup['dropped']} dropped "
+              f"of {dedup['planned']} planned tasks (rate {dedup['rate']:.0%})")
+    return report
+
+
 def run_evening(config):
     print("📝 Evening reflection time. Enter your thoughts (finish with ENTER twice):")
     lines = []
@@ -108,34 +360,65 @@ def run_evening(config):
     reflection = reflect_on_day(journal_text, config=config)
 
     # Save to DB
-    save_journal_entry(reflection, config["storage"]["database"])
+    save_journal_entry(reflection, config["storage"]["database"], config)
 
     # Send formatted message
-    msg = (
-        f"# 🌙 Evening Reflection\n\n"
-        f"**Summary**:\n{reflection['summary']}\n\n"
-        f"**Insights**:\n- " + reflection['insights'].replace("\n", "\n- ") + "\n\n"
-        f"**Actions for Tomorrow**:\n- " + reflection['actions'].replace("\n", "\n- ")
-    )
-    # NEW: Add mood & gratitude if present
-    if reflection.get("mood"):
-        msg += f"\n\n**Mood Rating (1-10):** {reflection['mood']}"
-    if reflection.get("gratitude"):
-        msg += f"\n\n**Gratitude:** {reflection['gratitude']}"
-
-    ### CHANGED: toggle delivery
-    if config.get("delivery", {}).get("telegram", False):
-        send_message(msg)
-    else:
-        print("📭 Delivery disabled, printing reflection:\n", msg)
+    msg = format_reflection(reflection)
+    _deliver(config, msg, label="reflection")
 
     print("🌙 Reflection saved & sent")
     print(msg)
 
 
+def weekly_stats(db_path="data/store.sqlite", end: datetime.date = None) -> dict:
+    """
+    Journal and task numbers for the week (Monday to Sunday) containing `end`
+    (default today), from the rollup tables only: the week's totals, daily
+    moods, the previous weeks' moods for the trend and the month so far.
+    """
+    end = end or datetime.date.today()
+    start = end - datetime.timedelta(days=end.weekday())
+    week = get_rollups("week", start, start, db_path).get(start.isoformat(), {})
+    pillars = week.get("pillars", {})
+    days = get_rollups("day", start, start + datetime.timedelta(days=6), db_path)
+    earlier = get_rollups("week", start - datetime.timedelta(weeks=4), start - datetime.timedelta(days=1), db_path)
+    month = end.replace(day=1)
+    month_pillars = get_rollups("month", month, month, db_path).get(month.isoformat(), {}).get("pillars", {})
+    return {
+        "start": start.isoformat(),
+        "end": (start + datetime.timedelta(days=6)).isoformat(),
+        "entries": week.get("entries", 0),
+        "avg_mood": week.get("avg_mood"),
+        "mood_sd": week.get("mood_sd"),
+        "daily_moods": {day: r["avg_mood"] for day, r in days.items() if r["avg_mood"] is not None},
+        "previous_moods": {day: r["avg_mood"] for day, r in earlier.items() if r["avg_mood"] is not None},
+        "tasks": sum(p["tasks"] for p in pillars.values()),
+        "done": sum(p["done"] for p in pillars.values()),
+        "p1": sum(p["p1"] for p in pillars.values()),
+        "p1_done": sum(p["p1_done"] for p in pillars.values()),
+        "pillars": pillars,
+        "month_tasks": sum(p["tasks"] for p in month_pillars.values()),
+        "month_done": sum(p["done"] for p in month_pillars.values()),
+    }
+
+
+def run_weekly_review(config, end: datetime.date = None):
+    """
+    Weekly review: the week's reflections, mood trend and task completion per goal pillar → send.
+    `end` is a day of the week to review (default the user's today).
+    """
+    stats = weekly_stats(config["storage"]["database"], end or user_today(config))
+    review = format_weekly_review(config["user"], config.get("weekly_goals", []), stats)
+    _deliver(config, review, label="weekly review")
+    print("📊 Weekly review sent")
+    print(review)
+
+
 if __name__ == "__main__":
     config = load_config()
-    ### CHANGED: respect safety config (token limit)
+    # Schema setup happens once, here, not on every read/write
+    init_db(config["storage"]["database"])
+    ### CHANGED: respect safety config (token limit, enforced per user by tools.tokens)
     max_tokens = config.get("safety", {}).get("max_tokens_per_run", None)
     if max_tokens:
         os.environ["COACH_MAX_TOKENS"] = str(max_tokens)
@@ -144,6 +427,16 @@ if __name__ == "__main__":
         run_morning(config)
     elif mode == "evening":
         run_evening(config)
+    elif mode == "weekly":
+        run_weekly_review(config)
+    elif mode == "morning_batch":
+        # One config per user, e.g. COACH_CONFIGS="users/*.yaml"
+        configs = load_configs(os.getenv("COACH_CONFIGS", CONFIG_PATH))
+        run_morning_batch(
+            configs,
+            max_llm_concurrency=int(os.getenv("COACH_MAX_CONCURRENT_LLM", "8")),
+            max_io_concurrency=int(os.getenv("COACH_MAX_CONCURRENT_IO", "16")),
+        )
     else:
         print(f"Unknown mode: {mode}")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,135 @@
+# benchmarks/bench_bot.py
+"""
+Evening reflections for many users through bot.ReflectionBot, against a local
+fake Telegram Bot API and a fake LLM.
+
+Each user sends --messages messages; most finish with /done, every fifth
+relies on the idle timeout. Checks that every entry is saved once, in the
+user's own journal row dated in the user's timezone (one where it is
+already, or still, another day than on the server), and answered in the
+right chat, and compares the wall time with handling the users one after
+another. Meanwhile every user also gets a morning brief through
+tools.telegram.get_delivery, as the daemon sends it: the bot must share that
+queue, so the fake API never sees either over its rate limits.
+
+    python -m benchmarks.bench_bot --users 50 --llm-latency-ms 500
+    python -m benchmarks.bench_bot --users 200 --workers 16
+"""
+import io
+import os
+import sys
+import copy
+import time
+import asyncio
+import argparse
+import datetime
+import tempfile
+import contextlib
+from zoneinfo import ZoneInfo
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import app
+import agents.reflector
+from bot import ReflectionBot
+from tools.telegram import get_delivery
+from tools.storage import get_connection
+from benchmarks.fake_telegram import FakeTelegramServer
+from benchmarks.fakes import FakeChatModel, other_day_zone
+
+
+def _configs(users: int, db_path: str, zone: str) -> list[dict]:
+    base = app.load_config()
+    configs = []
+    for i in range(users):
+        config = copy.deepcopy(base)
+        config["user"]["name"] = f"user{i}"
+        config["user"]["timezone"] = zone
+        config["storage"]["database"] = db_path
+        config["delivery"]["telegram_chat_id"] = str(1000 + i)
+        config["cache"]["enabled"] = False
+        configs.append(config)
+    return configs
+
+
+async def _run(args, db_path: str, zone: str) -> dict:
+    server = FakeTelegramServer(global_rate=30)
+    await server.start()
+    bot = ReflectionBot(_configs(args.users, db_path, zone), token="123:bench", base_url=server.base_url,
+                        workers=args.workers, idle_seconds=args.idle_s, poll_timeout=5)
+    await bot.start()
+    briefs = get_delivery("123:bench", server.base_url)
+
+    start = time.perf_counter()
+    for i in range(args.users):
+        chat_id = 1000 + i
+        for m in range(args.messages):
+            server.push_message(chat_id, f"user{i} note {m}: worked on the deck, went for a walk.")
+        if i % 5:
+            server.push_message(chat_id, "/done")
+    server.push_message(999, "hello from a stranger")  # not configured: ignored
+    for i in range(args.users):  # from another thread, like app._deliver in the daemon
+        await asyncio.get_running_loop().run_in_executor(None, briefs.submit, 1000 + i, f"🌅 Brief for user{i}")
+
+    while len(server.sent) < 2 * args.users:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    await bot.stop()
+    await server.stop()
+    return {"elapsed": elapsed, "stats": bot.stats, "sent": server.sent, "rejected": server.rejected,
+            "shared": bot.delivery is briefs}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=3, help="messages per entry")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=float, default=500)
+    parser.add_argument("--idle-s", type=float, default=1.0, help="idle timeout that ends an entry without /done")
+    args = parser.parse_args(argv)
+
+    agents.reflector.llm = FakeChatModel(latency_ms=args.llm_latency_ms)
+    zone = other_day_zone()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(_run(args, db_path, zone))
+        rows = get_connection(db_path).execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+        dates = {d for (d,) in get_connection(db_path).execute("SELECT DISTINCT date FROM journal")}
+
+    sent, stats = result["sent"], result["stats"]
+    sequential = args.users * args.llm_latency_ms / 1000
+    print(f"👥 {args.users} users x {args.messages} messages, {args.workers} workers, "
+          f"{args.llm_latency_ms:.0f} ms per LLM call")
+    print(f"⏱ {result['elapsed']:.2f}s ({args.users / result['elapsed']:.1f} entries/s); "
+          f"one at a time would take ≥ {sequential:.1f}s")
+    print(f"📊 {stats}; {result['rejected']} sends rate-limited by the fake API")
+
+    errors = []
+    if rows != args.users or stats["saved"] != args.users:
+        errors.append(f"{rows} journal rows / {stats['saved']} saved for {args.users} users")
+    chats = sorted(int(m["chat_id"]) for m in sent)
+    if chats != sorted(list(range(1000, 1000 + args.users)) * 2):
+        errors.append("replies did not go exactly once to every user")
+    replies = [m for m in sent if not m["text"].startswith("🌅 Brief")]
+    if len(replies) != args.users or not all("Evening Reflection" in m["text"] for m in replies):
+        errors.append("a reply is not a formatted reflection")
+    if not result["shared"]:
+        errors.append("the bot does not send through the process-wide delivery queue")
+    if result["rejected"]:
+        errors.append(f"{result['rejected']} sends over the fake API's rate limits")
+    local = datetime.datetime.now(ZoneInfo(zone)).date().isoformat()
+    if dates != {local}:
+        errors.append(f"entries dated {sorted(dates)}, expected {local} in {zone} (server: {datetime.date.today()})")
+    if stats["ignored"] != 1:
+        errors.append(f"expected 1 ignored message, got {stats['ignored']}")
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Every entry saved once and answered in its own chat")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
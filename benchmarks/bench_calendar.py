@@ -0,0 +1,121 @@
+# benchmarks/bench_calendar.py
+"""
+Calendar ingestion: streaming .ics parse and expansion vs. the SQLite cache.
+
+Writes an .ics with --events events (a --recurring share of them weekly or
+daily series, the rest single events spread over two years) and times a cold
+sync, a re-sync of the unchanged file, a re-sync after touching it (same
+content) and the scheduler's fixed-block lookup per day over the horizon.
+Then checks that the following mornings' windows (moved one day at a time)
+stay cached for WINDOW_SLACK_DAYS days before the file is expanded again.
+
+    python -m benchmarks.bench_calendar --events 50000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import statistics
+from zoneinfo import ZoneInfo
+
+from agents.scheduler import _get_fixed_blocks
+from tools.calendar import WINDOW_SLACK_DAYS, sync_calendar
+from tools.storage import get_connection
+
+ZONES = ("America/New_York", "Europe/Berlin", "UTC")
+
+
+def write_ics(path: str, events: int, recurring: float, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    with open(path, "w") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench//EN\r\n")
+        for i in range(events):
+            day = today + datetime.timedelta(days=rng.randint(-365, 365))
+            start = datetime.datetime.combine(day, datetime.time(rng.randint(7, 19), rng.choice((0, 15, 30, 45))))
+            end = start + datetime.timedelta(minutes=rng.choice((15, 30, 60, 90)))
+            zone = rng.choice(ZONES)
+            when = (f"DTSTART:{start:%Y%m%dT%H%M%S}Z\r\nDTEND:{end:%Y%m%dT%H%M%S}Z" if zone == "UTC" else
+                    f"DTSTART;TZID={zone}:{start:%Y%m%dT%H%M%S}\r\nDTEND;TZID={zone}:{end:%Y%m%dT%H%M%S}")
+            f.write(f"BEGIN:VEVENT\r\nUID:bench-{i}@example.com\r\nSUMMARY:Meeting {i} with a rather long "
+                    f"title that\r\n  gets folded\r\n{when}\r\n")
+            if rng.random() < recurring:
+                rule = rng.choice(("FREQ=WEEKLY;BYDAY=MO,WE", "FREQ=DAILY;INTERVAL=2", "FREQ=WEEKLY",
+                                   "FREQ=MONTHLY;BYDAY=1TU", "FREQ=WEEKLY;COUNT=20"))
+                f.write(f"RRULE:{rule}\r\n")
+            f.write("BEGIN:VALARM\r\nACTION:DISPLAY\r\nTRIGGER:-PT10M\r\nEND:VALARM\r\nEND:VEVENT\r\n")
+        f.write("END:VCALENDAR\r\n")
+
+
+def _timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--recurring", type=float, default=0.2, help="share of events with an RRULE")
+    parser.add_argument("--horizon-days", type=int, default=14)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.ics")
+        db_path = os.path.join(tmp, "bench.sqlite")
+        write_ics(path, args.events, args.recurring)
+        config = {
+            "user": {"timezone": "America/New_York"},
+            "schedule": {"evening_reflect": "21:00"},
+            "storage": {"database": db_path},
+            "calendar": {"ics_paths": [path], "horizon_days": args.horizon_days},
+        }
+        today = datetime.date.today()
+        window = (today - datetime.timedelta(days=1), today + datetime.timedelta(days=args.horizon_days))
+        tz = ZoneInfo("America/New_York")
+
+        parsed, cold = _timed(sync_calendar, path, *window, tz=tz, db_path=db_path)
+        rows = get_connection(db_path).execute("SELECT COUNT(*) FROM calendar_occurrences").fetchone()[0]
+        again, warm = _timed(sync_calendar, path, *window, tz=tz, db_path=db_path)
+        os.utime(path)
+        touched, touch = _timed(sync_calendar, path, *window, tz=tz, db_path=db_path)
+
+        lookups, blocks = [], 0
+        for d in range(args.horizon_days):
+            fixed, seconds = _timed(_get_fixed_blocks, config, today + datetime.timedelta(days=d))
+            lookups.append(seconds)
+            blocks += len(fixed)
+
+        # Following mornings: the window moves a day at a time over an unchanged file
+        reparsed = []
+        for d in range(1, WINDOW_SLACK_DAYS + 2):
+            shift = datetime.timedelta(days=d)
+            if sync_calendar(path, window[0] + shift, window[1] + shift, tz=tz, db_path=db_path):
+                reparsed.append(d)
+
+        size_mb = os.path.getsize(path) / 1e6
+
+    print(f"📆 {args.events} events (~{size_mb:.0f} MB), {args.recurring:.0%} recurring, "
+          f"{rows} occurrences in the {args.horizon_days + 2 + WINDOW_SLACK_DAYS}-day window")
+    print(f"🥶 Cold parse + expand: {cold * 1000:.0f} ms ({args.events / cold:,.0f} events/s)")
+    print(f"♻️ Unchanged re-sync:   {warm * 1000:.2f} ms ({cold / warm:,.0f}x faster)")
+    print(f"👆 Touched, same data:  {touch * 1000:.1f} ms (hash only)")
+    print(f"🧱 Fixed blocks per day: {statistics.median(lookups) * 1000:.2f} ms median, "
+          f"{blocks / args.horizon_days:.1f} blocks/day")
+    print(f"📅 Next {WINDOW_SLACK_DAYS + 1} mornings: expanded again on day(s) {reparsed}")
+    errors = []
+    if not parsed or again or touched:
+        errors.append("the cache did not behave as expected")
+    if reparsed != [WINDOW_SLACK_DAYS + 1]:
+        errors.append(f"unchanged file expanded again on day(s) {reparsed}, "
+                      f"expected only day {WINDOW_SLACK_DAYS + 1}")
+    for e in errors:
+        print(f"❌ {e}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# benchmarks/bench_context.py
+"""
+Planner context vs. history size: cached day/week/month summaries within a
+fixed token budget (tools.context) vs. putting the whole history in the prompt.
+
+Grows a temp database to each history size (days of reflections and tasks)
+and, for planning today, reports the planner prompt's size and the time to
+build it with a cold summary cache, a warm one and after the evening's
+reflection (which drops yesterday's, this week's and this month's summaries),
+next to the size a prompt carrying every past reflection would have.
+
+    python -m benchmarks.bench_context --days 30,365,3650 --max-tokens 300
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import datetime
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from agents.planner import _planner_prompt
+from tools.storage import get_connection
+from tools.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+TASKS_PER_DAY = 5
+PILLARS = ("Connection", "Curiosity", "Presence", "Contribution")
+TITLES = ("Reach out to 3 professional contacts", "Study 1h of ML", "Draft LinkedIn post",
+          "Morning journaling", "Review Bridgit pitch deck", "Email investor follow-ups")
+GOALS = [{"pillar": "Connection", "description": "Reach out to 3 professional contacts this week"},
+         {"pillar": "Curiosity", "description": "Complete 2 hours of AI/ML learning"}]
+
+
+def _fill_history(conn, start: int, stop: int, rng: random.Random):
+    """Days [start, stop) before today: one reflection and TASKS_PER_DAY tasks each."""
+    today = datetime.date.today()
+    days = [(today - datetime.timedelta(days=i)).isoformat() for i in range(start, stop)]
+    with conn:
+        conn.executemany(
+            "INSERT INTO journal (date, summary, insights, actions, mood, created_at) VALUES (?,?,?,?,?,?)",
+            ((d, f"Focused morning on {rng.choice(TITLES).lower()}. Energy dipped after lunch.",
+              "Deep work before email works.", f"- {rng.choice(TITLES)}\n- Gym at 6", str(rng.randint(3, 10)),
+              f"{d}T21:00:00") for d in days),
+        )
+        conn.executemany(
+            "INSERT INTO tasks (id, title, priority, pillar, due, status) VALUES (?,?,?,?,?,?)",
+            ((f"t{d}-{k}", rng.choice(TITLES), rng.choice(("P1", "P2", "P3")), rng.choice(PILLARS),
+              f"{d}T10:00:00", "done" if rng.random() < 0.6 else "todo") for d in days for k in range(TASKS_PER_DAY)),
+        )
+
+
+def _full_history_tokens(conn) -> int:
+    """Tokens of a prompt section listing every past reflection's summary and actions."""
+    chars = conn.execute("SELECT SUM(length(date) + length(summary) + length(actions) + 8) FROM journal").fetchone()[0]
+    return -(-(chars or 0) // CHARS_PER_TOKEN)
+
+
+def _timed(fn) -> tuple:
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", default="30,365,3650", help="comma-separated history sizes in days")
+    parser.add_argument("--max-tokens", type=int, default=300, help="history budget (agents.planner.history)")
+    args = parser.parse_args(argv)
+    sizes = sorted(int(s) for s in args.days.split(","))
+    config = {"agents": {"planner": {"history": {"days": 3, "weeks": 3, "months": 2,
+                                                 "max_tokens": args.max_tokens}}}}
+    tokens = {"budget": None, "max_tokens": 1500}
+
+    errors = []
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        conn = get_connection(db_path)
+        print(f"{'days':>7} {'prompt tok':>11} {'history tok':>12} {'all-history tok':>16} "
+              f"{'cold ms':>8} {'warm ms':>8} {'evening ms':>11}")
+        filled = 2  # yesterday's reflection is added below, as the evening would
+        for size in sizes:
+            _fill_history(conn, filled, size + 1, rng)
+            filled = size + 1
+            with conn:
+                conn.execute("DELETE FROM context_summaries")
+            base = estimate_tokens(_planner_prompt(GOALS, db_path, {}, tokens))
+            prompt, cold = _timed(lambda: _planner_prompt(GOALS, db_path, config, tokens))
+            _, warm = _timed(lambda: _planner_prompt(GOALS, db_path, config, tokens))
+            _fill_history(conn, 1, 2, rng)
+            _, evening = _timed(lambda: _planner_prompt(GOALS, db_path, config, tokens))
+            yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+            with conn:
+                conn.execute("DELETE FROM journal WHERE date = ?", (yesterday,))
+                conn.execute("DELETE FROM tasks WHERE substr(due, 1, 10) = ?", (yesterday,))
+            size_tokens = estimate_tokens(prompt)
+            if size_tokens - base > args.max_tokens + 40:  # + the section heading and bullets
+                errors.append(f"{size} days: ~{size_tokens - base} history tokens exceed the budget")
+            print(f"{size:>7,} {size_tokens:>11,} {size_tokens - base:>12,} {base + _full_history_tokens(conn):>16,} "
+                  f"{cold:>8.2f} {warm:>8.2f} {evening:>11.2f}")
+    for e in errors:
+        print(f"❌ {e}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
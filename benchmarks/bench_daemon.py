@@ -0,0 +1,170 @@
+# benchmarks/bench_daemon.py
+"""
+daemon.JobScheduler with thousands of users in random timezones.
+
+Every user gets a morning_brief, evening_reflect and a reminder in the next
+--window seconds of their own local time; the job handlers only sleep
+--job-ms. Reports how late jobs fire, the peak number of jobs running at
+once (must not exceed --workers) and the catch-up of runs "missed" while the
+daemon was down. Then times a simulated day of heap pops and pushes.
+
+    python -m benchmarks.bench_daemon --users 2000
+    python -m benchmarks.bench_daemon --users 10000 --workers 32 --window 20
+"""
+import io
+import os
+import sys
+import time
+import heapq
+import random
+import asyncio
+import argparse
+import datetime
+import tempfile
+import threading
+import contextlib
+import statistics
+from zoneinfo import ZoneInfo
+
+from daemon import JobScheduler, user_jobs
+from tools.storage import record_job_run
+
+ZONES = ("America/New_York", "America/Los_Angeles", "Europe/London", "Europe/Berlin",
+         "Asia/Kolkata", "Asia/Tokyo", "Australia/Sydney", "UTC")
+
+
+def _configs(users: int, window: float, db_path: str, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    def at(tz, lo, hi):
+        return (now + datetime.timedelta(seconds=rng.uniform(lo, hi))).astimezone(tz).strftime("%H:%M:%S")
+
+    configs = []
+    for i in range(users):
+        zone = rng.choice(ZONES)
+        tz = ZoneInfo(zone)
+        configs.append({
+            "user": {"name": f"user{i}", "timezone": zone},
+            "storage": {"database": db_path},
+            "schedule": {
+                "morning_brief": at(tz, 2, window),
+                "evening_reflect": at(tz, 60 + 2, 60 + window),  # reminder fires ~1 minute before
+                "reminder_offsets": {"reflection": 1},
+                "catch_up_hours": 1,
+            },
+        })
+    return configs
+
+
+def _seed_missed(configs: list[dict], db_path: str, n: int) -> int:
+    """Pretend the first n users' weekly review last ran a week before its latest run."""
+    for config in configs[:n]:
+        config["schedule"]["weekly_review"] = (
+            datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=10)
+        ).astimezone(ZoneInfo(config["user"]["timezone"])).strftime("%A %H:%M:%S")
+        job = next(j for j in user_jobs(config) if j.name == "weekly_review")
+        last = job.last_before(datetime.datetime.now(datetime.timezone.utc))
+        record_job_run(job.user, job.name, last - datetime.timedelta(days=7), db_path)
+    return n
+
+
+async def _run(configs: list[dict], workers: int, job_ms: float, expected: int, timeout: float) -> dict:
+    lateness, active, peak = [], [0], [0]
+    lock = threading.Lock()
+
+    def handler(config, job):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(job_ms / 1000)
+        with lock:
+            active[0] -= 1
+
+    scheduler = JobScheduler(configs, max_workers=workers, jobs=dict.fromkeys(
+        ("morning_brief", "evening_reflect", "weekly_review", "reminder"), handler))
+    original = scheduler._fire
+
+    def fire(job, scheduled_for):
+        lateness.append((datetime.datetime.now(datetime.timezone.utc) - scheduled_for).total_seconds())
+        original(job, scheduled_for)
+
+    scheduler._fire = fire
+    stop = asyncio.Event()
+    t0 = time.perf_counter()
+    runner = asyncio.create_task(scheduler.run_forever(stop))
+    load_s = None
+    deadline = time.monotonic() + timeout
+    while scheduler.stats["ok"] + scheduler.stats["failed"] < expected and time.monotonic() < deadline:
+        if load_s is None and scheduler._heap:
+            load_s = time.perf_counter() - t0
+        await asyncio.sleep(0.05)
+    stop.set()
+    await runner
+    return {"stats": scheduler.stats, "lateness": lateness, "peak": peak[0], "load_s": load_s or 0.0,
+            "jobs": len(scheduler.jobs)}
+
+
+def _heap_day(configs: list[dict]) -> tuple:
+    """Pop and re-push every job for one simulated day without running anything."""
+    scheduler = JobScheduler(configs, catch_up=False)
+    start = datetime.datetime.now(datetime.timezone.utc)
+    for job in scheduler.jobs:
+        scheduler._push(job, job.next_after(start))
+    end = start + datetime.timedelta(days=1)
+    t0 = time.perf_counter()
+    pops = 0
+    while scheduler._heap[0][3] <= end:
+        _, _, job, at = heapq.heappop(scheduler._heap)
+        scheduler._push(job, job.next_after(at))
+        pops += 1
+    return pops, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--window", type=float, default=10.0, help="seconds over which the jobs are spread")
+    parser.add_argument("--job-ms", type=float, default=20.0, help="time each job takes")
+    parser.add_argument("--missed", type=int, default=100, help="users with a missed weekly review to catch up")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        configs = _configs(args.users, args.window, db_path)
+        missed = _seed_missed(configs, db_path, min(args.missed, args.users))
+        expected = 3 * args.users + missed
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(_run(configs, args.workers, args.job_ms, expected, args.window + 120))
+        pops, heap_s = _heap_day(configs)
+
+    stats, late = result["stats"], sorted(result["lateness"])
+    caught = [x for x in late if x > 60]  # catch-ups are ~10 minutes "late"
+    on_time = [x for x in late if x <= 60]
+    print(f"👥 {args.users} users, {result['jobs']} jobs, {args.workers} workers, {args.job_ms:.0f} ms per job")
+    print(f"📥 Heap loaded in {result['load_s'] * 1000:.0f} ms; {stats}")
+    if on_time:
+        print(f"⏱ Fire lateness: p50 {statistics.median(on_time) * 1000:.1f} ms, "
+              f"p99 {on_time[int(len(on_time) * 0.99)] * 1000:.1f} ms, max {on_time[-1] * 1000:.1f} ms")
+    print(f"🔁 Caught up {len(caught)} missed run(s) on start")
+    print(f"🏃 Peak concurrent jobs: {result['peak']}")
+    print(f"🧮 Simulated day: {pops} heap pops/pushes in {heap_s * 1000:.0f} ms "
+          f"({pops / heap_s:,.0f}/s)")
+
+    errors = []
+    if stats["ok"] != expected:
+        errors.append(f"{stats['ok']} jobs ran, expected {expected}")
+    if result["peak"] > args.workers:
+        errors.append(f"{result['peak']} jobs ran at once with {args.workers} workers")
+    if stats["caught_up"] != missed or len(caught) != missed:
+        errors.append(f"caught up {stats['caught_up']} runs, expected {missed}")
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print("✅ Every job ran once, within the worker limit")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
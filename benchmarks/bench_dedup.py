@@ -0,0 +1,198 @@
+# benchmarks/bench_dedup.py
+"""
+Task deduplication (tools.dedup) against a long plan history.
+
+Fills a temp database with --history tasks drawn from a pool of recurring
+tasks, each written slightly differently every time (numbers spelled out,
+filler words, punctuation, reworded steps), then:
+
+0. checks a first plan on the still empty database is kept as is;
+1. plans --mornings days of 5 tasks, most of them rewordings of recent open
+   tasks, and reports the dedup rate, rows added with and without dedup,
+   precision (matches that really are the same task) and time per plan;
+2. indexes the whole history at once and checks lookups against a
+   brute-force similarity scan (recall) and their speed.
+
+    python -m benchmarks.bench_dedup --history 100000
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import datetime
+import tempfile
+import statistics
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from data.schemas import Task
+from tools.dedup import Deduplicator, TaskIndex, dedup_stats, jaccard, shingles
+from tools.storage import get_connection, save_tasks
+
+PER_DAY = 20
+PLAN_SIZE = 5
+VERBS = ("Reach out to", "Draft", "Review", "Email", "Study", "Plan", "Call", "Publish", "Prepare", "Update")
+OBJECTS = ("professional contacts", "the Bridgit pitch deck", "investor follow-ups", "a LinkedIn post",
+           "ML course notes", "the weekly newsletter", "the product roadmap", "mentor questions",
+           "the budget sheet", "partnership leads", "the onboarding guide", "user interview notes")
+PILLARS = ("Connection", "Curiosity", "Presence", "Contribution")
+NUMBERS = {"3": "three", "2": "two", "1": "one"}
+
+
+def _pool(rng: random.Random, size: int) -> list[dict]:
+    """Distinct recurring tasks: title, why and steps."""
+    pool, seen = [], set()
+    while len(pool) < size:
+        title = f"{rng.choice(VERBS)} {rng.choice(('1', '2', '3', ''))} {rng.choice(OBJECTS)} " \
+                f"{rng.choice(('for Bridgit', 'this week', 'before Friday', 'for the Q3 goals', ''))} " \
+                f"#{len(pool)}"
+        title = " ".join(title.split())
+        if title not in seen:
+            seen.add(title)
+            pool.append({"title": title, "why": f"Moves {rng.choice(PILLARS).lower()} forward for {rng.choice(OBJECTS)}",
+                         "steps": [f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}" for _ in range(3)],
+                         "pillar": rng.choice(PILLARS)})
+    return pool
+
+
+def reword(item: dict, rng: random.Random) -> dict:
+    """The same task as a planner might write it again."""
+    words = [NUMBERS.get(w, w) if rng.random() < 0.5 else w for w in item["title"].split()]
+    if rng.random() < 0.4:
+        words.insert(rng.randrange(1, len(words)), rng.choice(("quickly", "today", "again", "key")))
+    title = " ".join(words) + rng.choice(("", "", ".", "!"))
+    steps = list(item["steps"])
+    steps[rng.randrange(len(steps))] = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+    return {**item, "title": title, "steps": steps}
+
+
+def _task(item: dict, due: datetime.datetime, status: str = "todo") -> Task:
+    return Task(task_id=str(uuid.uuid4()), title=item["title"], why=item["why"], steps=item["steps"],
+                priority="P2", energy="steady", duration_est_min=30, due=due, pillar=item["pillar"], status=status)
+
+
+def _fill_history(db_path: str, pool: list, count: int, start: datetime.date, rng: random.Random) -> list:
+    """`count` tasks, PER_DAY a day from `start`; returns (pool index, shingles) per task."""
+    conn = get_connection(db_path)
+    rows, truth = [], []
+    for i in range(count):
+        due = datetime.datetime.combine(start + datetime.timedelta(days=i // PER_DAY), datetime.time(9))
+        k = rng.randrange(len(pool))
+        item = reword(pool[k], rng)
+        rows.append((str(uuid.uuid4()), item["title"], item["why"], "P2", item["pillar"], due.isoformat(),
+                     "done" if rng.random() < 0.7 else "todo", json.dumps(item["steps"])))
+        truth.append((k, shingles(item["title"], item["why"], item["steps"])))
+    with conn:
+        conn.executemany("INSERT INTO tasks (id, title, why, priority, pillar, due, status, steps) "
+                         "VALUES (?,?,?,?,?,?,?,?)", rows)
+    return truth
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history", type=int, default=100_000, help="historical tasks")
+    parser.add_argument("--pool", type=int, default=5000, help="distinct recurring tasks")
+    parser.add_argument("--mornings", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=100, help="full-history lookups checked by brute force")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    pool = _pool(rng, args.pool)
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        days = -(-args.history // PER_DAY)
+        first = datetime.date.today() - datetime.timedelta(days=days + args.mornings)
+        # 0. First plan ever: nothing in the window to index
+        plan = [_task(item, datetime.datetime.combine(first, datetime.time(10))) for item in pool[:PLAN_SIZE]]
+        if Deduplicator(db_path, first).apply(plan) != plan:
+            errors.append("first plan on an empty history was not kept as is")
+        t0 = time.perf_counter()
+        truth = _fill_history(db_path, pool, args.history, first, rng)
+        print(f"📚 {args.history:,} historical tasks over {days:,} days in {time.perf_counter() - t0:.1f}s")
+
+        # 1. Mornings: mostly rewordings of recent open tasks
+        conn = get_connection(db_path)
+        plan_ms, added, naive, correct, matched = [], 0, 0, 0, 0
+        for m in range(args.mornings):
+            day = first + datetime.timedelta(days=days + m)
+            due = datetime.datetime.combine(day, datetime.time(10))
+            recent = conn.execute(
+                "SELECT title FROM tasks WHERE due >= ? AND due < ? AND status != 'done' ORDER BY random() LIMIT ?",
+                ((day - datetime.timedelta(days=7)).isoformat(), day.isoformat(), PLAN_SIZE),
+            ).fetchall()
+            plan, kinds = [], []
+            for i in range(PLAN_SIZE):
+                if i < len(recent) and rng.random() < 0.7:
+                    k = _pool_index(recent[i][0])
+                else:
+                    k = rng.randrange(len(pool))
+                plan.append(_task(reword(pool[k], rng), due))
+                kinds.append(k)
+            before = {r[0]: r[1] for r in conn.execute(
+                "SELECT id, title FROM tasks WHERE due >= ?", ((day - datetime.timedelta(days=14)).isoformat(),))}
+            t0 = time.perf_counter()
+            kept = Deduplicator(db_path, day).apply(plan)
+            plan_ms.append((time.perf_counter() - t0) * 1000)
+            for task, k in zip(plan, kinds):
+                match = next((t for t in kept if t.task_id in before and t.title == task.title), None)
+                if match is not None:
+                    matched += 1
+                    correct += _pool_index(before[match.task_id]) == k
+            naive += len(plan)
+            added += sum(t.task_id not in before for t in kept)
+            save_tasks(kept, db_path)
+            for t in kept:
+                conn.execute("UPDATE tasks SET status = ? WHERE id = ?",
+                             ("done" if rng.random() < 0.5 else "todo", t.task_id))
+            conn.commit()
+
+        stats = dedup_stats()
+        precision = correct / matched if matched else 1.0
+        print(f"🌅 {args.mornings} plans of {PLAN_SIZE}: dedup rate {stats['rate']:.0%} "
+              f"({stats['carried']} carried over, {stats['merged']} merged, {stats['dropped']} dropped), "
+              f"precision {precision:.0%}")
+        print(f"   rows added: {added:,} with dedup vs {naive:,} without; "
+              f"{statistics.median(plan_ms):.2f} ms per plan (median, {max(plan_ms):.2f} max)")
+        if precision < 0.95:
+            errors.append(f"precision {precision:.0%} below 95%")
+
+        # 2. One index over the whole history
+        t0 = time.perf_counter()
+        index = TaskIndex()
+        index.add(list(range(len(truth))), [s for _, s in truth])
+        build_s = time.perf_counter() - t0
+        queries = [reword(pool[k], rng) for k, _ in rng.sample(truth, min(args.queries, len(truth)))]
+        found, expected, lookup_ms, candidates = 0, 0, [], []
+        for q in queries:
+            s = shingles(q["title"], q["why"], q["steps"])
+            t0 = time.perf_counter()
+            candidates.append(len(index.candidates(s)))
+            key, _ = index.query(s)
+            lookup_ms.append((time.perf_counter() - t0) * 1000)
+            best = max(range(len(truth)), key=lambda i: jaccard(s, truth[i][1]))
+            if jaccard(s, truth[best][1]) >= index.threshold:
+                expected += 1
+                found += key is not None
+        recall = found / expected if expected else 1.0
+        print(f"🗂 Full-history index: {len(truth):,} tasks in {build_s:.1f}s "
+              f"({len(truth) / build_s:,.0f} tasks/s); lookup {statistics.median(lookup_ms):.2f} ms median, "
+              f"{statistics.mean(candidates):.0f} candidates; recall {recall:.0%} vs brute force "
+              f"({expected} of {len(queries)} queries have a match)")
+        if recall < 0.95:
+            errors.append(f"recall {recall:.0%} below 95%")
+    for e in errors:
+        print(f"❌ {e}")
+    return 1 if errors else 0
+
+
+def _pool_index(title: str) -> int:
+    """Pool index of a (reworded) title: they all end in the pool item's #number."""
+    return int(title.rstrip(".!").rsplit("#", 1)[1])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# benchmarks/bench_delivery.py
+"""
+Telegram delivery against a local fake Bot API server.
+
+Sends long Markdown briefs to many chats through tools.telegram.DeliveryQueue
+and checks what the fake server received: every chunk within Telegram's
+limit, code fences balanced per chunk, per-chat order kept, chats never
+messaged faster than once a second, and injected 429s retried. Prints
+throughput and the queue's stats.
+
+    python -m benchmarks.bench_delivery --chats 60 --paragraphs 120
+    python -m benchmarks.bench_delivery --fail-every 7   # inject a 429 on every 7th send
+"""
+import sys
+import time
+import asyncio
+import argparse
+
+from tools.telegram import DeliveryQueue, MAX_LEN, split_markdown
+from benchmarks.fake_telegram import FakeTelegramServer
+
+
+def _brief(chat: int, paragraphs: int) -> str:
+    """A long brief with headings, bullets and fenced code blocks."""
+    parts = [f"☀️ *Daily Brief* for chat {chat}\n"]
+    for i in range(paragraphs):
+        parts.append(f"### Section {i}\n- *Task {i}*: write the {i}th page of the report _today_\n")
+        if i % 10 == 0:
+            parts.append("```python\n" + "".join(f"print('step {j}')\n" for j in range(40)) + "```\n")
+    return "".join(parts)
+
+
+def _check(server: FakeTelegramServer, expected: dict) -> list:
+    problems = []
+    by_chat: dict = {}
+    for msg in server.sent:
+        by_chat.setdefault(msg["chat_id"], []).append(msg)
+        if len(msg["text"]) > MAX_LEN:
+            problems.append(f"chunk of {len(msg['text'])} chars to {msg['chat_id']}")
+        if msg["text"].count("```") % 2:
+            problems.append(f"unbalanced code fence in chunk to {msg['chat_id']}")
+    for chat_id, chunks in expected.items():
+        received = [m["text"] for m in by_chat.get(chat_id, [])]
+        if received != chunks:
+            problems.append(f"chat {chat_id}: got {len(received)} chunks, expected {len(chunks)} in order")
+        times = [m["at"] for m in by_chat.get(chat_id, [])]
+        if any(b - a < 0.95 for a, b in zip(times, times[1:])):
+            problems.append(f"chat {chat_id}: messages less than 1s apart")
+    return problems
+
+
+async def _run(args) -> int:
+    server = FakeTelegramServer(fail_every=args.fail_every)
+    await server.start()
+    queue = DeliveryQueue("123:bench", base_url=server.base_url, workers=args.workers)
+    await queue.start()
+
+    texts = {str(1000 + c): [_brief(c, args.paragraphs) for _ in range(args.messages)]
+             for c in range(args.chats)}
+    expected = {chat: [chunk for text in msgs for chunk in split_markdown(text)]
+                for chat, msgs in texts.items()}
+
+    t0 = time.perf_counter()
+    futures = [queue.enqueue(chat, text) for chat, msgs in texts.items() for text in msgs]
+    await asyncio.gather(*futures)
+    elapsed = time.perf_counter() - t0
+    await queue.stop()
+    await server.stop()
+
+    chunks = sum(len(c) for c in expected.values())
+    print(f"📨 {len(futures)} messages → {chunks} chunks to {args.chats} chats in {elapsed:.2f}s "
+          f"({chunks / elapsed:.1f} chunks/s)")
+    print(f"📊 {queue.stats} | server 429s: {server.rejected}")
+    problems = _check(server, expected)
+    for problem in problems[:20]:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ chunk size, fences, per-chat order and per-chat rate OK")
+    return 1 if problems else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chats", type=int, default=60)
+    parser.add_argument("--messages", type=int, default=2, help="messages per chat")
+    parser.add_argument("--paragraphs", type=int, default=120, help="sections per brief")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args(argv)
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+# benchmarks/bench_e2e.py
+"""
+End-to-end and micro benchmarks with a fake LLM, saved as JSON.
+
+Runs app.run_morning and app.run_evening against benchmarks.fakes.FakeChatModel,
+a temporary SQLite database and a delivery sink (no network), then times
+schedule_tasks, format_daily_brief, save_tasks and get_todays_schedule at
+each size. Results go to --out; --compare flags entries slower than a
+previous results file by more than --threshold.
+
+    python -m benchmarks.bench_e2e --out bench-main.json
+    python -m benchmarks.bench_e2e --out bench-branch.json --compare bench-main.json
+"""
+import io
+import os
+import sys
+import copy
+import json
+import time
+import uuid
+import random
+import argparse
+import builtins
+import tempfile
+import datetime
+import platform
+import statistics
+import subprocess
+import contextlib
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import app
+import agents.planner
+import agents.reflector
+import tools.telegram
+from data.schemas import Task, CalendarEvent
+from agents.scheduler import schedule_tasks
+from agents.writer import format_daily_brief
+from tools.storage import save_tasks, save_calendar_events, get_todays_schedule
+from tools.tokens import start_run
+from benchmarks.fakes import FakeChatModel, DeliverySink
+
+JOURNAL = [
+    "Shipped the pitch deck draft and had a good call with an investor.",
+    "Skipped the gym, felt tired in the afternoon.",
+    "Want to write the LinkedIn post tomorrow morning.",
+]
+
+
+def _config(tmp: str) -> dict:
+    config = copy.deepcopy(app.load_config())
+    config["storage"]["database"] = os.path.join(tmp, "bench.sqlite")
+    config["delivery"]["telegram"] = True  # goes to the sink
+    config["cache"]["enabled"] = False     # time the full path on every run
+    config.setdefault("rag", {})["notes_dir"] = os.path.join(tmp, "notes")
+    return config
+
+
+def _tasks(n: int, seed: int = 0) -> list[Task]:
+    rng = random.Random(seed)
+    due = datetime.datetime.now().replace(hour=17, minute=0, second=0, microsecond=0)
+    return [
+        Task(task_id=str(uuid.UUID(int=rng.getrandbits(128))), title=f"Task {i}", why="-", steps=["a"],
+             priority=rng.choice(("P1", "P2", "P3")), energy=rng.choice(("deep", "steady", "light")),
+             duration_est_min=rng.choice((15, 30, 45, 60)), due=due,
+             pillar=rng.choice(("Connection", "Curiosity", "Presence", "Contribution")),
+             status="todo", source=rng.choice(("goal", "reflection")))
+        for i in range(n)
+    ]
+
+
+def _events(n: int) -> list[CalendarEvent]:
+    start = datetime.datetime.combine(datetime.date.today(), datetime.time(6, 0))
+    return [
+        CalendarEvent(event_id=str(uuid.uuid4()), task_id=None, title=f"Block {i}",
+                      start_time=start + datetime.timedelta(seconds=i),
+                      end_time=start + datetime.timedelta(seconds=i, minutes=30),
+                      duration_min=30, block_type="work", created_at=start)
+        for i in range(n)
+    ]
+
+
+def _measure(fn, repeat: int, setup=None, warmup: int = 2) -> dict:
+    for _ in range(warmup):  # imports, page cache, first-use indexing
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "runs": repeat,
+    }
+
+
+def run_suite(sizes: list[int], repeat: int, llm_latency_ms: float = 0.0) -> dict:
+    results = {}
+    llm = FakeChatModel(latency_ms=llm_latency_ms)
+    sink = DeliverySink()
+    agents.planner.llm = agents.reflector.llm = llm
+    tools.telegram.send_message = sink.send_message
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = _config(tmp)
+        db_path = config["storage"]["database"]
+        app.init_db(db_path)
+
+        def evening():
+            lines = iter(JOURNAL + [""])
+            builtins.input, real_input = (lambda *_: next(lines)), builtins.input
+            try:
+                app.run_evening(config)
+            finally:
+                builtins.input = real_input
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Each iteration is a fresh run with its own token budget
+            results["e2e.run_evening"] = _measure(evening, repeat, setup=start_run)
+            results["e2e.run_morning"] = _measure(lambda: app.run_morning(config), repeat, setup=start_run)
+        assert len(sink.messages) == 2 * (repeat + 2), "every run should deliver one message"
+
+        for n in sizes:
+            tasks = _tasks(n)
+            with contextlib.redirect_stdout(io.StringIO()):  # unplaceable-task warnings
+                schedule = schedule_tasks(tasks, config)
+                results[f"schedule_tasks.{n}"] = _measure(lambda: schedule_tasks(tasks, config), repeat)
+            results[f"format_daily_brief.{n}"] = _measure(
+                lambda: format_daily_brief(config["user"], tasks, schedule), repeat)
+            results[f"save_tasks.{n}"] = _measure(lambda: save_tasks(tasks, db_path), repeat)
+
+            events = _events(n)
+
+            def reset_today():
+                conn = app.get_connection(db_path)
+                with conn:
+                    conn.execute("DELETE FROM calendar_events WHERE date = ?", (datetime.date.today().isoformat(),))
+                save_calendar_events(events, db_path)
+
+            reset_today()
+            results[f"get_todays_schedule.{n}"] = _measure(lambda: get_todays_schedule(db_path), repeat)
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(new: dict, old: dict, threshold: float, min_ms: float) -> list[str]:
+    """Names of benchmarks whose median got slower than old by more than threshold (and min_ms)."""
+    print(f"\n{'benchmark':<28} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    regressions = []
+    for name, result in new["results"].items():
+        before = old["results"].get(name)
+        if before is None:
+            continue
+        a, b = before["median_ms"], result["median_ms"]
+        change = (b - a) / a if a else 0.0
+        flag = change > threshold and b - a > min_ms
+        if flag:
+            regressions.append(name)
+        print(f"{name:<28} {a:>10.3f} {b:>10.3f} {change:>+8.1%}{'  ❌' if flag else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10,100,1000", help="task/event counts for the micro benchmarks")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated model latency per call")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="previous results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-ms", type=float, default=0.25, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    results = run_suite([int(s) for s in args.sizes.split(",")], args.repeat, args.llm_latency_ms)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "repeat": args.repeat,
+            "llm_latency_ms": args.llm_latency_ms,
+        },
+        "results": results,
+    }
+    print(f"{'benchmark':<28} {'median ms':>10} {'p95 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<28} {r['median_ms']:>10.3f} {r['p95_ms']:>10.3f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results saved to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print(f"Comparing {report['meta']['commit']} against {old['meta'].get('commit', '?')}")
+        regressions = compare(report, old, args.threshold, args.min_ms)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
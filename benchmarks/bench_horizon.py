@@ -0,0 +1,97 @@
+# benchmarks/bench_horizon.py
+"""
+Multi-day horizon scheduling: NumPy minute grid vs. a per-day task loop.
+
+The baseline runs the single-day scheduler core day by day, carrying
+unplaced tasks to the next working day. The grid version is
+agents.horizon.schedule_horizon.
+
+    python -m benchmarks.bench_horizon --days 7,28,91 --tasks-per-day 5
+"""
+import sys
+import time
+import random
+import argparse
+import datetime
+from datetime import datetime as dt
+
+import yaml
+
+from data.schemas import Task
+from agents.intervals import Timeline
+from agents.horizon import schedule_horizon, _working_days
+from agents.scheduler import (
+    _parse_time,
+    _get_fixed_blocks,
+    _get_preferred_work_blocks,
+    _place_sequential,
+    _sort_tasks,
+    _fixed_block_events,
+    _task_event,
+)
+
+
+def _per_day_loop(tasks, config, start_date, days):
+    """Schedule day by day with the single-day placement loop; overflow rolls forward."""
+    cap = config["agents"]["planner"]["max_tasks_per_day"]
+    remaining = _sort_tasks(tasks)
+    events = []
+    for day in _working_days(config, start_date, days):
+        if not remaining:
+            break
+        noon = dt.combine(day, datetime.time(12, 0))
+        morning = [(s, e) for s, e in _get_preferred_work_blocks(config, day) if s < noon]
+        fixed = _get_fixed_blocks(config, day)
+        events.extend(_fixed_block_events(fixed))
+        placements = _place_sequential(
+            remaining[:cap], Timeline(fixed), morning,
+            _parse_time(config["user"]["wake_time"], day),
+            _parse_time(config["schedule"]["evening_reflect"], day),
+        )
+        events.extend(_task_event(t, start) for t, start in placements if start is not None)
+        done = {id(t) for t, start in placements if start is not None}
+        remaining = [t for t in remaining if id(t) not in done]
+    return events
+
+
+def _tasks(n: int, seed: int = 11):
+    rng = random.Random(seed)
+    now = dt.now()
+    return [
+        Task(task_id=str(i), title=f"task {i}", why="-", steps=[], priority=rng.choice(("P1", "P2", "P3")),
+             energy=rng.choice(("deep", "steady", "light")), duration_est_min=rng.choice((30, 45, 60, 90, 120)),
+             due=now, pillar="Presence", status="todo")
+        for i in range(n)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", default="7,28,91")
+    parser.add_argument("--tasks-per-day", type=int, default=5)
+    parser.add_argument("--config", default="config.yaml")
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    config["agents"]["planner"]["max_tasks_per_day"] = args.tasks_per_day
+    start = datetime.date.today()
+
+    print(f"{'days':>5} {'tasks':>6} {'loop_ms':>9} {'loop_placed':>12} {'grid_ms':>9} {'grid_placed':>12}")
+    for days in (int(d) for d in args.days.split(",")):
+        tasks = _tasks(days * args.tasks_per_day)
+
+        t0 = time.perf_counter()
+        loop_placed = sum(1 for e in _per_day_loop(tasks, config, start, days) if e.task_id)
+        t_loop = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        events = schedule_horizon(tasks, config, start_date=start, days=days)
+        t_grid = (time.perf_counter() - t0) * 1000
+        grid_placed = sum(1 for e in events if e.task_id)
+
+        print(f"{days:>5} {len(tasks):>6} {t_loop:>9.1f} {loop_placed:>12} {t_grid:>9.1f} {grid_placed:>12}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
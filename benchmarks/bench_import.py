@@ -0,0 +1,73 @@
+# benchmarks/bench_import.py
+"""
+Import time of the CLI entry point, with a regression threshold.
+
+Runs `python -X importtime -c "import app"` in fresh interpreters and reports
+the median import time and the slowest top-level imports. Exits non-zero if
+the median exceeds --max-ms or if a module that should be deferred
+(langchain_openai, openai, telegram, numpy) is imported at startup.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --module app --runs 7 --max-ms 400
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("langchain_openai", "openai", "telegram", "numpy")
+
+
+def _import_once(module: str) -> tuple[float, dict]:
+    """(total ms, {module: cumulative ms}) for one fresh import of module."""
+    # No API key on purpose: importing must not build an LLM client
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cum) / 1000
+    return cumulative.get(module, 0.0), cumulative
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=500.0, help="fail above this median")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    runs = [_import_once(args.module) for _ in range(args.runs)]
+    median = statistics.median(total for total, _ in runs)
+    _, modules = runs[-1]
+    print(f"⏱️ import {args.module}: median {median:.1f} ms over {args.runs} runs "
+          f"(threshold {args.max_ms:.0f} ms)")
+    print(f"{'cumulative ms':>14}  module")
+    for name, ms in sorted(modules.items(), key=lambda m: -m[1])[:args.top]:
+        print(f"{ms:>14.1f}  {name}")
+
+    failed = False
+    eager = sorted({m.split(".")[0] for m in modules} & set(DEFERRED))
+    if eager:
+        print(f"❌ imported at startup, should be deferred: {', '.join(eager)}")
+        failed = True
+    if median > args.max_ms:
+        print(f"❌ import time regression: {median:.1f} ms > {args.max_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("✅ import time OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
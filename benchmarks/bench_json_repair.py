@@ -0,0 +1,85 @@
+# benchmarks/bench_json_repair.py
+"""
+Repair of truncated model output (tools.json_repair).
+
+Cuts the fake model's planner reply (plain list and structured {"tasks": ...})
+and reflector reply off at every character and parses each prefix. Reports
+how many prefixes are recovered and the time per parse, and checks that no
+recovered value keeps a string that was cut off mid-value (a task titled
+"Rea" from `[{"title": "Rea`).
+
+    python -m benchmarks.bench_json_repair --tasks 5
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from agents.planner import _parse
+from benchmarks.fakes import FakeChatModel
+from tools.json_repair import parse_json
+
+
+def _cut_strings(got, want, path: str = "$") -> list[str]:
+    """Paths where `got` holds a string that differs from `want` there (a cut-off value)."""
+    if isinstance(got, str):
+        return [] if got == want else [f"{path} = {got!r}"]
+    if isinstance(got, dict) and isinstance(want, dict):
+        return [p for k, v in got.items() for p in _cut_strings(v, want.get(k), f"{path}.{k}")]
+    if isinstance(got, list) and isinstance(want, list):
+        return [p for i, v in enumerate(got) for p in _cut_strings(v, want[i] if i < len(want) else None,
+                                                                   f"{path}[{i}]")]
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=5, help="tasks in the planner reply")
+    args = parser.parse_args(argv)
+
+    replies = {
+        "planner": FakeChatModel(tasks=args.tasks)._reply("plan"),
+        "planner:structured": FakeChatModel(tasks=args.tasks, wrap="tasks")._reply("plan"),
+        "reflector": FakeChatModel()._reply("You are the Reflector"),
+    }
+    errors = []
+    for name, text in replies.items():
+        want = parse_json(text)
+        recovered, failed, parse_us = 0, 0, []
+        for cut in range(1, len(text)):
+            t0 = time.perf_counter()
+            try:
+                got = parse_json(text[:cut])
+            except ValueError:
+                failed += 1
+                continue
+            finally:
+                parse_us.append((time.perf_counter() - t0) * 1e6)
+            recovered += 1
+            bad = _cut_strings(got, want)
+            if bad:
+                errors.append(f"{name} cut at {cut}: kept a cut-off string, {bad[0]}")
+        print(f"✂️ {name}: {len(text) - 1} truncations, {recovered} recovered, {failed} unrecoverable; "
+              f"{statistics.median(parse_us):.0f} µs per parse (median, {max(parse_us):.0f} max)")
+
+    # The planner keeps only complete tasks
+    try:
+        tasks = _parse('{"title": "Rea')
+        errors.append(f"a lone task cut off mid-title was parsed as {tasks}")
+    except ValueError:
+        pass
+    tasks = _parse('[{"title": "Read docs"}, {"title": "Rea')
+    if [t.get("title") for t in tasks] != ["Read docs"]:
+        errors.append(f"a list cut off mid-title parsed as {tasks}, expected only the complete task")
+    if not errors:
+        print("✅ no recovered value kept a cut-off string")
+    for e in errors[:10]:
+        print(f"❌ {e}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# benchmarks/bench_load.py
+"""
+Rows/sec for loading models from SQLite.
+
+Compares the validated path (CalendarEvent(...) with per-row
+fromisoformat) against the trusted path (get_todays_schedule /
+iter_calendar_events / iter_tasks with trusted construction and batched
+datetime decoding). Planner output is always validated, so it is not
+compared.
+
+    python -m benchmarks.bench_load --rows 1000,10000,100000
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import tempfile
+import datetime
+
+from data.schemas import Task, CalendarEvent
+from tools.storage import (
+    get_connection,
+    save_tasks,
+    save_calendar_events,
+    get_todays_schedule,
+    iter_calendar_events,
+    iter_tasks,
+)
+from benchmarks.bench_e2e import _tasks
+
+
+def _validated_schedule(db_path: str) -> list[CalendarEvent]:
+    """get_todays_schedule as it was: full validation per row."""
+    rows = get_connection(db_path).execute(
+        """SELECT event_id, task_id, title, start_time, end_time, duration_min, block_type, created_at
+           FROM calendar_events WHERE date = ? ORDER BY start_time""",
+        (datetime.date.today().isoformat(),),
+    ).fetchall()
+    return [
+        CalendarEvent(event_id=r[0], task_id=r[1], title=r[2],
+                      start_time=datetime.datetime.fromisoformat(r[3]),
+                      end_time=datetime.datetime.fromisoformat(r[4]),
+                      duration_min=r[5], block_type=r[6],
+                      created_at=datetime.datetime.fromisoformat(r[7]))
+        for r in rows
+    ]
+
+
+def _today_events(n: int) -> list[CalendarEvent]:
+    day = datetime.datetime.combine(datetime.date.today(), datetime.time(8, 0))
+    created = datetime.datetime.now()
+    return [
+        CalendarEvent(event_id=str(uuid.uuid4()), task_id=str(uuid.uuid4()), title=f"[P2] Task {i}",
+                      start_time=day + datetime.timedelta(minutes=15 * (i % 48)),
+                      end_time=day + datetime.timedelta(minutes=15 * (i % 48) + 30),
+                      duration_min=30, block_type="work", created_at=created)
+        for i in range(n)
+    ]
+
+
+def _rate(fn, rows: int, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+        assert len(out) == rows, (len(out), rows)
+    return rows / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", default="1000,10000,100000", help="comma-separated row counts")
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>8} {'path':<22} {'validated rows/s':>17} {'trusted rows/s':>15} {'speedup':>8}")
+    for n in (int(s) for s in args.rows.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.sqlite")
+            save_calendar_events(_today_events(n), db_path)
+            save_tasks(_tasks(n), db_path)
+
+            pairs = [
+                ("get_todays_schedule", lambda: _validated_schedule(db_path), lambda: get_todays_schedule(db_path)),
+                ("iter_calendar_events", lambda: _validated_schedule(db_path), lambda: list(iter_calendar_events(db_path))),
+                ("iter_tasks", lambda: [Task.model_validate(t.model_dump()) for t in iter_tasks(db_path)],
+                 lambda: list(iter_tasks(db_path))),
+            ]
+            for name, before, after in pairs:
+                a, b = _rate(before, n), _rate(after, n)
+                print(f"{n:>8,} {name:<22} {a:>17,.0f} {b:>15,.0f} {b / a:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
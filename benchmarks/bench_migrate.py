@@ -0,0 +1,130 @@
+# benchmarks/bench_migrate.py
+"""
+Schema migration of a large journal while the app keeps writing.
+
+Builds an early-shape journal (date as key, no id/mood/gratitude) with
+--rows rows, then migrates it twice while a writer thread saves a journal
+entry every --write-ms: once the way the old one-shot data/migrate.py did
+(rename + one INSERT ... SELECT holding the write lock) and once with
+tools.storage.MIGRATIONS (batched copy). Reports migration time, the
+writer's worst stall and whether any write was lost.
+
+    python -m benchmarks.bench_migrate --rows 2000000
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+import contextlib
+
+from tools import storage
+from tools.migrations import migrate, schema_version, transaction
+
+
+def _old_journal(db_path: str, rows: int):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""CREATE TABLE journal
+                    (date TEXT PRIMARY KEY, summary TEXT, insights TEXT, actions TEXT, created_at TEXT)""")
+    with conn:
+        conn.execute(
+            """WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n LIMIT ?)
+               INSERT INTO journal
+               SELECT datetime('2000-01-01', '+' || x || ' minutes'),
+                      'Summary of a day with a few sentences in it ' || x,
+                      'Insight ' || x, 'Action ' || x, datetime('2000-01-01', '+' || x || ' minutes')
+               FROM n""",
+            (rows,),
+        )
+    conn.close()
+
+
+def _one_shot(conn: sqlite3.Connection, progress=None):
+    """data/migrate.py before the migration engine, in one transaction."""
+    with transaction(conn):
+        conn.execute("ALTER TABLE journal RENAME TO journal_old")
+        conn.execute(storage._JOURNAL_TABLE.format(table="journal"))
+        conn.execute("""INSERT INTO journal (date, summary, insights, actions, created_at)
+                        SELECT date, summary, insights, actions, created_at FROM journal_old""")
+        conn.execute("DROP TABLE journal_old")
+
+
+class Writer(threading.Thread):
+    """Saves a journal entry every `interval` seconds and records how long each save took."""
+
+    def __init__(self, db_path: str, interval: float):
+        super().__init__(daemon=True)
+        self.db_path, self.interval = db_path, interval
+        self.stop = threading.Event()
+        self.latencies, self.written = [], 0
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=60)
+        conn.execute("PRAGMA busy_timeout=60000")
+        while not self.stop.is_set():
+            t0 = time.perf_counter()
+            with conn:
+                conn.execute("INSERT INTO journal (date, summary, insights, actions, created_at) "
+                             "VALUES (?, 'live', '', '', datetime('now'))", (f"live-{self.written}",))
+            self.latencies.append(time.perf_counter() - t0)
+            self.written += 1
+            time.sleep(self.interval)
+        conn.close()
+
+
+def _run(db_path: str, rows: int, write_ms: float, online: bool) -> dict:
+    _old_journal(db_path, rows)
+    conn = sqlite3.connect(db_path, timeout=60)
+    for pragma in storage._PRAGMAS:
+        conn.execute(pragma)
+    writer = Writer(db_path, write_ms / 1000)
+    writer.start()
+    time.sleep(0.2)
+    t0 = time.perf_counter()
+    if online:
+        with contextlib.redirect_stdout(sys.stderr):  # progress lines
+            migrate(conn, storage.MIGRATIONS)
+    else:
+        _one_shot(conn)
+    seconds = time.perf_counter() - t0
+    time.sleep(0.2)
+    writer.stop.set()
+    writer.join()
+    count = conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(journal)")}
+    version = schema_version(conn)
+    conn.close()
+    late = sorted(writer.latencies)
+    return {"seconds": seconds, "max_ms": late[-1] * 1000, "p99_ms": late[int(len(late) * 0.99)] * 1000,
+            "writes": writer.written, "lost": rows + writer.written - count,
+            "ok": {"id", "mood", "gratitude"} <= columns, "version": version}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--write-ms", type=float, default=20.0, help="pause between the writer's saves")
+    args = parser.parse_args(argv)
+
+    errors = []
+    print(f"📚 {args.rows:,} journal rows, a live write every {args.write_ms:.0f} ms")
+    print(f"{'method':>10} {'seconds':>8} {'max write ms':>13} {'p99 ms':>8} {'writes':>7} {'lost':>5}")
+    for online in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            r = _run(os.path.join(tmp, "bench.sqlite"), args.rows, args.write_ms, online)
+        name = "batched" if online else "one-shot"
+        print(f"{name:>10} {r['seconds']:>8.1f} {r['max_ms']:>13.0f} {r['p99_ms']:>8.1f} {r['writes']:>7} {r['lost']:>5}")
+        if r["lost"] or not r["ok"]:
+            errors.append(f"{name}: {r['lost']} writes lost, new columns present: {r['ok']}")
+        if online and r["version"] != storage.MIGRATIONS[-1][0]:
+            errors.append(f"schema version {r['version']} after migrating")
+    for e in errors:
+        print(f"❌ {e}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
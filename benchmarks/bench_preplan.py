@@ -0,0 +1,87 @@
+# benchmarks/bench_preplan.py
+"""
+Morning latency with and without the overnight plan draft (agents.planner.preplan).
+
+Saves an evening reflection with preplan on (which drafts the next day in
+the background) for a user whose timezone is on another date than the
+server, then times run_morning for that user's day: from the draft, and
+after the goals changed (fingerprint mismatch, so it replans), against the
+fake LLM with --llm-latency-ms per call.
+
+    python -m benchmarks.bench_preplan --llm-latency-ms 1500
+"""
+import io
+import os
+import sys
+import copy
+import time
+import argparse
+import datetime
+import tempfile
+import contextlib
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import app
+import agents.planner
+import agents.reflector
+import tools.telegram
+from benchmarks.bench_e2e import _config
+from benchmarks.fakes import FakeChatModel, DeliverySink, other_day_zone
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    return time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--llm-latency-ms", type=float, default=1500)
+    args = parser.parse_args(argv)
+
+    llm = FakeChatModel(latency_ms=args.llm_latency_ms)
+    sink = DeliverySink()
+    agents.planner.llm = agents.reflector.llm = llm
+    tools.telegram.send_message = sink.send_message
+
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config = _config(tmp)
+        config["agents"]["planner"]["preplan"] = True
+        config["user"]["timezone"] = other_day_zone()  # the draft must be for the user's tomorrow
+        app.init_db(config["storage"]["database"])
+
+        reflection = {"summary": "Good day.", "insights": "Focus works.", "actions": "Call the investor"}
+        evening = _timed(lambda: app.save_journal_entry(reflection, config["storage"]["database"], config))
+        drafted = _timed(lambda: app._preplan_pool.shutdown(wait=True))
+
+        # Wake up the next day (where the user is): yesterday's reflection is the one just saved
+        tomorrow = app.user_today(config) + datetime.timedelta(days=1)
+        calls = llm.calls
+        from_draft = _timed(lambda: app.run_morning(config, tomorrow))
+        if llm.calls != calls:
+            errors.append("the morning run called the LLM although a matching draft existed")
+
+        changed = copy.deepcopy(config)
+        changed["weekly_goals"][0]["description"] += " (updated)"
+        calls = llm.calls
+        replanned = _timed(lambda: app.run_morning(changed, tomorrow))
+        if llm.calls == calls:
+            errors.append("changed goals did not trigger a replan")
+
+    print(f"🌙 save_journal_entry (draft queued): {evening * 1000:.0f} ms; background draft finished "
+          f"{drafted * 1000:.0f} ms later")
+    print(f"🌅 run_morning from the draft:      {from_draft * 1000:8.1f} ms")
+    print(f"🌅 run_morning after goals changed: {replanned * 1000:8.1f} ms (replanned)")
+    for e in errors:
+        print(f"❌ {e}")
+    if not errors:
+        print(f"✅ {replanned / from_draft:.0f}x faster morning from the draft")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
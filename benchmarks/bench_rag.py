@@ -0,0 +1,82 @@
+# benchmarks/bench_rag.py
+"""
+Retrieval over journal history with tools.rag.
+
+Fills a temp database with synthetic reflections, indexes them with the
+hashing embedder, then times incremental appends (one save_journal_entry's
+worth) and top-k queries over the memory-mapped matrix at each size.
+
+    python -m benchmarks.bench_rag --sizes 1000,10000,100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import datetime
+import statistics
+
+from tools.storage import get_connection
+from tools.rag import HashingEmbedder, index_journal, query_docs
+
+WORDS = ("gym deep work pitch deck investors linkedin post contacts coffee call ml course "
+         "transformers sleep tired focus email inbox family walk journal gratitude bridgit "
+         "funding partnership meeting writing blocked energy morning evening").split()
+
+
+def _fill_journal(conn, start: int, stop: int, rng: random.Random):
+    today = datetime.date.today()
+    with conn:
+        conn.executemany(
+            "INSERT INTO journal (date, summary, insights, actions, created_at) VALUES (?,?,?,?,?)",
+            (
+                ((today - datetime.timedelta(days=i)).isoformat(),
+                 " ".join(rng.choices(WORDS, k=20)), str(rng.choices(WORDS, k=6)),
+                 str(rng.choices(WORDS, k=6)), datetime.datetime.now().isoformat())
+                for i in range(start, stop)
+            ),
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated journal sizes")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    rng = random.Random(0)
+    embedder = HashingEmbedder()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        conn = get_connection(db_path)
+        print(f"{'rows':>8} {'index rows/s':>13} {'append 1 (ms)':>14} {'query p50 (ms)':>15} {'query max (ms)':>15}")
+        filled = 0
+        for size in sizes:
+            _fill_journal(conn, filled, size, rng)
+            t0 = time.perf_counter()
+            added = index_journal(db_path, embedder)
+            index_rate = added / (time.perf_counter() - t0)
+            filled = size
+
+            _fill_journal(conn, filled, filled + 1, rng)
+            t0 = time.perf_counter()
+            index_journal(db_path, embedder)
+            append_ms = (time.perf_counter() - t0) * 1000
+            filled += 1
+
+            samples = []
+            for _ in range(args.queries):
+                query = " ".join(rng.choices(WORDS, k=4))
+                t0 = time.perf_counter()
+                hits = query_docs(query, args.k, db_path, embedder)
+                samples.append((time.perf_counter() - t0) * 1000)
+                assert len(hits) == args.k
+            print(f"{size:>8,} {index_rate:>13,.0f} {append_ms:>14.2f} "
+                  f"{statistics.median(samples):>15.2f} {max(samples):>15.2f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# benchmarks/bench_reschedule.py
+"""
+Mid-day task updates: agents.rescheduler.update_task vs. replanning the day.
+
+Schedules --tasks tasks for today on top of --history-days of past events,
+then times status/duration updates (each re-placing only the affected
+events and saving the diff) against rescheduling every task with
+schedule_tasks and against a full plan_tasks + schedule_tasks with the fake
+LLM.
+
+    python -m benchmarks.bench_reschedule --tasks 8,20 --history-days 365
+"""
+import io
+import os
+import sys
+import copy
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import contextlib
+import statistics
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import app
+import agents.planner
+from agents.planner import plan_tasks
+from agents.scheduler import schedule_tasks
+from agents.rescheduler import update_task
+from tools.storage import get_connection, save_calendar_events, save_tasks, iter_calendar_events
+from benchmarks.bench_e2e import _tasks
+from benchmarks.fakes import FakeChatModel
+
+
+def _history(db_path: str, config: dict, days: int, per_day: int = 10):
+    today = datetime.date.today()
+    for d in range(1, days + 1):
+        day = today - datetime.timedelta(days=d)
+        tasks = _tasks(per_day, seed=d)
+        save_calendar_events(schedule_tasks(tasks, config, date=day), db_path)
+
+
+def _median_ms(samples: list) -> float:
+    return statistics.median(samples) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", default="8,20", help="comma-separated task counts for today")
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=1500)
+    args = parser.parse_args(argv)
+
+    agents.planner.llm = FakeChatModel(latency_ms=args.llm_latency_ms)
+    rng = random.Random(0)
+    print(f"{'tasks':>6} {'update_task ms':>15} {'p95 ms':>8} {'changes':>8} "
+          f"{'schedule_tasks ms':>18} {'plan+schedule ms':>17}")
+    for n in (int(s) for s in args.tasks.split(",")):
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            config = copy.deepcopy(app.load_config())
+            config["storage"]["database"] = db_path = os.path.join(tmp, "bench.sqlite")
+            config["cache"]["enabled"] = False
+            config["agents"]["planner"]["past_reflections"] = 0
+            config["agents"]["scheduler"]["fill_gaps"] = True
+            _history(db_path, config, args.history_days)
+
+            tasks = _tasks(n, seed=10_000 + n)
+            if n > 10:  # short tasks, so a busy day still fits
+                tasks = [t.model_copy(update={"duration_est_min": 15}) for t in tasks]
+            save_tasks(tasks, db_path)
+            save_calendar_events(schedule_tasks(tasks, config), db_path)
+            scheduled = [e for e in iter_calendar_events(db_path, datetime.date.today(), datetime.date.today())
+                         if e.block_type == "work"]
+            now = datetime.datetime.combine(datetime.date.today(), datetime.time(8, 0))
+
+            samples, changes = [], 0
+            for i in range(args.updates):
+                event = rng.choice(scheduled)
+                kind = rng.choice(("duration", "done", "doing", "todo"))
+                t0 = time.perf_counter()
+                if kind == "duration":
+                    diff = update_task(event.task_id, config, duration_min=rng.choice((15, 30, 45, 60)), now=now)
+                else:
+                    diff = update_task(event.task_id, config, status=kind, now=now)
+                samples.append(time.perf_counter() - t0)
+                changes += len(diff)
+                if kind == "done":  # keep the day populated: put it back next time
+                    update_task(event.task_id, config, status="todo", now=now)
+                scheduled = [e for e in iter_calendar_events(db_path, datetime.date.today(), datetime.date.today())
+                             if e.block_type == "work"] or scheduled
+
+            full = []
+            for _ in range(5):
+                t0 = time.perf_counter()
+                save_calendar_events(schedule_tasks(tasks, config), db_path)
+                full.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            planned = plan_tasks([g["description"] for g in config["weekly_goals"]], db_path, config)
+            save_calendar_events(schedule_tasks(planned, config), db_path)
+            replan = time.perf_counter() - t0
+
+            logged = get_connection(db_path).execute("SELECT COUNT(*) FROM schedule_changes").fetchone()[0]
+        samples.sort()
+        print(f"{n:>6} {_median_ms(samples):>15.2f} {samples[int(len(samples) * 0.95)] * 1000:>8.2f} "
+              f"{changes / args.updates:>8.1f} {_median_ms(full):>18.2f} {replan * 1000:>17.0f}")
+        if not logged:
+            print("❌ no schedule changes were persisted")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
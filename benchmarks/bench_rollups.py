@@ -0,0 +1,162 @@
+# benchmarks/bench_rollups.py
+"""
+Weekly review from the rollup tables vs. rescanning history.
+
+Grows a temp database to each history size (days of journal entries and
+tasks), then times app.weekly_stats, which reads only the day/week/month
+rollups, against the same numbers computed from the journal and tasks
+tables, and checks both agree. Also times the writes the rollup triggers
+slow down (save_tasks, a journal insert) with and without the triggers.
+
+    python -m benchmarks.bench_rollups --days 365,3650,36500
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import datetime
+import statistics
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app import weekly_stats
+from data.schemas import Task
+from tools.storage import get_connection, save_tasks
+
+TASKS_PER_DAY = 5
+PILLARS = ("Connection", "Curiosity", "Presence", "Contribution")
+
+
+def _fill_history(conn, start: int, stop: int, rng: random.Random):
+    """Days [start, stop) before today: one journal entry and TASKS_PER_DAY tasks each."""
+    today = datetime.date.today()
+    days = [(today - datetime.timedelta(days=i)).isoformat() for i in range(start, stop)]
+    with conn:
+        conn.executemany(
+            "INSERT INTO journal (date, summary, mood, created_at) VALUES (?,?,?,?)",
+            ((d, "summary", str(rng.randint(3, 10)), f"{d}T21:00:00") for d in days),
+        )
+        conn.executemany(
+            "INSERT INTO tasks (id, title, priority, pillar, due, status) VALUES (?,?,?,?,?,?)",
+            ((f"t{d}-{k}", "Task", rng.choice(("P1", "P2", "P3")), rng.choice(PILLARS), f"{d}T17:00:00",
+              "done" if rng.random() < 0.6 else "todo") for d in days for k in range(TASKS_PER_DAY)),
+        )
+
+
+def rescan_stats(db_path: str, end: datetime.date) -> dict:
+    """The weekly_stats numbers straight from the journal and tasks tables."""
+    conn = get_connection(db_path)
+    start = end - datetime.timedelta(days=end.weekday())
+    monday = lambda d: (d - datetime.timedelta(days=d.weekday())).isoformat()
+    moods = {}
+    for day, mood in conn.execute("SELECT date, CAST(trim(mood) AS REAL) FROM journal WHERE mood GLOB '*[0-9]*'"):
+        moods.setdefault(monday(datetime.date.fromisoformat(day)), []).append(mood)
+    week = moods.get(start.isoformat(), [])
+    pillars, month = {}, [0, 0]
+    for due, pillar, status, priority in conn.execute("SELECT due, pillar, status, priority FROM tasks"):
+        day = datetime.date.fromisoformat(due[:10])
+        if (day.year, day.month) == (end.year, end.month):
+            month[0] += 1
+            month[1] += status == "done"
+        if monday(day) == start.isoformat():
+            p = pillars.setdefault(pillar, {"tasks": 0, "done": 0, "p1": 0, "p1_done": 0})
+            p["tasks"] += 1
+            p["done"] += status == "done"
+            p["p1"] += priority == "P1"
+            p["p1_done"] += priority == "P1" and status == "done"
+    return {"avg_mood": statistics.fmean(week) if week else None, "pillars": pillars,
+            "month_tasks": month[0], "month_done": month[1]}
+
+
+def _todays_tasks():
+    now = datetime.datetime.now().replace(second=0, microsecond=0)
+    return [Task(task_id=str(uuid.uuid4()), title=f"Today {i}", why="w", steps=["a"], priority="P1",
+                 energy="steady", duration_est_min=30, due=now, pillar=PILLARS[i % 4], status="todo")
+            for i in range(TASKS_PER_DAY)]
+
+
+def _clear_today(conn):
+    today = datetime.date.today().isoformat()
+    with conn:
+        conn.execute("DELETE FROM journal WHERE date = ?", (today,))
+        conn.execute("DELETE FROM tasks WHERE substr(due, 1, 10) = ?", (today,))
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def _write_ms(db_path: str, repeat: int) -> tuple:
+    conn = get_connection(db_path)
+    tasks = _todays_tasks()
+
+    def journal():
+        with conn:
+            conn.execute("INSERT INTO journal (date, mood, created_at) VALUES (?, '7', ?)",
+                         (datetime.date.today().isoformat(), datetime.datetime.now().isoformat()))
+
+    def complete():
+        for t in tasks:
+            t.status = "done" if t.status == "todo" else "todo"
+        save_tasks(tasks, db_path)
+
+    return _median_ms(lambda: save_tasks(_todays_tasks(), db_path), repeat), _median_ms(complete, repeat), \
+        _median_ms(journal, repeat)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", default="365,3650,36500", help="comma-separated history sizes in days")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+    sizes = sorted(int(s) for s in args.days.split(","))
+
+    errors = []
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        conn = get_connection(db_path)
+        today = datetime.date.today()
+        print(f"{'days':>8} {'review ms':>10} {'rescan ms':>10} {'speedup':>8} "
+              f"{'save_tasks':>11} {'complete':>9} {'journal':>8}  (write ms, rollups on / off)")
+        filled = 1  # today stays empty for the write timings
+        for size in sizes:
+            _fill_history(conn, filled, size + 1, rng)
+            filled = size + 1
+            review = _median_ms(lambda: weekly_stats(db_path, today), args.repeat)
+            rescan = _median_ms(lambda: rescan_stats(db_path, today), max(3, args.repeat // 5))
+            end = today - datetime.timedelta(days=10)
+            stats, scanned = weekly_stats(db_path, end), rescan_stats(db_path, end)
+            if stats["pillars"] != scanned["pillars"] or stats["month_tasks"] != scanned["month_tasks"] \
+                    or abs((stats["avg_mood"] or 0) - (scanned["avg_mood"] or 0)) > 1e-9:
+                errors.append(f"{size} days: rollups and rescan disagree for the week of {stats['start']}")
+
+            with_rollups = _write_ms(db_path, args.repeat)
+            _clear_today(conn)  # through the triggers: takes today's rows back out of the rollups
+            triggers = conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_rollup_%'").fetchall()
+            with conn:
+                for name, _ in triggers:
+                    conn.execute(f"DROP TRIGGER {name}")
+            without = _write_ms(db_path, args.repeat)
+            _clear_today(conn)
+            with conn:
+                for _, sql in triggers:
+                    conn.execute(sql)
+            writes = " ".join(f"{f'{a:.2f}/{b:.2f}':>{w}}" for a, b, w in zip(with_rollups, without, (11, 9, 8)))
+            print(f"{size:>8,} {review:>10.2f} {rescan:>10.2f} {rescan / review:>7.0f}x {writes}")
+    for e in errors:
+        print(f"❌ {e}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
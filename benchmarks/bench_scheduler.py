@@ -0,0 +1,110 @@
+# benchmarks/bench_scheduler.py
+"""
+Scheduler placement: 15-minute stepping vs. free-interval search.
+
+Builds synthetic days with thousands of tasks and fixed blocks, checks that
+the interval engine places every task exactly where the original stepping
+loop did, and times both.
+
+    python -m benchmarks.bench_scheduler --tasks 500,2000,5000 --blocks 2000
+"""
+import sys
+import time
+import random
+import argparse
+import datetime
+from datetime import datetime as dt, timedelta
+
+from data.schemas import Task
+from agents.intervals import Timeline
+from agents.scheduler import _place_sequential, _is_time_available, BUFFER
+
+
+def _legacy_place(sorted_tasks, fixed_blocks, morning_blocks, day_start, day_end):
+    """The original schedule_tasks placement loop, kept as the reference."""
+    placements = []
+    current_time = day_start
+    buffer = BUFFER
+    for task in sorted_tasks:
+        duration = timedelta(minutes=task.duration_est_min)
+        scheduled = None
+        if task.energy == "deep" and morning_blocks:
+            for work_start, work_end in morning_blocks:
+                slot_start = max(current_time, work_start)
+                slot_end = slot_start + duration
+                if slot_end <= work_end and _is_time_available(slot_start, slot_end, fixed_blocks):
+                    scheduled = slot_start
+                    current_time = slot_end + buffer
+                    break
+        if scheduled is None:
+            while current_time + duration <= day_end:
+                slot_end = current_time + duration
+                if _is_time_available(current_time, slot_end, fixed_blocks):
+                    scheduled = current_time
+                    current_time = slot_end + buffer
+                    break
+                for block_start, block_end, _ in fixed_blocks:
+                    if block_start <= current_time < block_end:
+                        current_time = block_end + buffer
+                        break
+                else:
+                    current_time += timedelta(minutes=15)
+        placements.append((task, scheduled))
+    return placements
+
+
+def _workload(n_tasks: int, n_blocks: int, days: int, seed: int = 7):
+    rng = random.Random(seed)
+    start = dt.combine(datetime.date.today(), datetime.time(8, 30))
+    end = start + timedelta(days=days)
+    span = int((end - start).total_seconds() // 60)
+    blocks = []
+    for i in range(n_blocks):
+        b = start + timedelta(minutes=rng.randrange(span))
+        blocks.append((b, b + timedelta(minutes=rng.choice((15, 30, 45, 60, 90))), f"block {i}"))
+    morning = [(start + timedelta(minutes=30), start + timedelta(hours=3))]
+    now = dt.now()
+    tasks = [
+        Task(task_id=str(i), title=f"task {i}", why="-", steps=[], priority=rng.choice(("P1", "P2", "P3")),
+             energy=rng.choice(("deep", "steady", "light")), duration_est_min=rng.choice((15, 30, 45, 60, 90)),
+             due=now, pillar="Curiosity", status="todo")
+        for i in range(n_tasks)
+    ]
+    order = {"P1": 1, "P2": 2, "P3": 3}, {"deep": 1, "steady": 2, "light": 3}
+    tasks.sort(key=lambda t: (order[0][t.priority], order[1][t.energy]))
+    return tasks, blocks, morning, start, end
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", default="100,1000,3000")
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=30, help="length of the synthetic horizon")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'tasks':>6} {'blocks':>7} {'stepping_ms':>12} {'interval_ms':>12} {'speedup':>8}  identical")
+    for n in (int(x) for x in args.tasks.split(",")):
+        tasks, blocks, morning, start, end = _workload(n, args.blocks, args.days)
+        legacy = _legacy_place(tasks, blocks, morning, start, end)
+        fast = _place_sequential(tasks, Timeline(blocks), morning, start, end)
+        same = [s for _, s in legacy] == [s for _, s in fast]
+        t_legacy = _best_of(lambda: _legacy_place(tasks, blocks, morning, start, end), args.repeat)
+        t_fast = _best_of(lambda: _place_sequential(tasks, Timeline(blocks), morning, start, end), args.repeat)
+        print(f"{n:>6} {args.blocks:>7} {t_legacy:>12.1f} {t_fast:>12.1f} {t_legacy / t_fast:>7.0f}x  {same}")
+        if not same:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
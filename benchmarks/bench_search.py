@@ -0,0 +1,117 @@
+# benchmarks/bench_search.py
+"""
+Journal search: the FTS5 index (tools.search) vs. LIKE scans.
+
+Fills a temp journal with --entries reflections of Zipf-distributed words
+(years of history at a few entries a day), then times ranked searches,
+"when did I last mention X" and date-filtered searches for common, medium,
+rare, old (only years ago) and never-mentioned words, each against the
+equivalent LIKE scan over every column (newest first, so it stops at the
+first matches for frequent words but reads the whole table for the others).
+
+    python -m benchmarks.bench_search --entries 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import statistics
+
+from tools.search import _search_like, last_mention, search_journal
+from tools.storage import get_connection
+
+WORDS = 5000
+OLD_WORD = "sabbatical"   # only in the oldest 1% of entries: LIKE scans almost everything to find it
+NEW_WORD = "xylophone"    # never mentioned: LIKE scans everything
+
+
+def _vocabulary(rng: random.Random) -> list[str]:
+    letters = "bcdfghjklmnprstvz"
+    vowels = "aeiou"
+    words = set()
+    while len(words) < WORDS:
+        words.add("".join(rng.choice(letters) + rng.choice(vowels) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def fill_journal(db_path: str, entries: int, seed: int = 0) -> list[str]:
+    """Insert `entries` reflections, newest today; returns the vocabulary, most frequent first."""
+    rng = random.Random(seed)
+    vocab = _vocabulary(rng)
+    cum, total = [], 0.0
+    for i in range(len(vocab)):
+        total += 1 / (i + 1)
+        cum.append(total)
+    text = lambda n: " ".join(rng.choices(vocab, cum_weights=cum, k=n))
+    per_day = 3
+    start = datetime.date.today() - datetime.timedelta(days=entries // per_day)
+    conn = get_connection(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO journal (date, summary, insights, actions, mood, gratitude, created_at) "
+            "VALUES (?,?,?,?,?,?,?)",
+            [((start + datetime.timedelta(days=i // per_day)).isoformat(),
+              text(40) + (f" {OLD_WORD}" if i < entries // 100 and i % 50 == 0 else ""), text(20), text(15),
+              str(rng.randint(1, 10)), text(8), (start + datetime.timedelta(days=i // per_day)).isoformat())
+             for i in range(entries)],
+        )
+    return vocab
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        t0 = time.perf_counter()
+        vocab = fill_journal(db_path, args.entries)
+        fill_s = time.perf_counter() - t0
+        conn = get_connection(db_path)
+        year_ago = datetime.date.today() - datetime.timedelta(days=365)
+        print(f"📚 {args.entries:,} entries inserted (index kept by triggers) in {fill_s:.1f}s")
+        print(f"{'query':>24} {'FTS5 ms':>9} {'LIKE ms':>9} {'speedup':>8}")
+
+        errors = []
+        words = (("common", vocab[0]), ("medium", vocab[200]), ("rare", vocab[-1]),
+                 ("old", OLD_WORD), ("never", NEW_WORD))
+        for label, word in words:
+            cases = (
+                (f"top 10 ({label})", lambda: search_journal(word, db_path, limit=10),
+                 lambda: _search_like(conn, word, None, None, 10, False)),
+                (f"last mention ({label})", lambda: last_mention(word, db_path),
+                 lambda: _search_like(conn, word, None, None, 1, True)),
+                (f"last year ({label})", lambda: search_journal(word, db_path, since=year_ago, limit=10),
+                 lambda: _search_like(conn, word, year_ago, None, 10, False)),
+            )
+            for name, fts, like in cases:
+                fts_ms, like_ms = _median_ms(fts, args.repeat), _median_ms(like, max(3, args.repeat // 5))
+                print(f"{name:>24} {fts_ms:>9.2f} {like_ms:>9.2f} {like_ms / fts_ms:>7.1f}x")
+            found, scanned = last_mention(word, db_path), _search_like(conn, word, None, None, 1, True)
+            if bool(found) != bool(scanned):
+                errors.append(f"'{word}': index and scan disagree on whether it was mentioned")
+
+        two = f"{vocab[10]} {vocab[50]}"
+        print(f"{'two words (AND)':>24} {_median_ms(lambda: search_journal(two, db_path), args.repeat):>9.2f} "
+              f"{_median_ms(lambda: _search_like(conn, two, None, None, 10, False), 3):>9.2f}")
+    for e in errors:
+        print(f"❌ {e}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# benchmarks/bench_solver.py
+"""
+Solver mode: solve time and objective vs. task count.
+
+For each task count, times agents.solver.solve_day on a normal day
+(config.yaml) and compares its priority-weighted placed minutes with the
+greedy placement. "timeout" means the budget ran out and schedule_tasks
+would use the greedy result.
+
+    python -m benchmarks.bench_solver --tasks 5,10,15,20,30 --budget-ms 200
+"""
+import sys
+import time
+import random
+import argparse
+import datetime
+from datetime import datetime as dt
+
+import yaml
+
+from data.schemas import Task
+from agents.intervals import Timeline
+from agents.solver import solve_day, placement_value
+from agents.scheduler import (
+    _parse_time,
+    _get_fixed_blocks,
+    _get_preferred_work_blocks,
+    _place_sequential,
+    _sort_tasks,
+)
+
+
+def _tasks(n: int, seed: int):
+    rng = random.Random(seed)
+    now = dt.now()
+    tasks = []
+    for i in range(n):
+        deps = [tasks[rng.randrange(i)].task_id] if i and rng.random() < 0.2 else []
+        tasks.append(Task(
+            task_id=f"t{i}", title=f"task {i}", why="-", steps=[], priority=rng.choice(("P1", "P2", "P3")),
+            energy=rng.choice(("deep", "steady", "light")), duration_est_min=rng.choice((20, 30, 45, 60, 90)),
+            due=now, pillar="Contribution", deps=deps, status="todo",
+        ))
+    return tasks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", default="5,10,15,20,30")
+    parser.add_argument("--budget-ms", type=float, default=200)
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--config", default="config.yaml")
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    today = datetime.date.today()
+    wake = _parse_time(config["user"]["wake_time"], today)
+    day_end = _parse_time(config["schedule"]["evening_reflect"], today)
+    noon = dt.combine(today, datetime.time(12, 0))
+    timeline = Timeline(_get_fixed_blocks(config, today))
+    morning = [(s, e) for s, e in _get_preferred_work_blocks(config, today) if s < noon]
+    p1_cap = config["agents"]["planner"].get("max_priority_one", 3)
+
+    print(f"{'tasks':>6} {'solve_ms_avg':>13} {'solve_ms_max':>13} {'timeouts':>9} {'solver_value':>13} {'greedy_value':>13}")
+    for n in (int(x) for x in args.tasks.split(",")):
+        times, solved, greedy, timeouts = [], 0, 0, 0
+        for seed in range(args.seeds):
+            tasks = _sort_tasks(_tasks(n, seed))
+            t0 = time.perf_counter()
+            result = solve_day(tasks, timeline.free_intervals(wake, day_end), wake, noon, day_end,
+                               max_priority_one=p1_cap, budget_s=args.budget_ms / 1000)
+            times.append((time.perf_counter() - t0) * 1000)
+            fallback = _place_sequential(tasks, timeline, morning, wake, day_end)
+            greedy += placement_value(fallback, noon, p1_cap)
+            if result is None:
+                timeouts += 1
+                result = fallback
+            solved += placement_value(result, noon, p1_cap)
+        print(f"{n:>6} {sum(times) / len(times):>13.1f} {max(times):>13.1f} {timeouts:>9} "
+              f"{solved // args.seeds:>13} {greedy // args.seeds:>13}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
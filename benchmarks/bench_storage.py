@@ -0,0 +1,124 @@
+# benchmarks/bench_storage.py
+"""
+Storage cost vs. history size.
+
+Grows a temp database to each history size and times the hot-path helpers
+(save_tasks, save_calendar_events, get_todays_schedule, _get_yesterdays_actions).
+With the indexes and batched upserts the per-call cost should stay flat.
+
+    python -m benchmarks.bench_storage --sizes 10000,100000,1000000
+    python -m benchmarks.bench_storage --no-index      # for comparison
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import tempfile
+import datetime
+import statistics
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from data.schemas import Task, CalendarEvent
+from tools.storage import get_connection, save_tasks, save_calendar_events, get_todays_schedule
+from agents.planner import _get_yesterdays_actions
+
+EVENTS_PER_DAY = 8
+TASKS_PER_DAY = 5
+
+
+def _fill_history(conn, start: int, stop: int):
+    """Insert history rows [start, stop) spread over past days (one day per EVENTS_PER_DAY rows)."""
+    today = datetime.date.today()
+
+    def day(i):
+        return today - datetime.timedelta(days=2 + i // EVENTS_PER_DAY)
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO calendar_events VALUES (?,?,?,?,?,?,?,?,?)",
+            (
+                (f"e{i}", f"t{i}", f"Event {i}",
+                 f"{day(i)}T09:00:00", f"{day(i)}T10:00:00", 60, "work",
+                 f"{day(i)}T07:00:00", day(i).isoformat())
+                for i in range(start, stop)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO tasks (id, title, why, priority, pillar, due, status) VALUES (?,?,?,?,?,?,?)",
+            (
+                (f"t{i}", f"Task {i}", "why", "P2", "Curiosity", f"{day(i)}T17:00:00", "done")
+                for i in range(start, stop)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO journal (date, summary, insights, actions, created_at) VALUES (?,?,?,?,?)",
+            (
+                (day(i).isoformat(), "summary", "insight", "action", f"{day(i)}T21:00:00")
+                for i in range(start, stop, 2)
+            ),
+        )
+
+
+def _todays_rows():
+    now = datetime.datetime.now().replace(second=0, microsecond=0)
+    tasks = [
+        Task(task_id=str(uuid.uuid4()), title=f"Today {i}", why="w", steps=["a"], priority="P2",
+             energy="steady", duration_est_min=30, due=now, pillar="Presence", status="todo")
+        for i in range(TASKS_PER_DAY)
+    ]
+    events = [
+        CalendarEvent(event_id=str(uuid.uuid4()), task_id=None, title=f"Block {i}",
+                      start_time=now, end_time=now + datetime.timedelta(minutes=30),
+                      duration_min=30, block_type="work", created_at=now)
+        for i in range(EVENTS_PER_DAY)
+    ]
+    return tasks, events
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="comma-separated history sizes (rows per table)")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--no-index", action="store_true", help="drop the query indexes first")
+    args = parser.parse_args(argv)
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        conn = get_connection(db_path)
+        if args.no_index:
+            with conn:
+                conn.execute("DROP INDEX idx_calendar_events_date")
+                conn.execute("DROP INDEX idx_journal_date")
+
+        print(f"{'history':>10} {'save_tasks':>11} {'save_events':>12} {'get_today':>10} {'yesterday':>10}  (ms, median)")
+        filled = 0
+        for size in sizes:
+            _fill_history(conn, filled, size)
+            filled = size
+            with conn:  # only the current round's rows count as "today"
+                conn.execute("DELETE FROM calendar_events WHERE date = ?", (datetime.date.today().isoformat(),))
+            tasks, events = _todays_rows()
+            results = [
+                _median_ms(lambda: save_tasks(tasks, db_path), args.repeat),
+                _median_ms(lambda: save_calendar_events(events, db_path), args.repeat),
+                _median_ms(lambda: get_todays_schedule(db_path), args.repeat),
+                _median_ms(lambda: _get_yesterdays_actions(db_path), args.repeat),
+            ]
+            print(f"{size:>10,} " + " ".join(f"{r:>{w}.3f}" for r, w in zip(results, (11, 12, 10, 10))))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
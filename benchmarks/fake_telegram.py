@@ -0,0 +1,153 @@
+# benchmarks/fake_telegram.py
+import json
+import time
+import asyncio
+import itertools
+from urllib.parse import parse_qs
+
+
+class FakeTelegramServer:
+    """
+    Minimal local stand-in for the Telegram Bot API (getMe, sendMessage, getUpdates).
+
+    Point a bot at it with base_url=server.base_url. Sent messages are kept in
+    `sent`; `push_message` queues an incoming message for getUpdates. With
+    enforce_limits=True, more than one message per chat per second (or a
+    `global_rate` overall) gets a 429 with retry_after, like the real API.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, enforce_limits: bool = True,
+                 global_rate: float = 30.0, fail_every: int = 0):
+        self.host = host
+        self.port = port
+        self.enforce_limits = enforce_limits
+        self.global_rate = global_rate
+        self.fail_every = fail_every  # inject a 429 on every Nth sendMessage
+        self.sent: list[dict] = []
+        self.rejected = 0
+        self._last_by_chat: dict = {}
+        self._recent: list[float] = []
+        self._calls = 0
+        self._updates: list[dict] = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_update = None
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self):
+        self._new_update = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        self._server.close_clients()  # e.g. the keep-alive connection of the process-wide DeliveryQueue
+        await self._server.wait_closed()
+
+    def push_message(self, chat_id, text: str, first_name: str = "User"):
+        """Queue an incoming text message from chat_id for getUpdates."""
+        message_id = next(self._message_ids)
+        self._updates.append({
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id), "type": "private", "first_name": first_name},
+                "from": {"id": int(chat_id), "is_bot": False, "first_name": first_name},
+                "text": text,
+            },
+        })
+        self._new_update.set()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode().strip()
+                    if not line:
+                        break
+                    key, _, value = line.partition(":")
+                    headers[key.lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self._dispatch(path.rsplit("/", 1)[-1], headers, body)
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _params(headers: dict, body: bytes) -> dict:
+        if headers.get("content-type", "").startswith("application/json"):
+            return json.loads(body or b"{}")
+        params = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+        # python-telegram-bot JSON-encodes non-string values
+        for k, v in params.items():
+            try:
+                params[k] = json.loads(v)
+            except ValueError:
+                pass
+        return params
+
+    async def _dispatch(self, method: str, headers: dict, body: bytes):
+        params = self._params(headers, body)
+        if method == "getMe":
+            return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Coach",
+                                                "username": "coach_bot"}}
+        if method == "sendMessage":
+            return self._send_message(params)
+        if method == "getUpdates":
+            return 200, {"ok": True, "result": await self._get_updates(params)}
+        return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+
+    def _send_message(self, params: dict):
+        self._calls += 1
+        now = time.monotonic()
+        chat_id = str(params.get("chat_id"))
+        self._recent = [t for t in self._recent if now - t < 1.0]
+        limited = self.fail_every and self._calls % self.fail_every == 0
+        if self.enforce_limits:
+            limited = limited or now - self._last_by_chat.get(chat_id, -1e9) < 0.95
+            limited = limited or len(self._recent) >= self.global_rate
+        if limited:
+            self.rejected += 1
+            return 429, {"ok": False, "error_code": 429, "description": "Too Many Requests",
+                         "parameters": {"retry_after": 1}}
+        text = params.get("text", "")
+        if len(text) > 4096:
+            return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"}
+        self._last_by_chat[chat_id] = now
+        self._recent.append(now)
+        self.sent.append({"chat_id": chat_id, "text": text, "parse_mode": params.get("parse_mode"),
+                          "at": now})
+        return 200, {"ok": True, "result": {
+            "message_id": next(self._message_ids), "date": int(time.time()),
+            "chat": {"id": int(chat_id), "type": "private"}, "text": text,
+        }}
+
+    async def _get_updates(self, params: dict) -> list:
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        limit = int(params.get("limit") or 100)
+        return self._updates[:limit]
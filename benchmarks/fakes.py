@@ -0,0 +1,98 @@
+# benchmarks/fakes.py
+"""
+Deterministic stand-ins for the OpenAI chat model and Telegram delivery,
+and a timezone on another date than the server, shared by the benchmarks.
+"""
+import json
+import time
+import random
+import hashlib
+import datetime
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+PILLARS = ("Connection", "Curiosity", "Presence", "Contribution")
+# UTC+14 and UTC-12 are 26 hours apart: one of them is always on another date than the server
+OTHER_DAY_ZONES = ("Etc/GMT-14", "Etc/GMT+12")
+
+
+def other_day_zone() -> str:
+    """A user.timezone whose date right now is not the server's."""
+    return next(z for z in OTHER_DAY_ZONES if datetime.datetime.now(ZoneInfo(z)).date() != datetime.date.today())
+
+
+class FakeChatModel:
+    """
+    Drop-in for the agents' ChatOpenAI client (invoke, stream, structured).
+
+    The reply depends only on the prompt: planner prompts get a JSON list of
+    `tasks` tasks, reflector prompts a reflection object. `latency_ms` is
+    slept per call to mimic a remote model.
+    """
+
+    def __init__(self, tasks: int = 5, latency_ms: float = 0.0, model_name: str = "fake-chat",
+                 wrap: str = None):
+        self.tasks = tasks
+        self.latency_ms = latency_ms
+        self.model_name = model_name
+        self.wrap = wrap  # key to wrap a planner list in (structured output)
+        self.calls = 0
+
+    def _reply(self, prompt: str) -> str:
+        rng = random.Random(hashlib.sha256(prompt.encode()).digest())
+        if "You are the Reflector" in prompt:
+            return json.dumps({
+                "summary": f"A day with {rng.randint(1, 9)} highlights.",
+                "insights": [f"insight {i}" for i in range(3)],
+                "actions": [f"follow up on item {rng.randint(1, 99)}" for _ in range(2)],
+                "mood": rng.randint(1, 10),
+                "gratitude": "a quiet morning",
+            })
+        due = datetime.datetime.now().replace(hour=17, minute=0, second=0, microsecond=0).isoformat()
+        tasks = [
+            {
+                "task_id": f"fake-{rng.getrandbits(48):012x}",
+                "title": f"Task {i}: {rng.choice(('draft', 'review', 'call', 'read', 'plan'))} item {rng.randint(1, 99)}",
+                "why": "It moves a weekly goal forward.",
+                "steps": ["start", "finish"],
+                "priority": rng.choice(("P1", "P2", "P3")),
+                "energy": rng.choice(("deep", "steady", "light")),
+                "duration_est_min": rng.choice((15, 30, 45, 60, 90)),
+                "due": due,
+                "pillar": rng.choice(PILLARS),
+                "deps": [],
+                "status": "todo",
+                "artifact_link": None,
+                "source": rng.choice(("goal", "reflection")),
+            }
+            for i in range(self.tasks)
+        ]
+        return json.dumps({self.wrap: tasks} if self.wrap else tasks)
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        text = self._reply(prompt)
+        return SimpleNamespace(content=text, usage_metadata={
+            "input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4,
+        })
+
+    def stream(self, prompt, **kwargs):
+        text = self.invoke(prompt).content
+        for i in range(0, len(text), 16):
+            yield SimpleNamespace(content=text[i:i + 16])
+
+    def structured(self, schema):
+        wrap = "tasks" if schema.__name__ == "TaskPlan" else None
+        return FakeChatModel(self.tasks, self.latency_ms, f"{self.model_name}:{schema.__name__}", wrap)
+
+
+class DeliverySink:
+    """Collects messages in place of tools.telegram.send_message."""
+
+    def __init__(self):
+        self.messages: list[tuple] = []
+
+    def send_message(self, text: str, chat_id: str = None):
+        self.messages.append((chat_id, text))
@@ -0,0 +1,259 @@
+# bot.py
+"""
+Evening reflections over Telegram.
+
+Long-polls getUpdates and buffers each chat's messages into one journal
+entry, which ends with /done (or after IDLE_SECONDS of silence). Entries go
+through reflect_on_day and save_journal_entry on a worker pool, and the
+formatted reflection is sent back. /search and /last look through past
+reflections (tools.search). One process serves every configured user.
+
+    python bot.py                                  # config.yaml, TELEGRAM_CHAT_ID
+    COACH_CONFIGS="users/*.yaml" python bot.py     # one config per user (delivery.telegram_chat_id)
+"""
+import os
+import sys
+import asyncio
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from telegram import Bot
+from telegram.error import NetworkError, RetryAfter
+
+from app import CONFIG_PATH, load_configs, save_journal_entry, user_today
+from agents.reflector import reflect_on_day
+from agents.writer import format_last_mention, format_reflection, format_search_results
+from tools.search import last_mention, search_journal
+from tools.storage import close_connections, close_pool_connections, init_db
+from tools.telegram import CHAT_ID, TELEGRAM_API_URL, TELEGRAM_TOKEN, get_delivery
+from tools.tokens import start_run
+
+POLL_TIMEOUT = 30   # seconds one getUpdates call waits for new messages
+IDLE_SECONDS = 300  # an entry without /done ends after this long without a new message
+SEARCH_RESULTS = 5  # matches listed for /search
+WELCOME = ("📝 Send me your evening reflection, in as many messages as you like. Finish with /done (/cancel to start over).\n"
+           "🔎 /search <words> finds past reflections, /last <words> when you last mentioned something.")
+
+
+def chat_configs(configs: list[dict], default_chat_id: str = CHAT_ID) -> dict:
+    """
+    chat id -> user config, from each config's delivery.telegram_chat_id.
+    A single config without one is served on default_chat_id (TELEGRAM_CHAT_ID).
+    """
+    chats = {}
+    for config in configs:
+        chat_id = config.get("delivery", {}).get("telegram_chat_id")
+        if chat_id is None and len(configs) == 1:
+            chat_id = default_chat_id
+        if chat_id is None:
+            print(f"⚠️ No telegram_chat_id for {config.get('user', {}).get('name', '?')}, skipping")
+            continue
+        chats[str(chat_id)] = config
+    return chats
+
+
+class ReflectionBot:
+    """
+    Long-polling bot that turns chat messages into journal entries.
+
+    Messages are buffered per chat until /done or `idle_seconds` of silence.
+    Finished entries are reflected on and saved by up to `workers` threads at
+    once; each chat is served by one worker at a time, so a user's entries
+    are saved in the order they were written. Replies go through the
+    process-wide DeliveryQueue of the bot token (rate limits, retries,
+    splitting), shared with the daemon's briefs.
+    """
+
+    def __init__(self, configs: list[dict], token: str = TELEGRAM_TOKEN, base_url: str = TELEGRAM_API_URL,
+                 workers: int = 8, idle_seconds: float = IDLE_SECONDS, poll_timeout: int = POLL_TIMEOUT):
+        self.chats = chat_configs(configs)
+        self.bot = Bot(token=token, base_url=base_url)
+        self.token, self.base_url = token, base_url
+        self.delivery = None  # tools.telegram.get_delivery, on start
+        self._sending: set = set()  # replies submitted and not yet delivered
+        self.workers = workers
+        self.idle_seconds = idle_seconds
+        self.poll_timeout = poll_timeout
+        self.stats = {"messages": 0, "entries": 0, "saved": 0, "failed": 0, "ignored": 0, "searches": 0}
+        self._buffers: dict = {}  # chat_id -> message texts of the entry being written
+        self._timers: dict = {}   # chat_id -> idle TimerHandle
+        self._pending: dict = {}  # chat_id -> deque of finished entries not yet saved
+        self._queue: asyncio.Queue = None  # chat ids with pending entries
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reflect")
+        self._tasks: list = []
+        self._poller = None
+        self._offset = None
+        self.loop = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        for config in self.chats.values():
+            init_db(config["storage"]["database"])
+        await self.bot.initialize()
+        # Blocks until the queue's own loop has started (and asked the API who the bot is)
+        self.delivery = await self.loop.run_in_executor(None, get_delivery, self.token, self.base_url)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        """Stop polling, finish buffered and pending entries, then shut down."""
+        self._poller.cancel()
+        await asyncio.gather(self._poller, return_exceptions=True)
+        for chat_id in list(self._buffers):
+            self.flush(chat_id)
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # The shared queue keeps running (atexit stops it); only wait for this bot's replies
+        await asyncio.gather(*map(asyncio.wrap_future, list(self._sending)), return_exceptions=True)
+        await self.bot.shutdown()
+        await self.loop.run_in_executor(None, close_pool_connections, self._pool, self.workers)
+        self._pool.shutdown()
+
+    async def run_forever(self):
+        await self.start()
+        try:
+            await self._poller
+        finally:
+            await self.stop()
+
+    async def _poll(self):
+        failures = 0
+        while True:
+            try:
+                updates = await self.bot.get_updates(offset=self._offset, timeout=self.poll_timeout,
+                                                     allowed_updates=["message"])
+                failures = 0
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except NetworkError as e:
+                failures += 1
+                delay = min(30, 0.5 * 2 ** failures)
+                print(f"⚠️ getUpdates failed ({e}), retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                continue
+            for update in updates:
+                self._offset = update.update_id + 1  # confirms it on the next call
+                if update.message and update.message.text:
+                    self.handle_message(str(update.message.chat_id), update.message.text)
+
+    def handle_message(self, chat_id: str, text: str):
+        """Add one incoming message to its chat's entry (or run its command)."""
+        if chat_id not in self.chats:
+            self.stats["ignored"] += 1
+            return
+        self.stats["messages"] += 1
+        command = text.strip().lower()
+        name, _, argument = text.strip().partition(" ")
+        if command == "/start":
+            self._send(chat_id, WELCOME)
+        elif command == "/done":
+            self.flush(chat_id)
+        elif command == "/cancel":
+            self._buffers.pop(chat_id, None)
+            timer = self._timers.pop(chat_id, None)
+            if timer:
+                timer.cancel()
+            self._send(chat_id, "🗑 Entry discarded.")
+        elif name.lower() in ("/search", "/last"):
+            self.search(chat_id, name.lower(), argument.strip())
+        else:
+            self._buffers.setdefault(chat_id, []).append(text)
+            timer = self._timers.pop(chat_id, None)
+            if timer:
+                timer.cancel()
+            self._timers[chat_id] = self.loop.call_later(self.idle_seconds, self.flush, chat_id)
+
+    def _send(self, chat_id: str, text: str):
+        """Queue a reply on the shared delivery queue (thread-safe, not awaited)."""
+        future = self.delivery.submit(chat_id, text)
+        self._sending.add(future)
+        future.add_done_callback(lambda f: self.loop.call_soon_threadsafe(self._sending.discard, f))
+
+    def search(self, chat_id: str, command: str, query: str):
+        """Answer /search (best matches) or /last (newest mention) from the journal index."""
+        if not query:
+            self._send(chat_id, f"Usage: {command} <words>, e.g. {command} investor call")
+            return
+        self.stats["searches"] += 1
+        db_path = self.chats[chat_id]["storage"]["database"]
+        if command == "/last":
+            answer = lambda: format_last_mention(query, last_mention(query, db_path))
+        else:
+            answer = lambda: format_search_results(query, search_journal(query, db_path, limit=SEARCH_RESULTS))
+
+        def reply(future):
+            if future.exception():
+                print(f"❌ Search for chat {chat_id} failed: {future.exception()}")
+                self._send(chat_id, "⚠️ Sorry, the search failed.")
+            else:
+                self._send(chat_id, future.result())
+
+        self.loop.run_in_executor(self._pool, answer).add_done_callback(reply)
+
+    def flush(self, chat_id: str):
+        """End the chat's current entry and queue it for reflection."""
+        timer = self._timers.pop(chat_id, None)
+        if timer:
+            timer.cancel()
+        journal_text = "\n".join(self._buffers.pop(chat_id, []))
+        if not journal_text.strip():
+            return
+        self.stats["entries"] += 1
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            pending = self._pending[chat_id] = collections.deque()
+            self._queue.put_nowait(chat_id)
+        pending.append(journal_text)
+
+    def _reflect(self, chat_id: str, journal_text: str) -> str:
+        """Blocking part, run in the pool: reflect, save, format."""
+        config = self.chats[chat_id]
+        start_run(config.get("user", {}).get("name", "default"))  # each entry gets the full token budget
+        reflection = reflect_on_day(journal_text, config=config)
+        save_journal_entry(reflection, config["storage"]["database"], config, day=user_today(config))
+        return format_reflection(reflection)
+
+    async def _worker(self):
+        while True:
+            chat_id = await self._queue.get()
+            pending = self._pending[chat_id]
+            try:
+                while pending:
+                    journal_text = pending.popleft()
+                    try:
+                        msg = await self.loop.run_in_executor(self._pool, self._reflect, chat_id, journal_text)
+                        self.stats["saved"] += 1
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        print(f"❌ Reflection for chat {chat_id} failed: {type(e).__name__}: {e}")
+                        msg = "⚠️ Sorry, I could not process that reflection. Please send it again."
+                    self._send(chat_id, msg)
+            finally:
+                del self._pending[chat_id]
+                self._queue.task_done()
+
+
+def main():
+    if not TELEGRAM_TOKEN:
+        print("⚠️ Missing TELEGRAM_TOKEN")
+        return 1
+    configs = load_configs(os.getenv("COACH_CONFIGS", CONFIG_PATH))
+    bot = ReflectionBot(configs, workers=int(os.getenv("COACH_MAX_CONCURRENT_LLM", "8")))
+    if not bot.chats:
+        print("⚠️ No chats configured (set TELEGRAM_CHAT_ID or delivery.telegram_chat_id)")
+        return 1
+    print(f"🤖 Listening for reflections from {len(bot.chats)} chat(s)")
+    try:
+        asyncio.run(bot.run_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
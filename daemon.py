@@ -0,0 +1,267 @@
+# daemon.py
+"""
+Long-running scheduler for every user's `schedule:` jobs.
+
+Keeps one heap of upcoming runs for all users (morning_brief, evening_reflect,
+weekly_review and each reminder_offsets entry), computed in the user's
+user.timezone, and runs due jobs on a bounded thread pool in one warm process.
+Runs missed while the daemon was down are caught up on start if they are
+less than schedule.catch_up_hours late. With TELEGRAM_TOKEN set, the
+reflection bot (bot.py) runs in the same process to receive the replies.
+
+    python daemon.py
+    COACH_CONFIGS="users/*.yaml" COACH_MAX_CONCURRENT_JOBS=16 python daemon.py
+"""
+import os
+import sys
+import time
+import heapq
+import asyncio
+import datetime
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from app import CONFIG_PATH, _deliver, load_configs, run_morning, run_weekly_review, user_timezone
+from tools.storage import close_connections, close_pool_connections, get_job_runs, init_db, record_job_run
+from tools.tokens import start_run
+
+WEEKDAYS = {name: i for i, name in enumerate(("mon", "tue", "wed", "thu", "fri", "sat", "sun"))}
+CATCH_UP_HOURS = 3  # default for schedule.catch_up_hours
+MAX_SLEEP = 30      # seconds; re-check the clock at least this often (suspend, clock changes)
+
+# reminder_offsets keys -> the job they precede
+REMINDS = {"reflection": "evening_reflect", "brief": "morning_brief", "review": "weekly_review"}
+
+EVENING_PROMPT = ("📝 Evening reflection time. How did today go? Reply here, in as many messages "
+                  "as you like, and finish with /done.")
+
+
+def _morning(config, job):
+    start_run(job.user)  # each run gets the full token budget
+    run_morning(config, day=datetime.datetime.now(job.tz).date())  # the user's today, not the server's
+
+
+def _evening(config, job):
+    _deliver(config, EVENING_PROMPT, label="reflection prompt")
+
+
+def _weekly(config, job):
+    start_run(job.user)
+    run_weekly_review(config, end=datetime.datetime.now(job.tz).date())  # Sunday evening is not Monday in UTC
+
+
+def _reminder(config, job):
+    what = job.name.split(":", 1)[1].replace("_", " ")
+    _deliver(config, f"🔔 {what.capitalize()} in {job.offset_min} minutes", label="reminder")
+
+
+JOBS = {
+    "morning_brief": _morning,
+    "evening_reflect": _evening,
+    "weekly_review": _weekly,
+    "reminder": _reminder,
+}
+
+
+class Job:
+    """One user's recurring job: local time of day, optional weekday, minutes early."""
+
+    __slots__ = ("user", "name", "kind", "at", "weekday", "offset_min", "tz", "config")
+
+    def __init__(self, user, name, kind, at, weekday, offset_min, tz, config):
+        self.user = user
+        self.name = name
+        self.kind = kind
+        self.at = at
+        self.weekday = weekday
+        self.offset_min = offset_min
+        self.tz = tz
+        self.config = config
+
+    def _occurrence(self, day: datetime.date) -> datetime.datetime:
+        local = datetime.datetime.combine(day, self.at, tzinfo=self.tz)
+        # Subtract the offset in UTC so it stays exact across DST changes
+        return local.astimezone(datetime.timezone.utc) - datetime.timedelta(minutes=self.offset_min)
+
+    def _days(self, around: datetime.datetime, step: int):
+        day = around.astimezone(self.tz).date()
+        for d in range(-step, 9 * step, step):  # one day of slack for offsets across midnight
+            date = day + datetime.timedelta(days=d)
+            if self.weekday is None or date.weekday() == self.weekday:
+                yield date
+
+    def next_after(self, moment: datetime.datetime) -> datetime.datetime:
+        """First run strictly after `moment` (aware datetimes, returned in UTC)."""
+        return next(t for t in map(self._occurrence, self._days(moment, 1)) if t > moment)
+
+    def last_before(self, moment: datetime.datetime) -> datetime.datetime:
+        """Latest run at or before `moment`."""
+        return next(t for t in map(self._occurrence, self._days(moment, -1)) if t <= moment)
+
+
+def _parse_at(spec: str) -> tuple:
+    """'07:30' -> (time, None); 'Sunday 20:00' -> (time, 6)."""
+    parts = str(spec).split()
+    weekday = WEEKDAYS[parts[0][:3].lower()] if len(parts) == 2 else None
+    return datetime.time.fromisoformat(parts[-1]), weekday
+
+
+def user_jobs(config: dict) -> list[Job]:
+    """The jobs of one user config's `schedule:` section."""
+    schedule = config.get("schedule") or {}
+    user = config.get("user", {}).get("name", "default")
+    tz = user_timezone(config)
+    jobs = []
+    for kind in ("morning_brief", "evening_reflect", "weekly_review"):
+        if schedule.get(kind):
+            at, weekday = _parse_at(schedule[kind])
+            jobs.append(Job(user, kind, kind, at, weekday, 0, tz, config))
+    for what, minutes in (schedule.get("reminder_offsets") or {}).items():
+        target = next((j for j in jobs if j.kind == REMINDS.get(what, what)), None)
+        if target is None:
+            print(f"⚠️ reminder_offsets.{what}: no matching job for {user}, skipping")
+            continue
+        jobs.append(Job(user, f"reminder:{what}", "reminder", target.at, target.weekday, int(minutes), tz, config))
+    return jobs
+
+
+class JobScheduler:
+    """
+    Heap-based scheduler for many users' jobs.
+
+    Each job has one entry in the heap, keyed by its next run time; popping
+    a due entry pushes the following run, so the heap stays at one entry per
+    job and each tick costs O(log n). Due jobs run on `max_workers` threads;
+    a job still running when its next run comes up is skipped for that run.
+    """
+
+    def __init__(self, configs: list[dict], max_workers: int = 8, jobs: dict = None,
+                 catch_up: bool = True):
+        self.handlers = jobs or JOBS
+        self.max_workers = max_workers
+        self.catch_up = catch_up
+        self.stats = {"fired": 0, "ok": 0, "failed": 0, "caught_up": 0, "missed": 0, "skipped": 0}
+        self.jobs = [job for config in configs for job in user_jobs(config)]
+        self._heap: list = []
+        self._seq = itertools.count()  # tie-breaker: jobs are not comparable
+        self._running: set = set()
+        self._tasks: set = set()
+        self._pool = None
+        self._sem = None
+        self._wake = None
+
+    @staticmethod
+    def _catch_up_window(job: Job) -> datetime.timedelta:
+        if job.kind == "reminder":
+            return datetime.timedelta(0)  # a late reminder is useless
+        hours = (job.config.get("schedule") or {}).get("catch_up_hours", CATCH_UP_HOURS)
+        return datetime.timedelta(hours=hours)
+
+    def _push(self, job: Job, at: datetime.datetime):
+        heapq.heappush(self._heap, (at.timestamp(), next(self._seq), job, at))
+
+    def _load(self, now: datetime.datetime):
+        """Fill the heap, firing runs missed while the daemon was down."""
+        done: dict = {}
+        for db_path in {job.config["storage"]["database"] for job in self.jobs}:
+            init_db(db_path)
+            done[db_path] = get_job_runs(db_path)
+        for job in self.jobs:
+            if self.catch_up:
+                last = job.last_before(now)
+                previous = done[job.config["storage"]["database"]].get((job.user, job.name))
+                # Only jobs that ran before: a new user's first run is the next one
+                if previous is not None and previous < last <= now and now - last <= self._catch_up_window(job):
+                    self.stats["caught_up"] += 1
+                    self._fire(job, last)
+            self._push(job, job.next_after(now))
+
+    def _fire(self, job: Job, scheduled_for: datetime.datetime):
+        key = (job.user, job.name)
+        if key in self._running:
+            self.stats["skipped"] += 1
+            return
+        self._running.add(key)
+        self.stats["fired"] += 1
+        task = asyncio.create_task(self._run(job, scheduled_for))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: Job, scheduled_for: datetime.datetime):
+        try:
+            async with self._sem:
+                await asyncio.get_running_loop().run_in_executor(self._pool, self._execute, job, scheduled_for)
+            self.stats["ok"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"❌ {job.user}: {job.name} failed: {type(e).__name__}: {e}")
+        finally:
+            self._running.discard((job.user, job.name))
+
+    def _execute(self, job: Job, scheduled_for: datetime.datetime):
+        self.handlers[job.kind](job.config, job)
+        record_job_run(job.user, job.name, scheduled_for, job.config["storage"]["database"])
+
+    def wake(self):
+        """Re-check the heap now (e.g. after the clock jumped)."""
+        self._wake.set()
+
+    async def run_forever(self, stop: asyncio.Event = None):
+        """Fire jobs as they come due until `stop` is set, then wait for running jobs."""
+        self._sem = asyncio.Semaphore(self.max_workers)
+        self._wake = asyncio.Event()
+        stop = stop or asyncio.Event()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job") as self._pool:
+            self._load(datetime.datetime.now(datetime.timezone.utc))
+            while not stop.is_set():
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, job, at = heapq.heappop(self._heap)
+                    moment = datetime.datetime.fromtimestamp(now, datetime.timezone.utc)
+                    if moment - at <= max(self._catch_up_window(job), datetime.timedelta(minutes=1)):
+                        self._fire(job, at)
+                    else:
+                        self.stats["missed"] += 1  # e.g. the machine was suspended
+                        print(f"⚠️ {job.user}: {job.name} for {at.isoformat()} missed, skipping")
+                    self._push(job, job.next_after(max(at, moment)))
+                timeout = min(self._heap[0][0] - time.time(), MAX_SLEEP) if self._heap else MAX_SLEEP
+                self._wake.clear()
+                waiters = [asyncio.ensure_future(self._wake.wait()), asyncio.ensure_future(stop.wait())]
+                await asyncio.wait(waiters, timeout=max(timeout, 0), return_when=asyncio.FIRST_COMPLETED)
+                for w in waiters:
+                    w.cancel()
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            await asyncio.get_running_loop().run_in_executor(None, close_pool_connections, self._pool,
+                                                             self.max_workers)
+
+    def upcoming(self, n: int = 10) -> list[tuple]:
+        """The next n runs as (utc datetime, user, job name)."""
+        return [(at, job.user, job.name) for _, _, job, at in heapq.nsmallest(n, self._heap)]
+
+
+async def _serve(configs: list[dict], workers: int, with_bot: bool):
+    scheduler = JobScheduler(configs, max_workers=workers)
+    services = [scheduler.run_forever()]
+    if with_bot:
+        from bot import ReflectionBot
+        services.append(ReflectionBot(configs, workers=workers).run_forever())
+    print(f"⏰ Scheduling {len(scheduler.jobs)} job(s) for {len(configs)} user(s)")
+    await asyncio.gather(*services)
+
+
+def main():
+    configs = load_configs(os.getenv("COACH_CONFIGS", CONFIG_PATH))
+    workers = int(os.getenv("COACH_MAX_CONCURRENT_JOBS", "8"))
+    with_bot = bool(os.getenv("TELEGRAM_TOKEN")) and os.getenv("COACH_BOT", "1") != "0"
+    try:
+        asyncio.run(_serve(configs, workers, with_bot))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,40 +1,41 @@
-# migrate.py
+# data/migrate.py
+"""
+Bring a database up to the current schema version ahead of time.
+
+Opening the database from the app does the same (tools.storage runs the
+pending migrations on first use); running this first keeps a long table
+rebuild out of the morning run. Safe to run repeatedly and while the app or
+daemon is writing.
+
+    python -m data.migrate
+    COACH_MIGRATION_BATCH=50000 python -m data.migrate --db data/store.sqlite
+"""
+import sys
 import sqlite3
+import argparse
 
-db_path = "data/store.sqlite"
-
-conn = sqlite3.connect(db_path)
-cur = conn.cursor()
-
-# 1. Rename old table
-cur.execute("ALTER TABLE journal RENAME TO journal_old;")
-
-# 2. Create new schema with id as PK and mood/gratitude columns
-cur.execute(
-    """CREATE TABLE journal
-       (
-           id         INTEGER PRIMARY KEY AUTOINCREMENT,
-           date       TEXT,
-           summary    TEXT,
-           insights   TEXT,
-           actions    TEXT,
-           mood       TEXT,
-           gratitude  TEXT,
-           created_at TEXT
-       )"""
-)
-
-# 3. Copy over old data (fill mood & gratitude with NULL)
-cur.execute(
-    """INSERT INTO journal (date, summary, insights, actions, created_at)
-       SELECT date, summary, insights, actions, created_at
-       FROM journal_old"""
-)
-
-# 4. Drop old table
-cur.execute("DROP TABLE journal_old;")
-
-conn.commit()
-conn.close()
-
-print("✅ Migration complete. Schema updated with id PK, mood, and gratitude.")
+from tools import storage
+from tools.migrations import migrate, schema_version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=storage.DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    for pragma in storage._PRAGMAS:
+        conn.execute(pragma)
+    before = schema_version(conn)
+    applied = migrate(conn, storage.MIGRATIONS)
+    after = schema_version(conn)
+    conn.close()
+    if applied:
+        print(f"✅ Migrated {args.db} from schema v{before} to v{after}")
+    else:
+        print(f"✅ {args.db} is up to date (schema v{after})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
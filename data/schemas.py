@@ -18,6 +18,18 @@ class Task(BaseModel):
     artifact_link: Optional[str] = None
     source: str = Field(default="goal", pattern="^(goal|reflection)$")
 
+class TaskPlan(BaseModel):
+    """Planner response in structured-output mode."""
+    tasks: List[Task]
+
+class Reflection(BaseModel):
+    """Reflector response in structured-output mode."""
+    summary: str
+    insights: List[str]
+    actions: List[str]
+    mood: Optional[int] = None
+    gratitude: Optional[str] = None
+
 class CalendarEvent(BaseModel):
     event_id: str
     task_id: Optional[str] = None  # None for breaks/fixed blocks
@@ -27,3 +39,24 @@ class CalendarEvent(BaseModel):
     duration_min: int
     block_type: str = Field(..., pattern="^(work|break|fixed|travel)$")
     created_at: datetime
+
+
+def trusted(model: type[BaseModel]):
+    """
+    Constructor for `model` that skips validation, for values that are known
+    to be valid: rows we stored ourselves, never model output.
+    Every field must be passed. Same result as model_construct, which in
+    pydantic 2 is pure Python and slower than validating.
+    """
+    new, setattr_ = model.__new__, object.__setattr__
+    fields = frozenset(model.model_fields)
+
+    def build(**values):
+        obj = new(model)
+        setattr_(obj, "__dict__", values)
+        setattr_(obj, "__pydantic_fields_set__", set(fields))
+        setattr_(obj, "__pydantic_extra__", None)
+        setattr_(obj, "__pydantic_private__", None)
+        return obj
+
+    return build
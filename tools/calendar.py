@@ -1,6 +1,449 @@
 # tools/calendar.py
-def get_calendar_events():
+"""
+Busy time from local .ics calendars (exports, CalDAV dumps) for the scheduler.
+
+Files are parsed line by line (never loaded whole), recurring events are
+expanded over a window around today, and the occurrences are cached in
+SQLite per file. A file is only parsed again when its mtime/size changed
+and its content hash did too, the timezone changed, or the window moved past
+the cached one (which runs WINDOW_SLACK_DAYS further ahead, so an unchanged
+file is expanded again about once a week rather than every morning).
+"""
+import os
+import re
+import hashlib
+import datetime
+from functools import lru_cache
+from typing import Iterable, Iterator
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from tools.storage import get_connection
+
+DEFAULT_HORIZON_DAYS = 14  # recurring events are expanded this far ahead
+WINDOW_SLACK_DAYS = 7      # ...plus this many days, so the daily moving window stays cached
+BATCH_SIZE = 5000          # occurrence rows per INSERT batch
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+_DURATION = re.compile(r"([-+])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?")
+_warned: set = set()
+
+
+# --- Parsing -----------------------------------------------------------------
+
+def _unfold(lines: Iterable[str]) -> Iterator[str]:
+    """Join RFC 5545 folded lines (continuations start with a space or tab)."""
+    current = None
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t"):
+            if current is not None:
+                current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def _split(line: str) -> tuple:
+    """'DTSTART;TZID=Europe/Berlin:20260310T090000' -> ('DTSTART', {'TZID': ...}, '2026...')."""
+    colon = line.find(":")
+    if colon < 0:
+        return line.upper(), {}, ""
+    head, value = line[:colon], line[colon + 1:]
+    if ";" not in head:
+        return head.upper(), {}, value
+    if '"' in head:  # a quoted parameter value may contain ':'
+        quoted = False
+        for i, c in enumerate(line):
+            if c == '"':
+                quoted = not quoted
+            elif c == ":" and not quoted:
+                head, value = line[:i], line[i + 1:]
+                break
+    name, *params = head.split(";")
+    return name.upper(), {k.upper(): v.strip('"') for k, _, v in (p.partition("=") for p in params)}, value
+
+
+def _unescape(text: str) -> str:
+    return text.replace("\\n", " ").replace("\\N", " ").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+
+@lru_cache(maxsize=None)
+def _zone(tzid: str):
+    try:
+        return ZoneInfo(tzid.rsplit("/mozilla.org/", 1)[-1].strip("/") if "mozilla.org" in tzid else tzid)
+    except (ZoneInfoNotFoundError, ValueError):
+        if tzid not in _warned:
+            _warned.add(tzid)
+            print(f"⚠️ Unknown calendar timezone {tzid!r}, treating its times as local")
+        return None
+
+
+def _parse_dt(value: str, params: dict):
+    """DATE -> date; DATE-TIME -> datetime (aware for UTC or a known TZID, else floating)."""
+    v = value.strip()
+    if params.get("VALUE") == "DATE" or len(v) == 8:
+        return datetime.date(int(v[:4]), int(v[4:6]), int(v[6:8]))
+    # Sliced by hand: strptime is the slowest part of parsing big files
+    d = datetime.datetime(int(v[:4]), int(v[4:6]), int(v[6:8]), int(v[9:11]), int(v[11:13]), int(v[13:15]))
+    if v.endswith("Z"):
+        return d.replace(tzinfo=datetime.timezone.utc)
+    tz = _zone(params["TZID"]) if "TZID" in params else None
+    return d.replace(tzinfo=tz) if tz else d
+
+
+def _parse_duration(value: str) -> datetime.timedelta:
+    m = _DURATION.fullmatch(value.strip())
+    if not m:
+        return datetime.timedelta(0)
+    sign, weeks, days, hours, minutes, seconds = m.groups()
+    delta = datetime.timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                               minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -delta if sign == "-" else delta
+
+
+def _parse_rrule(value: str) -> dict:
+    rule = {}
+    for part in value.split(";"):
+        key, _, val = part.partition("=")
+        rule[key.upper()] = val
+    return rule
+
+
+def iter_vevents(lines: Iterable[str]) -> Iterator[dict]:
     """
-    Placeholder: later hook into Google Calendar API.
+    Yield each VEVENT of an iCalendar stream as a dict (uid, summary, start,
+    end, duration, rrule, exdates, recurrence_id, status, transp), one at a
+    time. Components nested in an event (alarms) are skipped.
     """
-    return []
+    event = None
+    nested = 0
+    for line in _unfold(lines):
+        name, params, value = _split(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and event is None:
+                event = {"exdates": []}
+            elif event is not None:
+                nested += 1
+        elif name == "END":
+            if nested:
+                nested -= 1
+            elif event is not None and value.upper() == "VEVENT":
+                if "start" in event:
+                    yield event
+                event = None
+        elif event is None or nested:
+            continue
+        elif name == "UID":
+            event["uid"] = value
+        elif name == "SUMMARY":
+            event["summary"] = _unescape(value)
+        elif name == "DTSTART":
+            event["start"] = _parse_dt(value, params)
+        elif name == "DTEND":
+            event["end"] = _parse_dt(value, params)
+        elif name == "DURATION":
+            event["duration"] = _parse_duration(value)
+        elif name == "RRULE":
+            event["rrule"] = _parse_rrule(value)
+        elif name == "EXDATE":
+            event["exdates"].extend(_parse_dt(v, params) for v in value.split(","))
+        elif name == "RECURRENCE-ID":
+            event["recurrence_id"] = _parse_dt(value, params)
+        elif name == "STATUS":
+            event["status"] = value.upper()
+        elif name == "TRANSP":
+            event["transp"] = value.upper()
+
+
+# --- Recurrence expansion ----------------------------------------------------
+
+def _days_in_month(year: int, month: int) -> int:
+    nxt = datetime.date(year + month // 12, month % 12 + 1, 1)
+    return (nxt - datetime.date(year, month, 1)).days
+
+
+def _month_days(year: int, month: int, rule: dict, first: datetime.date) -> list[int]:
+    """Days of one month selected by BYMONTHDAY / BYDAY (with ordinals like 2TU, -1FR)."""
+    n = _days_in_month(year, month)
+    if "BYMONTHDAY" in rule:
+        days = [int(d) for d in rule["BYMONTHDAY"].split(",")]
+        return sorted(d if d > 0 else n + 1 + d for d in days if 1 <= (d if d > 0 else n + 1 + d) <= n)
+    if "BYDAY" in rule:
+        first_weekday = datetime.date(year, month, 1).weekday()
+        days = set()
+        for spec in rule["BYDAY"].split(","):
+            ordinal, weekday = spec[:-2], WEEKDAYS.get(spec[-2:].upper())
+            if weekday is None:
+                continue
+            matches = list(range(1 + (weekday - first_weekday) % 7, n + 1, 7))
+            if ordinal:
+                k = int(ordinal)
+                if -len(matches) <= k <= len(matches) and k != 0:
+                    days.add(matches[k - 1 if k > 0 else k])
+            else:
+                days.update(matches)
+        return sorted(days)
+    return [first.day] if first.day <= n else []
+
+
+def _recurrence_dates(rule: dict, first: datetime.date, lo: datetime.date,
+                      hi: datetime.date) -> Iterator[datetime.date]:
+    """
+    Dates of an RRULE (DAILY, WEEKLY, MONTHLY, YEARLY with INTERVAL, BYDAY,
+    BYMONTHDAY, BYMONTH) from `first`, in order, up to `hi`. Without COUNT,
+    whole periods before `lo` are skipped arithmetically instead of walked.
+    """
+    freq = rule.get("FREQ", "").upper()
+    interval = max(int(rule.get("INTERVAL") or 1), 1)
+    skip = "COUNT" not in rule
+    months = {int(m) for m in rule["BYMONTH"].split(",")} if "BYMONTH" in rule else None
+    weekdays = {WEEKDAYS[s[-2:].upper()] for s in rule.get("BYDAY", "").split(",") if s[-2:].upper() in WEEKDAYS}
+
+    if freq == "DAILY":
+        k = max(0, (lo - first).days // interval - 1) if skip else 0
+        d = first + datetime.timedelta(days=k * interval)
+        step = datetime.timedelta(days=interval)
+        while d <= hi:
+            if (months is None or d.month in months) and (not weekdays or d.weekday() in weekdays):
+                yield d
+            d += step
+    elif freq == "WEEKLY":
+        days = sorted(weekdays) or [first.weekday()]
+        week = first - datetime.timedelta(days=first.weekday())  # weeks start on Monday
+        k = max(0, (lo - week).days // (7 * interval) - 1) if skip else 0
+        week += datetime.timedelta(weeks=k * interval)
+        while week <= hi:
+            for w in days:
+                d = week + datetime.timedelta(days=w)
+                if first <= d <= hi and (months is None or d.month in months):
+                    yield d
+            week += datetime.timedelta(weeks=interval)
+    elif freq in ("MONTHLY", "YEARLY"):
+        year, month = first.year, first.month
+        if freq == "MONTHLY":
+            periods = interval
+            if skip:
+                behind = (lo.year - year) * 12 + lo.month - month
+                k = max(0, behind // interval - 1)
+                year, month = year + (month - 1 + k * interval) // 12, (month - 1 + k * interval) % 12 + 1
+        else:
+            periods = 12 * interval
+            if skip:
+                k = max(0, (lo.year - year) // interval - 1)
+                year += k * interval
+        while datetime.date(year, month, 1) <= hi:
+            for m in (sorted(months) if freq == "YEARLY" and months else [month]):
+                if freq == "MONTHLY" and months is not None and m not in months:
+                    continue
+                for day in _month_days(year, m, rule, first):
+                    d = datetime.date(year, m, day)
+                    if d > hi:
+                        return
+                    if d >= first:
+                        yield d
+            year, month = year + (month - 1 + periods) // 12, (month - 1 + periods) % 12 + 1
+    else:
+        yield first  # unsupported frequency: the first occurrence only
+
+
+def _wall(value, tz) -> datetime.datetime:
+    """Naive wall-clock time in `tz` (the scheduler's frame) of a parsed value."""
+    if isinstance(value, datetime.datetime):
+        return value.astimezone(tz).replace(tzinfo=None) if value.tzinfo else value
+    return datetime.datetime.combine(value, datetime.time())
+
+
+def occurrences(event: dict, lo: datetime.datetime, hi: datetime.datetime, tz) -> Iterator[tuple]:
+    """(start, end) of each occurrence overlapping [lo, hi), as naive times in `tz`."""
+    start = event["start"]
+    timed = isinstance(start, datetime.datetime)
+    if "duration" in event:
+        length = event["duration"]
+    elif "end" in event and isinstance(event["end"], type(start)):
+        length = event["end"] - start if timed or not isinstance(event["end"], datetime.datetime) else \
+            datetime.timedelta(0)
+        if timed and (start.tzinfo is None) != (event["end"].tzinfo is None):
+            length = _wall(event["end"], tz) - _wall(start, tz)
+    else:
+        length = datetime.timedelta(0) if timed else datetime.timedelta(days=1)
+
+    rule = event.get("rrule")
+    if not rule:
+        s = _wall(start, tz)
+        e = _wall(start + length, tz) if timed else s + length
+        if e > lo and s < hi:
+            yield s, e
+        return
+
+    # Expand in the event's own wall clock, so DST shifts keep the local time
+    zone = start.tzinfo if timed else None
+    first = start.replace(tzinfo=None) if timed else datetime.datetime.combine(start, datetime.time())
+    until = None
+    if "UNTIL" in rule:
+        until = _parse_dt(rule["UNTIL"], {})
+        if isinstance(until, datetime.datetime):
+            until = until.astimezone(zone).replace(tzinfo=None) if until.tzinfo and zone else until.replace(tzinfo=None)
+        else:
+            until = datetime.datetime.combine(until, datetime.time.max)
+    count = int(rule["COUNT"]) if "COUNT" in rule else None
+    excluded = {(x.astimezone(zone).replace(tzinfo=None) if zone and x.tzinfo else
+                 x.replace(tzinfo=None) if isinstance(x, datetime.datetime) else
+                 datetime.datetime.combine(x, first.time()))
+                for x in event["exdates"]}
+
+    margin = datetime.timedelta(days=2) + max(length, datetime.timedelta(0))  # timezone offsets, long events
+    last = (hi + datetime.timedelta(days=2)).date()
+    if until is not None:
+        last = min(last, until.date())
+    n = 0
+    for d in _recurrence_dates(rule, first.date(), (lo - margin).date(), last):
+        wall = datetime.datetime.combine(d, first.time())
+        if until is not None and wall > until:
+            break
+        n += 1
+        if count is not None and n > count:
+            break
+        if wall in excluded:
+            continue
+        if zone is not None:
+            s = _wall(wall.replace(tzinfo=zone), tz)
+            e = _wall(wall.replace(tzinfo=zone) + length, tz)
+        else:
+            s, e = wall, wall + length
+        if s >= hi:
+            break
+        if e > lo:
+            yield s, e
+
+
+# --- SQLite cache ------------------------------------------------------------
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _user_tz(config: dict):
+    name = (config or {}).get("user", {}).get("timezone")
+    return _zone(name) if name else None
+
+
+def sync_calendar(path: str, start: datetime.date, end: datetime.date, tz=None,
+                  include_all_day: bool = False, db_path: str = "data/store.sqlite") -> bool:
+    """
+    Make sure the cached occurrences of `path` cover [start, end]. Returns
+    True if the file was parsed, False if the cache was still valid. A parse
+    expands WINDOW_SLACK_DAYS past `end`, so the following days' windows are
+    already covered.
+    """
+    st = os.stat(path)
+    options = f"{getattr(tz, 'key', tz)}|{int(include_all_day)}"
+    conn = get_connection(db_path)
+    row = conn.execute(
+        "SELECT mtime, size, sha256, window_start, window_end, options FROM calendar_sources WHERE path = ?",
+        (path,),
+    ).fetchone()
+    covered = row is not None and row[3] <= start.isoformat() and row[4] >= end.isoformat() and row[5] == options
+    if covered and (row[0], row[1]) == (st.st_mtime, st.st_size):
+        return False
+    digest = _sha256(path)
+    if covered and row[2] == digest:
+        with conn:  # touched, not changed
+            conn.execute("UPDATE calendar_sources SET mtime = ?, size = ? WHERE path = ?",
+                         (st.st_mtime, st.st_size, path))
+        return False
+
+    end += datetime.timedelta(days=WINDOW_SLACK_DAYS)
+    lo = datetime.datetime.combine(start, datetime.time())
+    hi = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time())
+    sql = "INSERT INTO calendar_occurrences (source, uid, start, end, title, override) VALUES (?,?,?,?,?,?)"
+    overrides, batch = [], []
+    with conn:
+        conn.execute("DELETE FROM calendar_occurrences WHERE source = ?", (path,))
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for event in iter_vevents(f):
+                uid = event.get("uid", "")
+                override = "recurrence_id" in event
+                if override:
+                    recurrence_id = event["recurrence_id"]
+                    overrides.append((path, uid, _wall(recurrence_id, tz).isoformat()))
+                if event.get("status") == "CANCELLED" or event.get("transp") == "TRANSPARENT":
+                    continue
+                if not isinstance(event["start"], datetime.datetime) and not include_all_day:
+                    continue
+                title = event.get("summary", "Busy")
+                for s, e in occurrences(event if not override else {**event, "rrule": None}, lo, hi, tz):
+                    batch.append((path, uid, s.isoformat(), e.isoformat(), title, int(override)))
+                if len(batch) >= BATCH_SIZE:
+                    conn.executemany(sql, batch)
+                    batch.clear()
+        conn.executemany(sql, batch)
+        # A moved or cancelled instance replaces the series' occurrence it was expanded to
+        conn.executemany(
+            "DELETE FROM calendar_occurrences WHERE source = ? AND uid = ? AND start = ? AND override = 0",
+            overrides,
+        )
+        conn.execute(
+            """INSERT INTO calendar_sources (path, mtime, size, sha256, window_start, window_end, options, parsed_at)
+               VALUES (?,?,?,?,?,?,?,?)
+               ON CONFLICT(path) DO UPDATE SET
+                mtime=excluded.mtime, size=excluded.size, sha256=excluded.sha256,
+                window_start=excluded.window_start, window_end=excluded.window_end,
+                options=excluded.options, parsed_at=excluded.parsed_at""",
+            (path, st.st_mtime, st.st_size, digest, start.isoformat(), end.isoformat(), options,
+             datetime.datetime.now().isoformat()),
+        )
+    return True
+
+
+def get_calendar_events(config: dict = None, start: datetime.date = None,
+                        end: datetime.date = None) -> list[dict]:
+    """
+    Busy events from the `calendar.ics_paths` files between start and end
+    (inclusive, default today), as {"start", "end", "title", "source"} with
+    naive datetimes in user.timezone. Calendars are synced first; the
+    expanded window always spans from yesterday to `calendar.horizon_days` ahead.
+    """
+    cal = (config or {}).get("calendar") or {}
+    paths = cal.get("ics_paths") or []
+    if not paths:
+        return []
+    db_path = config.get("storage", {}).get("database", "data/store.sqlite")
+    today = datetime.date.today()
+    start = start or today
+    end = end or start
+    window = (min(start, today - datetime.timedelta(days=1)),
+              max(end, today + datetime.timedelta(days=cal.get("horizon_days", DEFAULT_HORIZON_DAYS))))
+    tz = _user_tz(config)
+    sources = []
+    for path in paths:
+        try:
+            sync_calendar(path, *window, tz=tz, include_all_day=cal.get("include_all_day", False),
+                          db_path=db_path)
+            sources.append(path)
+        except OSError as e:
+            print(f"⚠️ Warning: could not read calendar {path}: {e}")
+    if not sources:
+        return []
+    rows = get_connection(db_path).execute(
+        f"""SELECT start, end, title, source FROM calendar_occurrences
+            WHERE source IN ({",".join("?" * len(sources))}) AND start < ? AND end > ?
+            ORDER BY start""",
+        (*sources, (end + datetime.timedelta(days=1)).isoformat(), start.isoformat()),
+    ).fetchall()
+    return [
+        {"start": datetime.datetime.fromisoformat(s), "end": datetime.datetime.fromisoformat(e),
+         "title": title, "source": source}
+        for s, e, title, source in rows
+    ]
+
+
+def calendar_blocks(config: dict, date: datetime.date) -> list[tuple]:
+    """The day's calendar events as the scheduler's fixed blocks (start, end, label)."""
+    return [(e["start"], e["end"], f"📅 {e['title']}") for e in get_calendar_events(config, date, date)]
@@ -0,0 +1,177 @@
+# tools/context.py
+"""
+Bounded long-horizon context for the planner: summaries of past days, weeks
+and months (reflections and task outcomes), read as a fixed window (the last
+few of each) within a fixed token budget, so the prompt stays the same size
+however long the history grows.
+
+Summaries are extractive (no LLM call): a day from its reflection and tasks,
+a week or month from the rollup tables plus its unfinished tasks. Each is
+cached in context_summaries and rebuilt only after triggers on journal and
+tasks have dropped it because one of its rows changed.
+
+    python -m tools.context --date 2026-10-18
+    python -m tools.context --days 7 --weeks 4 --months 3 --max-tokens 500
+"""
+import re
+import sys
+import argparse
+import datetime
+
+from tools.migrations import transaction
+from tools.storage import DEFAULT_DB_PATH, get_connection, get_rollups
+from tools.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+DEFAULTS = {"days": 3, "weeks": 3, "months": 2, "max_tokens": 300}
+OPEN_TITLES = 3  # unfinished tasks named per summary, most repeated first
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s")
+
+
+def _first_sentence(text: str) -> str:
+    """First sentence of the first non-empty line, without list bullets or the final stop."""
+    line = next((line for line in (text or "").splitlines() if line.strip(" -•*")), "")
+    return _SENTENCE.split(" ".join(line.split()), 1)[0].strip(" -•*").rstrip(".")
+
+
+def clip(text: str, max_tokens: int) -> str:
+    """`text` cut at a word boundary to at most `max_tokens` estimated tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(max_tokens * CHARS_PER_TOKEN - 1, 0)]
+    return (cut.rsplit(" ", 1)[0] if " " in cut else cut) + "…"
+
+
+def _tasks(pillars: dict) -> str:
+    planned, done = sum(p["tasks"] for p in pillars.values()), sum(p["done"] for p in pillars.values())
+    per_pillar = ", ".join(f"{name} {p['done']}/{p['tasks']}" for name, p in sorted(pillars.items(), key=str)
+                           if name)
+    p1 = sum(p["p1"] for p in pillars.values())
+    text = f"done {done}/{planned}" + (f" ({per_pillar})" if per_pillar else "")
+    if p1:
+        text += f", P1 {sum(p['p1_done'] for p in pillars.values())}/{p1}"
+    return text
+
+
+def _open_titles(conn, start: datetime.date, end: datetime.date) -> list[str]:
+    """Unfinished tasks due in [start, end], P1 and most repeated first."""
+    rows = conn.execute(
+        """SELECT title FROM tasks WHERE due >= ? AND due < ? AND status IS NOT 'done' AND title IS NOT NULL
+           GROUP BY title ORDER BY MIN(COALESCE(priority, 'P9')), COUNT(*) DESC, MAX(due) DESC LIMIT ?""",
+        (start.isoformat(), (end + datetime.timedelta(days=1)).isoformat(), OPEN_TITLES),
+    ).fetchall()
+    return [title for (title,) in rows]
+
+
+def _summarize(conn, level: str, start: datetime.date, end: datetime.date, db_path: str) -> str:
+    """One line for the period [start, end]: mood, task outcomes, unfinished tasks (and a day's reflection)."""
+    rollup = get_rollups(level, start, start, db_path).get(start.isoformat())
+    if rollup is None:
+        return ""
+    parts = []
+    if rollup["avg_mood"] is not None:
+        sd = f" ±{rollup['mood_sd']:.1f}" if level != "day" and rollup["mood_sd"] else ""
+        parts.append(f"mood {rollup['avg_mood']:.1f}{sd}")
+    if rollup["pillars"]:
+        parts.append(_tasks(rollup["pillars"]))
+    if level == "day":
+        row = conn.execute(
+            "SELECT summary, actions FROM journal WHERE date = ? ORDER BY created_at DESC LIMIT 1",
+            (start.isoformat(),),
+        ).fetchone()
+        if row and _first_sentence(row[0]):
+            parts.append(f"reflected: {_first_sentence(row[0])}")
+        if row and _first_sentence(row[1]):
+            parts.append(f"next: {_first_sentence(row[1])}")
+    elif rollup["entries"]:
+        parts.append(f"{rollup['entries']} reflection(s)")
+    titles = _open_titles(conn, start, end) if rollup["pillars"] else []
+    if titles:
+        parts.append("unfinished: " + "; ".join(titles))
+    return "; ".join(parts)
+
+
+def summary(level: str, start: datetime.date, db_path=DEFAULT_DB_PATH) -> str:
+    """
+    The cached summary of the day, week (from its Monday) or month (from its
+    first) starting on `start`; built and stored if missing. An empty string
+    means nothing was recorded in that period.
+    """
+    conn = get_connection(db_path)
+    row = conn.execute("SELECT text FROM context_summaries WHERE level = ? AND start = ?",
+                       (level, start.isoformat())).fetchone()
+    if row is not None:
+        return row[0]
+    if level == "day":
+        end = start
+    elif level == "week":
+        end = start + datetime.timedelta(days=6)
+    else:
+        end = (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+    # Built under the write lock: no trigger can drop the summary between reading its rows and storing it
+    with transaction(conn):
+        text = _summarize(conn, level, start, end, db_path)
+        conn.execute("INSERT OR REPLACE INTO context_summaries VALUES (?,?,?,?)",
+                     (level, start.isoformat(), text, datetime.datetime.now().isoformat()))
+    return text
+
+
+def _window(day: datetime.date, days: int, weeks: int, months: int) -> list[tuple]:
+    """(level, start, label) of the periods before `day`, newest first within each level."""
+    periods = [("day", day - datetime.timedelta(days=i), "%a %d %b") for i in range(1, days + 1)]
+    monday = day - datetime.timedelta(days=day.weekday())
+    periods += [("week", monday - datetime.timedelta(weeks=i), "week of %d %b") for i in range(1, weeks + 1)]
+    first = day.replace(day=1)
+    for _ in range(months):
+        first = (first - datetime.timedelta(days=1)).replace(day=1)
+        periods.append(("month", first, "%B %Y"))
+    return periods
+
+
+def build_context(db_path=DEFAULT_DB_PATH, day: datetime.date = None, days: int = DEFAULTS["days"],
+                  weeks: int = DEFAULTS["weeks"], months: int = DEFAULTS["months"],
+                  max_tokens: int = DEFAULTS["max_tokens"]) -> list[str]:
+    """
+    History lines for planning `day` (default today): the `days` previous
+    days, the `weeks` weeks before this one and the `months` months before
+    this one, most detailed first. Lines share `max_tokens` (short ones
+    whole, what they leave split evenly among the rest), so the total never
+    exceeds it whatever the history holds.
+    """
+    day = day or datetime.date.today()
+    if max_tokens <= 0:
+        return []
+    lines = [f"{start.strftime(label)}: {text}" for level, start, label in _window(day, days, weeks, months)
+             if (text := summary(level, start, db_path))]
+    budget = max_tokens
+    for n, i in enumerate(sorted(range(len(lines)), key=lambda i: len(lines[i]))):
+        lines[i] = clip(lines[i], budget // (len(lines) - n))
+        budget -= estimate_tokens(lines[i])
+    return lines
+
+
+def context_options(config: dict = None) -> dict | None:
+    """build_context settings from `agents.planner.history`, or None when it is off."""
+    history = (config or {}).get("agents", {}).get("planner", {}).get("history")
+    if not history or not history.get("max_tokens", DEFAULTS["max_tokens"]):
+        return None
+    return {key: int(history.get(key, default)) for key, default in DEFAULTS.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--date", type=datetime.date.fromisoformat, help="day being planned (default today)")
+    for key, default in DEFAULTS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, default=default)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+
+    lines = build_context(args.db, args.date, args.days, args.weeks, args.months, args.max_tokens)
+    for line in lines:
+        print(f"- {line}")
+    print(f"🔢 ~{sum(estimate_tokens(line) for line in lines)} of {args.max_tokens} tokens")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
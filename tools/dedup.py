@@ -0,0 +1,193 @@
+# tools/dedup.py
+"""
+Near-duplicate detection for planned tasks against recent plan history.
+
+The planner tends to propose the same task day after day ("Reach out to 3
+professional contacts"), each time with a new UUID. Each task becomes a set
+of shingles (character 3-grams of the title, words of `why` and `steps`);
+MinHash signatures split into LSH bands find candidates among the tasks of
+the last `window_days` in constant time per lookup, and the exact Jaccard
+similarity of the shingle sets decides. A planned task that matches:
+
+- an unfinished task of an earlier day is carried over: it takes that
+  task's id and status, so saving it moves the row instead of adding one;
+- a task already planned for the same day (a replan, a draft) is merged
+  into it the same way;
+- an earlier task of the same plan is dropped.
+"""
+import re
+import json
+import zlib
+import datetime
+import threading
+
+import numpy as np
+
+from data.schemas import Task
+from tools.storage import get_connection
+
+NUM_PERM = 96
+BANDS = 32                # of 3 rows: pairs at 0.5 similarity share a band 98.6% of the time, at 0.2 only 23%
+THRESHOLD = 0.5           # Jaccard similarity of shingle sets from which tasks are duplicates
+WINDOW_DAYS = 14
+
+_rng = np.random.default_rng(20240601)  # fixed: same signatures in every process
+_A = _rng.integers(0, 1 << 64, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 1 << 64, NUM_PERM, dtype=np.uint64)
+_WORD = re.compile(r"[a-z0-9']+")
+
+_stats = {"planned": 0, "carried": 0, "merged": 0, "dropped": 0}
+_stats_lock = threading.Lock()
+
+
+def shingles(title: str, why: str = "", steps=()) -> frozenset:
+    """Shingle set of a task: title character 3-grams plus `why` and `steps` words."""
+    text = " ".join(_WORD.findall((title or "").lower()))
+    grams = {"t" + text[i:i + 3] for i in range(max(len(text) - 2, 1))}
+    grams.update("w" + w for w in _WORD.findall((why or "").lower()))
+    grams.update("s" + w for step in steps or () for w in _WORD.findall(str(step).lower()))
+    return frozenset(grams)
+
+
+def signatures(sets: list, chunk: int = 1000) -> np.ndarray:
+    """MinHash signatures, one row of NUM_PERM values per shingle set (`chunk` sets per numpy pass)."""
+    out = np.empty((len(sets), NUM_PERM), dtype=np.uint64)
+    for lo in range(0, len(sets), chunk):
+        part = sets[lo:lo + chunk]
+        sizes = np.fromiter((max(len(s), 1) for s in part), dtype=np.int64, count=len(part))
+        hashes = np.fromiter((zlib.crc32(g.encode()) for s in part for g in (s or ("",))),
+                             dtype=np.uint64, count=int(sizes.sum()))
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        with np.errstate(over="ignore"):  # multiply-shift hashing: (a*h + b mod 2**64) >> 32
+            values = (_A[:, None] * hashes[None, :] + _B[:, None]) >> np.uint64(32)
+        out[lo:lo + chunk] = np.minimum.reduceat(values, starts, axis=1).T
+    return out
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class TaskIndex:
+    """MinHash LSH index: key -> shingle set, looked up by shared signature bands."""
+
+    def __init__(self, threshold: float = THRESHOLD):
+        self.threshold = threshold
+        self.sets = {}
+        self.buckets = [dict() for _ in range(BANDS)]
+
+    @staticmethod
+    def _bands(sigs: np.ndarray) -> list:
+        """One hash per band of each signature, as lists of ints."""
+        rows = sigs.reshape(len(sigs), BANDS, -1)
+        keys = rows[:, :, 0].copy()
+        with np.errstate(over="ignore"):
+            for r in range(1, rows.shape[2]):
+                keys = keys * np.uint64(0x9E3779B97F4A7C15) + rows[:, :, r]
+        return keys.tolist()
+
+    def add(self, keys: list, sets: list, sigs: np.ndarray = None):
+        if not sets:  # e.g. no open tasks in the window: nothing to reshape into bands
+            return
+        sigs = signatures(sets) if sigs is None else sigs
+        for key, s, bands in zip(keys, sets, self._bands(sigs)):
+            self.sets[key] = s
+            for bucket, band in zip(self.buckets, bands):
+                bucket.setdefault(band, []).append(key)
+
+    def candidates(self, s: frozenset, signature: np.ndarray = None) -> set:
+        signature = signatures([s])[0] if signature is None else signature
+        bands = self._bands(signature[None, :])[0]
+        return {key for bucket, band in zip(self.buckets, bands) for key in bucket.get(band, ())}
+
+    def query(self, s: frozenset, signature: np.ndarray = None) -> tuple:
+        """(key, similarity) of the most similar indexed set at or above the threshold, or (None, 0.0)."""
+        best, score = None, 0.0
+        for key in self.candidates(s, signature):
+            similarity = jaccard(s, self.sets[key])
+            if similarity >= self.threshold and (similarity, str(key)) > (score, str(best)):
+                best, score = key, similarity
+        return best, score
+
+
+def _task_shingles(task: Task) -> frozenset:
+    return shingles(task.title, task.why, task.steps)
+
+
+class Deduplicator:
+    """
+    Checks one plan's tasks against the tasks due in the `window_days` before
+    `day` that are still open, and those already planned for `day`. Call it
+    with each planned task; it returns the task to save (possibly under an
+    existing id and status) or None for a duplicate of an earlier one.
+    """
+
+    def __init__(self, db_path: str, day: datetime.date = None, threshold: float = THRESHOLD,
+                 window_days: int = WINDOW_DAYS):
+        self.day = day or datetime.date.today()
+        self.index = TaskIndex(threshold)
+        self.counts = {"planned": 0, "carried": 0, "merged": 0, "dropped": 0}
+        self.existing = {}  # id -> (status, due date)
+        self.claimed = set()
+        rows = get_connection(db_path).execute(
+            """SELECT id, title, why, steps, status, substr(due, 1, 10) FROM tasks
+               WHERE due >= ? AND due < ? AND (status IS NOT 'done' OR due >= ?)""",
+            ((self.day - datetime.timedelta(days=window_days)).isoformat(),
+             (self.day + datetime.timedelta(days=1)).isoformat(), self.day.isoformat()),
+        ).fetchall()
+        for task_id, _, _, _, status, due in rows:
+            self.existing[task_id] = (status, due)
+        self.index.add([r[0] for r in rows], [shingles(r[1], r[2], json.loads(r[3] or "[]")) for r in rows])
+
+    def __call__(self, task: Task) -> Task | None:
+        self.counts["planned"] += 1
+        s = _task_shingles(task)
+        signature = signatures([s])
+        if task.task_id in self.existing:  # the same task again (e.g. a cached plan): no duplicate
+            self.claimed.add(task.task_id)
+            self.index.add([("plan", task.task_id)], [s], signature)
+            return task
+        key, _ = self.index.query(s, signature[0])
+        if key is None:
+            self.index.add([("plan", task.task_id)], [s], signature)
+            return task
+        if isinstance(key, tuple) or key in self.claimed:
+            self.counts["dropped"] += 1
+            return None
+        self.claimed.add(key)
+        status, due = self.existing[key]
+        self.counts["carried" if due < self.day.isoformat() else "merged"] += 1
+        self.index.add([("plan", key)], [s], signature)
+        return task.model_copy(update={"task_id": key, "status": status or task.status})
+
+    def apply(self, tasks: list[Task]) -> list[Task]:
+        """The plan without duplicates, then finish()."""
+        kept = [t for t in (self(task) for task in tasks) if t is not None]
+        self.finish()
+        return kept
+
+    def finish(self) -> dict:
+        """Add this plan's counts to dedup_stats() and print them if anything matched."""
+        with _stats_lock:
+            for key, value in self.counts.items():
+                _stats[key] += value
+        c = self.counts
+        if c["carried"] or c["merged"] or c["dropped"]:
+            print(f"♻️ Dedup: {c['carried'] + c['merged'] + c['dropped']} of {c['planned']} planned task(s) "
+                  f"already existed ({c['carried']} carried over, {c['merged']} merged, {c['dropped']} dropped)")
+        return dict(c)
+
+
+def dedup_stats() -> dict:
+    """Planned tasks matched to existing ones in this process, with the dedup rate."""
+    with _stats_lock:
+        stats = dict(_stats)
+    matched = stats["carried"] + stats["merged"] + stats["dropped"]
+    stats["rate"] = round(matched / stats["planned"], 3) if stats["planned"] else 0.0
+    return stats
+
+
+def reset_dedup_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
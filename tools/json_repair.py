@@ -0,0 +1,134 @@
+# tools/json_repair.py
+import re
+import json
+import threading
+
+_FENCE_RE = re.compile(r"(```|~~~)[ \t]*[\w+-]*[ \t]*\n?(.*?)(?:\1|$)", re.DOTALL)
+_decoder = json.JSONDecoder()
+
+_stats: dict = {}  # agent -> {"clean", "repaired", "failed"}
+_stats_lock = threading.Lock()
+
+
+def _record(agent: str, outcome: str):
+    with _stats_lock:
+        counts = _stats.setdefault(agent, {"clean": 0, "repaired": 0, "failed": 0})
+        counts[outcome] += 1
+
+
+def parse_stats() -> dict:
+    """Per-agent parse outcomes of fresh model output in this process, with success rate."""
+    with _stats_lock:
+        stats = {agent: dict(counts) for agent, counts in _stats.items()}
+    for counts in stats.values():
+        total = counts["clean"] + counts["repaired"] + counts["failed"]
+        counts["success_rate"] = round((counts["clean"] + counts["repaired"]) / total, 3) if total else 0.0
+    return stats
+
+
+def reset_parse_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def strip_fences(text: str) -> str:
+    """Contents of the first ``` or ~~~ fence (any language tag, closed or not), else text."""
+    match = _FENCE_RE.search(text)
+    return match.group(2) if match else text
+
+
+def _closers(stack: list) -> str:
+    return "".join("}" if c == "{" else "]" for c in reversed(stack))
+
+
+def _candidates(text: str):
+    """
+    Repair attempts for JSON text, most faithful first.
+
+    One pass drops trailing commas and anything after the first complete
+    value. If the text was cut off, the first attempt closes the open brackets
+    as they are; the others cut back to each earlier comma or array element
+    (dropping the unfinished element) and close from there. A string cut off
+    mid-value is never closed: `[{"title": "Rea` must not become a task
+    titled "Rea", so only the cut-backs are tried.
+    """
+    out: list[str] = []
+    stack: list[str] = []
+    cuts: list[tuple[int, list]] = []  # (output position of a comma or element, open brackets there)
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "[{":
+            if stack and stack[-1] == "[":
+                cuts.append((len(out), list(stack)))
+            stack.append(ch)
+        elif ch in "]}":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                break
+            continue
+        elif ch == ",":
+            cuts.append((len(out), list(stack)))
+        out.append(ch)
+
+    if not in_string:
+        yield "".join(out).rstrip().rstrip(",") + _closers(stack)
+    for pos, open_brackets in reversed(cuts):
+        yield "".join(out[:pos]).rstrip().rstrip(",") + _closers(open_brackets)
+
+
+def repair_json(text: str):
+    """
+    Parse JSON from model output, tolerating what models commonly get wrong:
+    code fences (``` or ~~~, any tag), prose around the JSON, trailing
+    commas and output truncated mid-list. Returns (value, repaired) and
+    raises ValueError if nothing parseable is found.
+    """
+    for attempt in (text, strip_fences(text.strip())):
+        try:
+            return json.loads(attempt), False
+        except json.JSONDecodeError:
+            pass
+    text = strip_fences(text.strip()).strip()
+    start = min((i for i in (text.find("["), text.find("{")) if i >= 0), default=-1)
+    if start < 0:
+        raise ValueError(f"No JSON found in model output:\n{text[:500]}")
+    try:
+        return _decoder.raw_decode(text[start:])[0], True
+    except json.JSONDecodeError:
+        pass
+    for candidate in _candidates(text[start:]):
+        try:
+            return json.loads(candidate), True
+        except json.JSONDecodeError:
+            continue
+    raise ValueError(f"Could not repair JSON in model output:\n{text[:500]}")
+
+
+def parse_json(text: str, agent: str = None):
+    """repair_json(text) value; with `agent`, the outcome is counted in parse_stats()."""
+    try:
+        value, repaired = repair_json(text)
+    except ValueError:
+        if agent:
+            _record(agent, "failed")
+        raise
+    if agent:
+        _record(agent, "repaired" if repaired else "clean")
+    return value
@@ -0,0 +1,131 @@
+# tools/llm_cache.py
+import os
+import time
+import hashlib
+import threading
+from tools.storage import get_connection
+from tools.tokens import reserve, record_usage
+
+DEFAULT_TTL_HOURS = 12
+DEFAULT_MAX_ENTRIES = 500
+
+_stats = {"hits": 0, "misses": 0, "bypassed": 0, "expired": 0, "evicted": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for this process (plus hit rate over lookups)."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
+
+def cache_options(config: dict = None, bypass: bool = False) -> dict:
+    """Read cache settings from the `cache:` config section (+ COACH_CACHE_BYPASS env)."""
+    cache_cfg = (config or {}).get("cache", {})
+    return {
+        "ttl_s": float(cache_cfg.get("ttl_hours", DEFAULT_TTL_HOURS)) * 3600,
+        "max_entries": int(cache_cfg.get("max_entries", DEFAULT_MAX_ENTRIES)),
+        "bypass": (
+            bypass
+            or not cache_cfg.get("enabled", True)
+            or os.getenv("COACH_CACHE_BYPASS", "") in ("1", "true", "yes")
+        ),
+    }
+
+
+def _cache_key(llm, prompt: str) -> str:
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", "") or ""
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+def cache_lookup(llm, prompt: str, db_path="data/store.sqlite",
+                 ttl_s: float = DEFAULT_TTL_HOURS * 3600, bypass: bool = False, **_) -> str | None:
+    """Cached response text for (model, prompt) if present and fresh, else None."""
+    if bypass:
+        _count("bypassed")
+        return None
+    key = _cache_key(llm, prompt)
+    now = time.time()
+    conn = get_connection(db_path)
+    row = conn.execute(
+        "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+    ).fetchone()
+    if row and now - row[1] <= ttl_s:
+        with conn:
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        _count("hits")
+        return row[0]
+    if row:
+        _count("expired")
+    _count("misses")
+    return None
+
+
+def cache_store(llm, prompt: str, text: str, db_path="data/store.sqlite",
+                ttl_s: float = DEFAULT_TTL_HOURS * 3600,
+                max_entries: int = DEFAULT_MAX_ENTRIES, **_):
+    """Store a response and evict expired / least-recently-used entries."""
+    now = time.time()
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_access) VALUES (?,?,?,?)",
+            (_cache_key(llm, prompt), text, now, now),
+        )
+        cur = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - ttl_s,))
+        evicted = cur.rowcount
+        cur = conn.execute(
+            """DELETE FROM llm_cache WHERE key IN
+               (SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)""",
+            (max_entries,),
+        )
+        evicted += cur.rowcount
+    if evicted:
+        _count("evicted", evicted)
+
+
+def cached_invoke(llm, prompt: str, db_path="data/store.sqlite",
+                  ttl_s: float = DEFAULT_TTL_HOURS * 3600,
+                  max_entries: int = DEFAULT_MAX_ENTRIES,
+                  bypass: bool = False, validate=None, tokens: dict = None) -> str:
+    """
+    Call llm.invoke(prompt) through a SQLite cache keyed by sha256(model, prompt).
+
+    Entries older than ttl_s are ignored; the table is trimmed to max_entries
+    by least-recent access. bypass=True skips the lookup but still stores the
+    fresh response. If `validate` is given it is called on a fresh response and
+    must not raise, so unparseable output is never cached. With `tokens`
+    (tools.tokens.token_options) the completion is capped to the remaining
+    run budget and the call's usage is recorded. Returns the response text.
+    """
+    text = cache_lookup(llm, prompt, db_path, ttl_s, bypass)
+    if text is not None:
+        if tokens is not None:
+            record_usage(llm, prompt, text, cached=True, **tokens)
+        return text
+
+    if tokens is None:
+        result = llm.invoke(prompt)
+    else:
+        result = llm.invoke(prompt, max_tokens=reserve(prompt, **tokens))
+        record_usage(llm, prompt, result, **tokens)
+    text = getattr(result, "content", str(result))
+    if validate is not None:
+        validate(text)
+
+    cache_store(llm, prompt, text, db_path, ttl_s, max_entries)
+    return text
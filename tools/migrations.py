@@ -0,0 +1,200 @@
+# tools/migrations.py
+"""
+Versioned schema migrations for the SQLite store.
+
+Migrations are (version, name, function) in ascending order; the database's
+`PRAGMA user_version` is the last version applied, so migrate() can run on
+every start and only does work once. Each function must be safe to re-run
+(it checks the current shape first), since a crash between the work and the
+version bump repeats it. A cross-process lock row keeps two processes from
+migrating the same file at once.
+
+Big tables are rebuilt with rebuild_table(): rows are copied in short
+batched transactions while triggers mirror concurrent writes, so the
+morning/evening jobs keep writing during the copy.
+"""
+import os
+import time
+import sqlite3
+import contextlib
+from typing import Callable, Optional
+
+LOCK_STALE_SECONDS = 60  # a lock not refreshed for this long belongs to a dead process
+REPORT_EVERY = 1.0       # seconds between progress reports of a table copy
+BATCH_SIZE = int(os.getenv("COACH_MIGRATION_BATCH", "20000"))  # rows per copy transaction
+
+Progress = Callable[[str, int, int], None]
+
+
+def print_progress(what: str, done: int, total: int):
+    """Default progress reporter: one line per report."""
+    share = f" ({done / total:.0%})" if total else ""
+    print(f"🔄 {what}: {done:,}/{total:,} rows{share}")
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+@contextlib.contextmanager
+def transaction(conn: sqlite3.Connection):
+    """BEGIN IMMEDIATE ... COMMIT, so DDL and DML commit (or roll back) together."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _acquire(conn: sqlite3.Connection):
+    """Take the migration lock, waiting while another live process holds it."""
+    while True:
+        with transaction(conn):
+            conn.execute("CREATE TABLE IF NOT EXISTS schema_lock "
+                         "(id INTEGER PRIMARY KEY CHECK (id = 1), pid INTEGER, heartbeat REAL)")
+            row = conn.execute("SELECT pid, heartbeat FROM schema_lock").fetchone()
+            if row is None or row[0] == os.getpid() or time.time() - row[1] > LOCK_STALE_SECONDS:
+                conn.execute("INSERT OR REPLACE INTO schema_lock VALUES (1, ?, ?)", (os.getpid(), time.time()))
+                return
+        time.sleep(0.5)
+
+
+def _release(conn: sqlite3.Connection):
+    with transaction(conn):
+        conn.execute("DELETE FROM schema_lock WHERE pid = ?", (os.getpid(),))
+
+
+def migrate(conn: sqlite3.Connection, migrations: list, progress: Optional[Progress] = print_progress) -> int:
+    """Apply the migrations newer than the database's user_version. Returns how many ran."""
+    if all(version <= schema_version(conn) for version, _, _ in migrations):
+        return 0
+
+    def report(what, done, total):
+        # Progress doubles as the lock heartbeat during long copies
+        conn.execute("UPDATE schema_lock SET heartbeat = ? WHERE pid = ?", (time.time(), os.getpid()))
+        conn.commit()
+        if progress:
+            progress(what, done, total)
+
+    applied = 0
+    _acquire(conn)
+    try:
+        for version, name, fn in migrations:
+            if version <= schema_version(conn):  # e.g. applied by the process we waited for
+                continue
+            started = time.perf_counter()
+            fn(conn, report)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+            applied += 1
+            elapsed = time.perf_counter() - started
+            if progress and elapsed >= REPORT_EVERY:  # quiet for new databases
+                print(f"🛠 Schema v{version}: {name} ({elapsed:.1f}s)")
+    finally:
+        _release(conn)
+    return applied
+
+
+def copy_batches(conn: sqlite3.Connection, sql: str, lo: Optional[int], hi: Optional[int], what: str,
+                 total: int, batch_size: int = BATCH_SIZE, progress: Optional[Progress] = None,
+                 after: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Run `sql`, an INSERT ... SELECT with two parameters for a rowid range
+    (`rowid > ? AND rowid <= ?`), over (lo, hi] one `batch_size` range at a
+    time. Each batch is a short transaction followed by a WAL checkpoint and
+    an idle gap as long as the batch took, so other connections get the
+    write lock in between and a writer's commit never has to checkpoint a
+    large copy. `after(upto)` runs inside each batch's transaction. Progress
+    reports how far through the range it is, scaled to `total` rows.
+    Returns the number of rows inserted.
+    """
+    done, reported, first = 0, time.monotonic(), lo
+    while hi is not None and lo < hi:
+        started = time.perf_counter()
+        upto = min(lo + batch_size, hi)
+        with transaction(conn):
+            done += conn.execute(sql, (lo, upto)).rowcount
+            if after:
+                after(upto)
+        lo = upto
+        if progress and (time.monotonic() - reported >= REPORT_EVERY or lo >= hi):
+            progress(what, round(total * (lo - first) / (hi - first)), total)  # by position: ids may have gaps
+            reported = time.monotonic()
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        time.sleep(time.perf_counter() - started)
+    return done
+
+
+def rebuild_table(conn: sqlite3.Connection, table: str, schema, columns: dict,
+                  batch_size: int = BATCH_SIZE, progress: Optional[Progress] = None) -> int:
+    """
+    Recreate `table` with `schema` (a CREATE TABLE, or a tuple of it and
+    CREATE INDEX statements, with `{table}` in place of the name), copying
+    `columns` (new column -> old column) and keeping each row's rowid.
+    Returns the number of rows copied.
+
+    Rows are copied with copy_batches(), so other connections keep writing;
+    triggers on the old table apply their inserts, updates and deletes to
+    the copy meanwhile. The old table is emptied in batches too after the
+    swap (two renames) and then dropped.
+    """
+    new, old = f"{table}__new", f"{table}__old"
+    targets = ", ".join(["rowid", *columns])
+    sources = ", ".join(["rowid", *columns.values()])
+    values = ", ".join(f"NEW.{c}" for c in ["rowid", *columns.values()])
+    triggers = (f"{new}_insert", f"{new}_update", f"{new}_delete")
+
+    with transaction(conn):
+        # Leftovers of an interrupted run: start over
+        for trigger in triggers:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute(f"DROP TABLE IF EXISTS {new}")
+        conn.execute(f"DROP TABLE IF EXISTS {old}")
+        for sql in ((schema,) if isinstance(schema, str) else schema):
+            conn.execute(sql.format(table=new))
+        conn.execute(f"""CREATE TRIGGER {triggers[0]} AFTER INSERT ON {table} BEGIN
+                         INSERT OR REPLACE INTO {new} ({targets}) VALUES ({values}); END""")
+        conn.execute(f"""CREATE TRIGGER {triggers[1]} AFTER UPDATE ON {table} BEGIN
+                         DELETE FROM {new} WHERE rowid = OLD.rowid;
+                         INSERT OR REPLACE INTO {new} ({targets}) VALUES ({values}); END""")
+        conn.execute(f"""CREATE TRIGGER {triggers[2]} AFTER DELETE ON {table} BEGIN
+                         DELETE FROM {new} WHERE rowid = OLD.rowid; END""")
+        # Later rows reach the copy through the insert trigger
+        lo, hi = conn.execute(f"SELECT MIN(rowid) - 1, MAX(rowid) FROM {table}").fetchone()
+        total = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    # OR IGNORE: a row a trigger already copied is newer than ours
+    done = copy_batches(
+        conn, f"INSERT OR IGNORE INTO {new} ({targets}) SELECT {sources} FROM {table} WHERE rowid > ? AND rowid <= ?",
+        lo, hi, table, total, batch_size, progress,
+    )
+
+    with transaction(conn):
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table,)).fetchall()
+        for trigger in triggers:
+            conn.execute(f"DROP TRIGGER {trigger}")
+        conn.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        conn.execute(f"ALTER TABLE {new} RENAME TO {table}")
+
+    # Dropping millions of rows at once would hold the lock for seconds: empty the old table first
+    while True:
+        started = time.perf_counter()
+        with transaction(conn):
+            deleted = conn.execute(f"DELETE FROM {old} WHERE rowid IN (SELECT rowid FROM {old} LIMIT ?)",
+                                   (batch_size,)).rowcount
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        if not deleted:
+            break
+        time.sleep(time.perf_counter() - started)
+    with transaction(conn):
+        conn.execute(f"DROP TABLE {old}")
+        # Old indexes the new schema does not define itself
+        current = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for name, sql in indexes:
+            if name not in current:
+                conn.execute(sql)
+    return done
@@ -1,6 +1,230 @@
 # tools/rag.py
-def query_docs(query: str):
+import os
+import re
+import hashlib
+import datetime
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from tools.storage import get_connection
+
+DEFAULT_DIM = 256
+EMBED_BATCH = 512
+NOTE_SUFFIXES = (".md", ".txt")
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+_memmaps: dict = {}  # matrix path -> (rows, np.memmap)
+_lock = threading.Lock()
+
+
+class HashingEmbedder:
     """
-    Placeholder for Chroma/FAISS vector store queries.
+    Deterministic local embedder: signed feature hashing of word unigrams and
+    bigrams, L2-normalized. No model or network, so it is fast and stable
+    across runs (good for tests and offline use), at the cost of only
+    matching shared words rather than meaning.
     """
-    return ["This is a stub result."]
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            words = _TOKEN_RE.findall(text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                out[i, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        return _normalize(out)
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings via langchain_openai (imported on first use)."""
+
+    def __init__(self, model: str = "text-embedding-3-small", dim: int = 1536):
+        self.model = model
+        self.dim = dim
+        self.name = f"{model}-{dim}"
+        self._client = None
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        if self._client is None:
+            from langchain_openai import OpenAIEmbeddings
+            self._client = OpenAIEmbeddings(model=self.model, dimensions=self.dim)
+        return _normalize(np.asarray(self._client.embed_documents(texts), dtype=np.float32))
+
+
+Embedder = Callable[[list[str]], np.ndarray]  # plus .name and .dim attributes
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def get_embedder(config: dict = None):
+    """Embedder from the `rag:` config section (hashing by default)."""
+    rag_cfg = (config or {}).get("rag", {})
+    if rag_cfg.get("embedder", "hashing") == "openai":
+        return OpenAIEmbedder(rag_cfg.get("model", "text-embedding-3-small"), rag_cfg.get("dim", 1536))
+    return HashingEmbedder(rag_cfg.get("dim", DEFAULT_DIM))
+
+
+def _matrix_path(db_path: str, embedder) -> str:
+    """Embedding matrix file for db_path: raw float32 rows next to the database."""
+    return os.path.join(f"{db_path}.vectors", f"{embedder.name}.f32")
+
+
+def _append(db_path: str, embedder, docs: list[tuple]) -> int:
+    """
+    Embed docs [(source, ref, date, text)] and append them to the index.
+
+    Row numbers are taken inside a write transaction, so concurrent writers
+    (threads or processes) never interleave; vectors are written at their
+    row's offset before the metadata commits.
+    """
+    if not docs:
+        return 0
+    path = _matrix_path(db_path, embedder)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = get_connection(db_path)
+    for i in range(0, len(docs), EMBED_BATCH):
+        batch = docs[i:i + EMBED_BATCH]
+        vectors = np.ascontiguousarray(embedder([d[3] for d in batch]), dtype=np.float32)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (start,) = conn.execute(
+                "SELECT COALESCE(MAX(row) + 1, 0) FROM rag_docs WHERE embedder = ?", (embedder.name,)
+            ).fetchone()
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.seek(start * embedder.dim * 4)
+                f.write(vectors.tobytes())
+            conn.executemany(
+                "INSERT INTO rag_docs (embedder, row, source, ref, date, text) VALUES (?,?,?,?,?,?)",
+                [(embedder.name, start + j, *doc) for j, doc in enumerate(batch)],
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return len(docs)
+
+
+def _journal_text(summary, insights, actions) -> str:
+    return "\n".join(p for p in (summary, f"Insights: {insights}" if insights else "",
+                                 f"Actions: {actions}" if actions else "") if p)
+
+
+def index_journal(db_path="data/store.sqlite", embedder=None) -> int:
+    """Embed journal rows not yet in the index; returns how many were added."""
+    embedder = embedder or HashingEmbedder()
+    conn = get_connection(db_path)
+    # Journal rows are indexed in id order, so the newest indexed row holds the last id
+    last = conn.execute(
+        "SELECT ref FROM rag_docs WHERE embedder = ? AND source = 'journal' ORDER BY row DESC LIMIT 1",
+        (embedder.name,),
+    ).fetchone()
+    last_id = int(last[0]) if last else 0
+    rows = conn.execute(
+        "SELECT id, date, summary, insights, actions FROM journal WHERE id > ? ORDER BY id", (last_id,)
+    ).fetchall()
+    docs = [("journal", str(id_), date, _journal_text(summary, insights, actions))
+            for id_, date, summary, insights, actions in rows]
+    return _append(db_path, embedder, docs)
+
+
+def index_notes(notes_dir: str, db_path="data/store.sqlite", embedder=None) -> int:
+    """
+    Embed the paragraphs of new or changed .md/.txt files under notes_dir.
+
+    A changed file's old paragraphs are deactivated, not rewritten; returns
+    the number of paragraphs added.
+    """
+    embedder = embedder or HashingEmbedder()
+    if not os.path.isdir(notes_dir):
+        return 0
+    conn = get_connection(db_path)
+    indexed = dict(conn.execute(
+        "SELECT ref, MAX(date) FROM rag_docs WHERE embedder = ? AND source = 'note' AND active = 1 GROUP BY ref",
+        (embedder.name,),
+    ).fetchall())
+    added = 0
+    for root, _, files in os.walk(notes_dir):
+        for name in sorted(files):
+            if not name.endswith(NOTE_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            ref = os.path.relpath(path, notes_dir)
+            mtime = datetime.datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+            if indexed.get(ref) == mtime:
+                continue
+            with open(path, encoding="utf-8", errors="replace") as f:
+                paragraphs = [p.strip() for p in re.split(r"\n\s*\n", f.read()) if p.strip()]
+            with conn:
+                conn.execute(
+                    "UPDATE rag_docs SET active = 0 WHERE embedder = ? AND source = 'note' AND ref = ?",
+                    (embedder.name, ref),
+                )
+            added += _append(db_path, embedder, [("note", ref, mtime, p) for p in paragraphs])
+    return added
+
+
+def _matrix(path: str, rows: int, dim: int) -> Optional[np.memmap]:
+    """Read-only memmap of the first `rows` rows, re-mapped when the index has grown."""
+    with _lock:
+        cached = _memmaps.get(path)
+        if cached is None or cached[0] != rows:
+            if rows == 0 or not os.path.exists(path):
+                return None
+            cached = (rows, np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim)))
+            _memmaps[path] = cached
+        return cached[1]
+
+
+def query_docs(query: str, k: int = 5, db_path="data/store.sqlite", embedder=None,
+               sources: tuple = ("journal", "note")) -> list[dict]:
+    """
+    Top-k journal reflections and note paragraphs most similar to query.
+
+    Journal rows saved since the last call are indexed first. Scores are
+    cosine similarities from one matrix-vector product over the memory-mapped
+    embeddings. Returns dicts with text, source, ref, date and score, best first.
+    """
+    embedder = embedder or HashingEmbedder()
+    if "journal" in sources:
+        index_journal(db_path, embedder)
+    conn = get_connection(db_path)
+    (rows,) = conn.execute(
+        "SELECT COALESCE(MAX(row) + 1, 0) FROM rag_docs WHERE embedder = ?", (embedder.name,)
+    ).fetchone()
+    matrix = _matrix(_matrix_path(db_path, embedder), rows, embedder.dim)
+    if matrix is None or k <= 0:
+        return []
+
+    scores = matrix @ embedder([query])[0]
+    want = k
+    while True:
+        # Over-fetch so inactive rows and other sources can be filtered out
+        n = min(rows, want * 4)
+        top = np.argpartition(-scores, n - 1)[:n] if n < rows else np.arange(rows)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        meta = {
+            row: (source, ref, date, text)
+            for row, source, ref, date, text, active in conn.execute(
+                f"""SELECT row, source, ref, date, text, active FROM rag_docs
+                    WHERE embedder = ? AND row IN ({",".join(str(int(r)) for r in top)})""",
+                (embedder.name,),
+            )
+            if active and source in sources
+        }
+        hits = [
+            {"text": meta[r][3], "source": meta[r][0], "ref": meta[r][1], "date": meta[r][2],
+             "score": round(float(scores[r]), 4)}
+            for r in map(int, top) if r in meta
+        ]
+        if len(hits) >= k or n == rows:
+            return hits[:k]
+        want *= 4
@@ -0,0 +1,173 @@
+# tools/search.py
+"""
+Full-text search over past reflections (journal summary, insights, actions,
+gratitude), using the journal_fts index that tools.storage keeps in sync.
+
+    python -m tools.search "investor meeting"
+    python -m tools.search --last "gym"
+    python -m tools.search "sleep" --since 2026-01-01 --limit 5
+"""
+import re
+import sys
+import argparse
+import datetime
+from typing import Optional
+
+from tools.storage import DEFAULT_DB_PATH, get_connection
+
+_WORD = re.compile(r"\w+")
+_COLUMNS = ("summary", "insights", "actions", "gratitude")
+SNIPPET_WORDS = 12
+RANK_WINDOW = 2000  # newest matches ranked by search_journal (~2 years of daily entries)
+
+
+def fts_query(text: str, phrase: bool = False) -> str:
+    """
+    Free text -> FTS5 query: every word must appear (or, with phrase=True,
+    the words in that order). Words are quoted, so FTS5 operators and
+    punctuation in user input are matched literally instead of parsed.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return ""
+    if phrase:
+        return '"' + " ".join(words) + '"'
+    return " ".join(f'"{w}"' for w in words)
+
+
+def _has_index(conn) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'journal_fts'").fetchone() is not None
+
+
+def _date_filter(since: Optional[datetime.date], until: Optional[datetime.date]) -> tuple:
+    sql, params = "", []
+    if since:
+        sql += " AND j.date >= ?"
+        params.append(since.isoformat())
+    if until:
+        sql += " AND j.date <= ?"
+        params.append(until.isoformat())
+    return sql, params
+
+
+def _rowid_bounds(conn, match: str, since, until, window: int) -> tuple:
+    """
+    Journal id range to search. Dates become id bounds (every entry from
+    `since` on has an id >= the smallest such id, so no match is lost), which
+    the index applies before ranking; with `window`, the range also starts
+    no earlier than the window-th newest match.
+    """
+    lo = hi = None
+    if since:
+        # ORDER BY/LIMIT rather than MIN(id): MIN walks the whole table by id, this the date index
+        row = conn.execute("SELECT id FROM journal WHERE date >= ? ORDER BY id LIMIT 1",
+                           (since.isoformat(),)).fetchone()
+        if row is None:
+            return 1, 0  # nothing that recent
+        lo = row[0]
+    if until:
+        row = conn.execute("SELECT id FROM journal WHERE date <= ? ORDER BY id DESC LIMIT 1",
+                           (until.isoformat(),)).fetchone()
+        if row is None:
+            return 1, 0
+        hi = row[0]
+    if window:
+        row = conn.execute(
+            "SELECT rowid FROM journal_fts WHERE journal_fts MATCH ? AND rowid BETWEEN ? AND ? "
+            "ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+            (match, lo or 0, hi if hi is not None else 2 ** 63 - 1, window - 1),
+        ).fetchone()
+        if row:
+            lo = max(lo or 0, row[0])
+    return lo or 0, hi if hi is not None else 2 ** 63 - 1
+
+
+def search_journal(query: str, db_path=DEFAULT_DB_PATH, since: datetime.date = None,
+                   until: datetime.date = None, limit: int = 10, recent: bool = False,
+                   phrase: bool = False) -> list[dict]:
+    """
+    Journal entries matching `query`, best first (BM25), or newest first with
+    recent=True. Each result is {"id", "date", "created_at", "snippet",
+    "score"}, the snippet marking matched words in **bold**.
+
+    Ranking considers the newest RANK_WINDOW matches, so a word that is in
+    almost every entry costs the same as a rare one.
+    """
+    conn = get_connection(db_path)
+    if not _has_index(conn):
+        return _search_like(conn, query, since, until, limit, phrase)
+    match = fts_query(query, phrase)
+    if not match:
+        return []
+    lo, hi = _rowid_bounds(conn, match, since, until, 0 if recent else RANK_WINDOW)
+    dates, params = _date_filter(since, until)
+    # Newest first walks the index backwards by rowid (journal ids grow with time) and stops at `limit`
+    # (BM25 needs corpus statistics: only computed when ranking)
+    order, score = ("journal_fts.rowid DESC", "0.0") if recent else ("rank", "rank")
+    rows = conn.execute(
+        f"""SELECT j.id, j.date, j.created_at,
+                   snippet(journal_fts, -1, '**', '**', '…', {SNIPPET_WORDS}), {score}
+            FROM journal_fts JOIN journal j ON j.id = journal_fts.rowid
+            WHERE journal_fts MATCH ? AND journal_fts.rowid BETWEEN ? AND ?{dates}
+            ORDER BY {order} LIMIT ?""",
+        (match, lo, hi, *params, limit),
+    ).fetchall()
+    return [{"id": r[0], "date": r[1], "created_at": r[2], "snippet": r[3], "score": -r[4] or 0.0} for r in rows]
+
+
+def _search_like(conn, query: str, since, until, limit: int, phrase: bool) -> list[dict]:
+    """Full scan with LIKE, for databases without the FTS5 index; newest first."""
+    words = [" ".join(_WORD.findall(query))] if phrase else _WORD.findall(query)
+    if not words or not words[0]:
+        return []
+    any_column = "(" + " OR ".join(f"j.{c} LIKE ?" for c in _COLUMNS) + ")"
+    dates, params = _date_filter(since, until)
+    rows = conn.execute(
+        f"""SELECT j.id, j.date, j.created_at, j.summary, j.insights, j.actions, j.gratitude
+            FROM journal j
+            WHERE {" AND ".join([any_column] * len(words))}{dates}
+            ORDER BY j.id DESC LIMIT ?""",
+        (*[f"%{w}%" for w in words for _ in _COLUMNS], *params, limit),
+    ).fetchall()
+    results = []
+    for r in rows:
+        text = next((t for t in r[3:] if t and words[0].lower() in t.lower()), "")
+        at = text.lower().find(words[0].lower())
+        results.append({"id": r[0], "date": r[1], "created_at": r[2],
+                        "snippet": ("…" if at > 60 else "") + text[max(0, at - 60):at + 60], "score": 0.0})
+    return results
+
+
+def last_mention(text: str, db_path=DEFAULT_DB_PATH, before: datetime.date = None) -> dict | None:
+    """
+    The newest entry mentioning `text` (as a phrase, else all of its words),
+    optionally on or before a date, or None.
+    """
+    results = (search_journal(text, db_path, until=before, limit=1, recent=True, phrase=True)
+               or search_journal(text, db_path, until=before, limit=1, recent=True))
+    return results[0] if results else None
+
+
+def main(argv=None):
+    from agents.writer import format_last_mention, format_search_results
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("query")
+    parser.add_argument("--last", action="store_true", help="when was this last mentioned")
+    parser.add_argument("--since", type=datetime.date.fromisoformat)
+    parser.add_argument("--until", type=datetime.date.fromisoformat)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--recent", action="store_true", help="newest first instead of best match first")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+
+    if args.last:
+        print(format_last_mention(args.query, last_mention(args.query, args.db, args.until)))
+    else:
+        results = search_journal(args.query, args.db, args.since, args.until, args.limit, args.recent)
+        print(format_search_results(args.query, results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
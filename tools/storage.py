@@ -1,15 +1,43 @@
 # tools/storage.py
+import os
+import json
 import sqlite3
 import datetime
-from data.schemas import Task, CalendarEvent
-
-def init_db(db_path="data/store.sqlite"):
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.execute("""CREATE TABLE IF NOT EXISTS tasks
-        (id TEXT, title TEXT, why TEXT, priority TEXT,
-         pillar TEXT, due TEXT, status TEXT)""")
-    cur.execute("""CREATE TABLE IF NOT EXISTS calendar_events
+import threading
+from data.schemas import Task, CalendarEvent, trusted
+from tools.migrations import BATCH_SIZE, copy_batches, migrate, rebuild_table, transaction
+
+DEFAULT_DB_PATH = "data/store.sqlite"
+
+# Applied to every new connection: WAL lets the morning/evening jobs read while
+# another writes, busy_timeout waits on the write lock instead of failing.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+
+_JOURNAL_TABLE = """CREATE TABLE IF NOT EXISTS {table}
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         date TEXT,
+         summary TEXT,
+         insights TEXT,
+         actions TEXT,
+         mood TEXT,
+         gratitude TEXT,
+         created_at TEXT)"""
+_JOURNAL_INDEX = "CREATE INDEX IF NOT EXISTS idx_journal_date ON {table}(date, created_at)"
+
+# Schema version 1; later changes are migrations in MIGRATIONS
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS tasks
+        (id TEXT PRIMARY KEY, title TEXT, why TEXT, priority TEXT,
+         pillar TEXT, due TEXT, status TEXT,
+         energy TEXT, duration_est_min INTEGER, steps TEXT,
+         deps TEXT, source TEXT, artifact_link TEXT)""",
+    """CREATE TABLE IF NOT EXISTS calendar_events
         (event_id TEXT PRIMARY KEY, 
          task_id TEXT,
          title TEXT,
@@ -18,80 +46,709 @@ def init_db(db_path="data/store.sqlite"):
          duration_min INTEGER,
          block_type TEXT,
          created_at TEXT,
-         date TEXT)""")
-    conn.commit()
-    conn.close()
-
-def save_tasks(tasks: list[Task], db_path="data/store.sqlite"):
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    for t in tasks:
-        cur.execute("INSERT INTO tasks VALUES (?,?,?,?,?,?,?)",
-                    (t.task_id, t.title, t.why, t.priority,
-                     t.pillar, t.due.isoformat(), t.status))
-    conn.commit()
-    conn.close()
-
-def save_calendar_events(events: list[CalendarEvent], db_path="data/store.sqlite"):
-    """Save scheduled calendar events to the database."""
+         date TEXT)""",
+    _JOURNAL_TABLE.format(table="journal"),
+    """CREATE TABLE IF NOT EXISTS llm_cache
+        (key TEXT PRIMARY KEY,
+         response TEXT,
+         created_at REAL,
+         last_access REAL)""",
+    # One row per LLM call, written by tools.tokens
+    """CREATE TABLE IF NOT EXISTS llm_usage
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         run_id TEXT,
+         user TEXT,
+         role TEXT,
+         model TEXT,
+         prompt_tokens INTEGER,
+         completion_tokens INTEGER,
+         estimated INTEGER,
+         cached INTEGER,
+         created_at REAL)""",
+    "CREATE INDEX IF NOT EXISTS idx_llm_usage_user ON llm_usage(user, created_at)",
+    # Metadata for the rows of tools.rag's memory-mapped embedding matrices
+    """CREATE TABLE IF NOT EXISTS rag_docs
+        (embedder TEXT,
+         row INTEGER,
+         source TEXT,
+         ref TEXT,
+         date TEXT,
+         text TEXT,
+         active INTEGER DEFAULT 1,
+         PRIMARY KEY (embedder, row))""",
+    "CREATE INDEX IF NOT EXISTS idx_rag_docs_source ON rag_docs(embedder, source, row)",
+    # Last completed run of each scheduled job (daemon.py), for missed-run catch-up
+    """CREATE TABLE IF NOT EXISTS job_runs
+        (user TEXT,
+         job TEXT,
+         scheduled_for TEXT,
+         finished_at TEXT,
+         PRIMARY KEY (user, job))""",
+    # Tomorrow's plan, generated after the evening reflection (app.prepare_morning_draft)
+    """CREATE TABLE IF NOT EXISTS plan_drafts
+        (user TEXT,
+         date TEXT,
+         fingerprint TEXT,
+         tasks TEXT,
+         events TEXT,
+         created_at TEXT,
+         PRIMARY KEY (user, date))""",
+    # Event changes made by agents.rescheduler when a task's status or duration changes
+    """CREATE TABLE IF NOT EXISTS schedule_changes
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         task_id TEXT,
+         event_id TEXT,
+         change TEXT,
+         old_start TEXT,
+         old_end TEXT,
+         new_start TEXT,
+         new_end TEXT,
+         reason TEXT,
+         created_at TEXT)""",
+    # .ics files synced by tools.calendar, and their expanded occurrences
+    """CREATE TABLE IF NOT EXISTS calendar_sources
+        (path TEXT PRIMARY KEY,
+         mtime REAL,
+         size INTEGER,
+         sha256 TEXT,
+         window_start TEXT,
+         window_end TEXT,
+         options TEXT,
+         parsed_at TEXT)""",
+    """CREATE TABLE IF NOT EXISTS calendar_occurrences
+        (source TEXT,
+         uid TEXT,
+         start TEXT,
+         end TEXT,
+         title TEXT,
+         override INTEGER)""",
+    "CREATE INDEX IF NOT EXISTS idx_calendar_occurrences ON calendar_occurrences(source, start)",
+    "CREATE INDEX IF NOT EXISTS idx_calendar_events_date ON calendar_events(date, start_time)",
+)
+
+# Columns added to `tasks` after the original 7-column table
+_TASK_COLUMNS_ADDED = (
+    ("energy", "TEXT"),
+    ("duration_est_min", "INTEGER"),
+    ("steps", "TEXT"),
+    ("deps", "TEXT"),
+    ("source", "TEXT"),
+    ("artifact_link", "TEXT"),
+)
+
+_local = threading.local()
+_schema_ready: set = set()
+_schema_lock = threading.Lock()
+
+
+def get_connection(db_path=DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """
+    Return the calling thread's shared connection to db_path.
+
+    Connections are opened once per thread (and re-opened after a fork) with
+    WAL journaling and tuned pragmas; the schema is created the first time a
+    database is opened in this process. Callers must not close the connection.
+    """
+    if getattr(_local, "pid", None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.conns = {}
+    conn = _local.conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=30)
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        _local.conns[db_path] = conn
+        _ensure_schema(conn, db_path)
+    return conn
+
+
+def _ensure_schema(conn: sqlite3.Connection, db_path: str):
+    if db_path in _schema_ready:
+        return
+    with _schema_lock:
+        if db_path in _schema_ready:
+            return
+        migrate(conn, MIGRATIONS)
+        if db_path != ":memory:":
+            _schema_ready.add(db_path)
+
+
+def _upgrade_tasks_table(conn: sqlite3.Connection):
+    """Bring a pre-existing `tasks` table (no key, 7 columns) up to the current shape."""
+    info = conn.execute("PRAGMA table_info(tasks)").fetchall()
+    existing = {row[1] for row in info}
+    for name, col_type in _TASK_COLUMNS_ADDED:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE tasks ADD COLUMN {name} {col_type}")
+    has_pk = any(row[1] == "id" and row[5] for row in info)
+    if not has_pk:
+        # Upserts need a unique key; keep the latest copy of any duplicated id
+        conn.execute("DELETE FROM tasks WHERE rowid NOT IN (SELECT MAX(rowid) FROM tasks GROUP BY id)")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_id ON tasks(id)")
+
+
+def _create_schema(conn: sqlite3.Connection, progress):
+    with transaction(conn):
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+        # An early journal gets its index with the rebuild (v2), not on millions of old rows here
+        if "id" in {row[1] for row in conn.execute("PRAGMA table_info(journal)")}:
+            conn.execute(_JOURNAL_INDEX.format(table="journal"))
+
+
+def _upgrade_journal_table(conn: sqlite3.Connection, progress):
+    """Rebuild an early journal (date as key, no id/mood/gratitude) with the current columns."""
+    existing = [row[1] for row in conn.execute("PRAGMA table_info(journal)")]
+    if "id" in existing and "mood" in existing:
+        return
+    keep = {c: c for c in ("date", "summary", "insights", "actions", "mood", "gratitude", "created_at")
+            if c in existing}
+    rebuild_table(conn, "journal", (_JOURNAL_TABLE, _JOURNAL_INDEX), keep, progress=progress)
+
+
+def _upgrade_tasks(conn: sqlite3.Connection, progress):
+    with transaction(conn):
+        _upgrade_tasks_table(conn)
+
+
+_FTS_COLUMNS = "summary, insights, actions, gratitude"
+
+
+def _journal_fts_triggers(conn: sqlite3.Connection, backfilling: bool):
+    """
+    Keep journal_fts in sync with journal. While backfilling, rows between
+    the backfill's progress and its end are not indexed yet: their updates
+    and deletes are left to the backfill, which reads the current rows.
+    """
+    new = ", ".join(f"new.{c}" for c in _FTS_COLUMNS.split(", "))
+    old = ", ".join(f"old.{c}" for c in _FTS_COLUMNS.split(", "))
+    indexed = ("WHEN NOT EXISTS (SELECT 1 FROM journal_fts_backfill WHERE old.id > done AND old.id <= last)"
+               if backfilling else "")
+    for name in ("insert", "update", "delete"):
+        conn.execute(f"DROP TRIGGER IF EXISTS journal_fts_{name}")
+    conn.execute(f"""CREATE TRIGGER journal_fts_insert AFTER INSERT ON journal BEGIN
+                     INSERT INTO journal_fts (rowid, {_FTS_COLUMNS}) VALUES (new.id, {new}); END""")
+    conn.execute(f"""CREATE TRIGGER journal_fts_delete AFTER DELETE ON journal {indexed} BEGIN
+                     INSERT INTO journal_fts (journal_fts, rowid, {_FTS_COLUMNS})
+                     VALUES ('delete', old.id, {old}); END""")
+    conn.execute(f"""CREATE TRIGGER journal_fts_update AFTER UPDATE ON journal {indexed} BEGIN
+                     INSERT INTO journal_fts (journal_fts, rowid, {_FTS_COLUMNS})
+                     VALUES ('delete', old.id, {old});
+                     INSERT INTO journal_fts (rowid, {_FTS_COLUMNS}) VALUES (new.id, {new}); END""")
+
+
+def _create_journal_fts(conn: sqlite3.Connection, progress):
+    """
+    Full-text index over the journal (tools.search). Existing entries are
+    indexed in batches (resumable), new ones by trigger from the start.
+    """
+    try:
+        with transaction(conn):
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'journal_fts'").fetchone()
+            if not exists:
+                conn.execute(
+                    f"""CREATE VIRTUAL TABLE journal_fts USING fts5
+                        ({_FTS_COLUMNS}, content='journal', content_rowid='id', tokenize='porter unicode61')"""
+                )
+                conn.execute("CREATE TABLE journal_fts_backfill (done INTEGER, last INTEGER)")
+                conn.execute("INSERT INTO journal_fts_backfill SELECT 0, COALESCE(MAX(id), 0) FROM journal")
+                _journal_fts_triggers(conn, backfilling=True)
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        print("⚠️ SQLite was built without FTS5: journal search falls back to LIKE scans")
+        return
+    row = conn.execute("SELECT name FROM sqlite_master WHERE name = 'journal_fts_backfill'").fetchone()
+    if row is None:
+        return
+    done, last = conn.execute("SELECT done, last FROM journal_fts_backfill").fetchone()
+    total = conn.execute("SELECT COUNT(*) FROM journal WHERE id > ? AND id <= ?", (done, last)).fetchone()[0]
+    copy_batches(
+        conn,
+        f"INSERT INTO journal_fts (rowid, {_FTS_COLUMNS}) SELECT id, {_FTS_COLUMNS} FROM journal "
+        f"WHERE id > ? AND id <= ?",
+        done, last, "journal_fts", total,
+        batch_size=max(1, BATCH_SIZE // 10),  # indexing a row costs ~10x copying it
+        progress=progress,
+        after=lambda upto: conn.execute("UPDATE journal_fts_backfill SET done = ?", (upto,)),
+    )
+    with transaction(conn):
+        _journal_fts_triggers(conn, backfilling=False)
+        conn.execute("DROP TABLE journal_fts_backfill")
+
+
+# Rollup periods: name -> first day of the period containing date expression {d}
+_PERIODS = (
+    ("day", "date({d})"),
+    ("week", "date({d}, 'weekday 0', '-6 days')"),  # Monday
+    ("month", "date({d}, 'start of month')"),
+)
+_MOOD = "(CASE WHEN trim({row}.mood) GLOB '[0-9]*' THEN CAST(trim({row}.mood) AS REAL) END)"  # '7', '7/10'
+
+_ROLLUPS = {
+    # source table: (rollup table, its key, sum columns, date expression, relevant columns)
+    "journal": ("mood_rollups", "period, start", ("entries", "moods", "mood_sum", "mood_sq"),
+                "{row}.date", ("date", "mood")),
+    "tasks": ("task_rollups", "period, start, pillar", ("planned", "done", "p1_planned", "p1_done"),
+              "substr({row}.due, 1, 10)", ("due", "pillar", "status", "priority")),
+}
+
+
+def _rollup_values(source: str, row: str, aggregate: bool) -> tuple:
+    """(extra key expressions, sum-column expressions) for one row, or summed over a GROUP BY."""
+    if source == "journal":
+        mood = _MOOD.format(row=row)
+        values = ("1", f"{mood} IS NOT NULL", f"COALESCE({mood}, 0)", f"COALESCE({mood} * {mood}, 0)")
+        keys = ()
+    else:
+        done, p1 = f"{row}.status = 'done'", f"{row}.priority = 'P1'"
+        values = ("1", done, p1, f"{p1} AND {done}")
+        keys = (f"COALESCE({row}.pillar, '')",)
+    return keys, tuple(f"SUM({v})" for v in values) if aggregate else values
+
+
+def _rollup_upsert(source: str, row: str, sign: int = 1, where: str = "") -> str:
+    """
+    One statement adding (sign=1) or removing (sign=-1) rows of `source` to
+    the day, week and month rollups. With `where`, sums the matching rows of
+    the table (GROUP BY) instead of the trigger row `row`.
+    """
+    table, key, columns, date, _ = _ROLLUPS[source]
+    keys, values = _rollup_values(source, row, aggregate=bool(where))
+    day = date.format(row=row)
+    selects = []
+    for name, start in _PERIODS:
+        exprs = [f"'{name}'", start.format(d=day), *keys, *(f"{sign} * ({v})" for v in values)]
+        sql = f"SELECT {', '.join(exprs)}"
+        if where:
+            sql += f" FROM {source} WHERE {where} AND {day} IS NOT NULL GROUP BY {', '.join(str(i) for i in range(2, 3 + len(keys)))}"
+        else:
+            sql += f" WHERE {day} IS NOT NULL"
+        selects.append(sql)
+    updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in columns)
+    return (f"INSERT INTO {table} ({key}, {', '.join(columns)}) {' UNION ALL '.join(selects)} "
+            f"ON CONFLICT ({key}) DO UPDATE SET {updates}")
+
+
+def _rollup_triggers(conn: sqlite3.Connection, source: str, backfilling: bool):
+    """
+    Keep the rollups of `source` current on every insert, update and delete.
+    While backfilling, rows between the backfill's progress and its end are
+    left to the backfill, which reads them as they are by then.
+    """
+    _, _, _, _, relevant = _ROLLUPS[source]
+
+    def when(row, extra=""):
+        conditions = [f"NOT EXISTS (SELECT 1 FROM rollup_backfill WHERE source = '{source}' "
+                      f"AND {row}.rowid > done AND {row}.rowid <= last)"] if backfilling else []
+        if extra:
+            conditions.append(extra)
+        return f"WHEN {' AND '.join(conditions)}" if conditions else ""
+
+    changed = "(" + " OR ".join(f"old.{c} IS NOT new.{c}" for c in relevant) + ")"
+    for name in ("insert", "update", "delete"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {source}_rollup_{name}")
+    conn.execute(f"""CREATE TRIGGER {source}_rollup_insert AFTER INSERT ON {source} {when('new')} BEGIN
+                     {_rollup_upsert(source, 'new')}; END""")
+    conn.execute(f"""CREATE TRIGGER {source}_rollup_delete AFTER DELETE ON {source} {when('old')} BEGIN
+                     {_rollup_upsert(source, 'old', -1)}; END""")
+    conn.execute(f"""CREATE TRIGGER {source}_rollup_update AFTER UPDATE ON {source} {when('old', changed)} BEGIN
+                     {_rollup_upsert(source, 'old', -1)}; {_rollup_upsert(source, 'new')}; END""")
+
+
+def _create_rollups(conn: sqlite3.Connection, progress):
+    """
+    Day/week/month rollups of journal moods and of tasks per pillar, kept by
+    triggers. Existing rows are added in batches (resumable), like the FTS index.
+    """
+    with transaction(conn):
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'mood_rollups'").fetchone():
+            conn.execute(
+                """CREATE TABLE mood_rollups
+                   (period TEXT, start TEXT, entries INTEGER, moods INTEGER, mood_sum REAL, mood_sq REAL,
+                    PRIMARY KEY (period, start))"""
+            )
+            conn.execute(
+                """CREATE TABLE task_rollups
+                   (period TEXT, start TEXT, pillar TEXT,
+                    planned INTEGER, done INTEGER, p1_planned INTEGER, p1_done INTEGER,
+                    PRIMARY KEY (period, start, pillar))"""
+            )
+            conn.execute("CREATE TABLE rollup_backfill (source TEXT PRIMARY KEY, done INTEGER, last INTEGER)")
+            for source in _ROLLUPS:
+                conn.execute(f"INSERT INTO rollup_backfill SELECT ?, 0, COALESCE(MAX(rowid), 0) FROM {source}",
+                             (source,))
+                _rollup_triggers(conn, source, backfilling=True)
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'rollup_backfill'").fetchone():
+        return
+    for source, done, last in conn.execute("SELECT source, done, last FROM rollup_backfill").fetchall():
+        copy_batches(
+            conn, _rollup_upsert(source, source, where="rowid > ?1 AND rowid <= ?2"),
+            done, last, f"{source} rollups", last - done, progress=progress,
+            after=lambda upto, source=source: conn.execute(
+                "UPDATE rollup_backfill SET done = ? WHERE source = ?", (upto, source)),
+        )
+    with transaction(conn):
+        for source in _ROLLUPS:
+            _rollup_triggers(conn, source, backfilling=False)
+        conn.execute("DROP TABLE rollup_backfill")
+
+
+# Rows whose changes make a planner context summary (tools.context) stale
+_SUMMARY_SOURCES = {
+    "journal": ("{row}.date", ("date", "summary", "actions", "mood")),
+    "tasks": ("substr({row}.due, 1, 10)", ("due", "title", "status", "priority", "pillar")),
+}
+
+
+def _create_context_summaries(conn: sqlite3.Connection, progress):
+    """
+    Cache of the planner's day/week/month summaries. Triggers delete the
+    summaries covering a changed row's date, so they are rebuilt on next use.
+    """
+    with transaction(conn):
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS context_summaries
+               (level TEXT, start TEXT, text TEXT, created_at TEXT, PRIMARY KEY (level, start))"""
+        )
+        # Day ranges of tasks for the summaries (due is ISO text, so ranges sort by date)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks(due)")
+        for source, (date, relevant) in _SUMMARY_SOURCES.items():
+            def forget(row):
+                day = date.format(row=row)
+                keys = ", ".join(f"('{name}', {start.format(d=day)})" for name, start in _PERIODS)
+                return f"DELETE FROM context_summaries WHERE (level, start) IN (VALUES {keys});"
+            changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in relevant)
+            for name in ("insert", "update", "delete"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {source}_summaries_{name}")
+            conn.execute(f"CREATE TRIGGER {source}_summaries_insert AFTER INSERT ON {source} "
+                         f"BEGIN {forget('new')} END")
+            conn.execute(f"CREATE TRIGGER {source}_summaries_delete AFTER DELETE ON {source} "
+                         f"BEGIN {forget('old')} END")
+            conn.execute(f"CREATE TRIGGER {source}_summaries_update AFTER UPDATE ON {source} WHEN {changed} "
+                         f"BEGIN {forget('old')} {forget('new')} END")
+
+
+# (user_version, description, function(conn, progress)); applied in order by
+# tools.migrations.migrate the first time a database is opened in a process
+MIGRATIONS = (
+    (1, "create tables", _create_schema),
+    (2, "journal with id, mood and gratitude", _upgrade_journal_table),
+    (3, "tasks keyed by id, planner columns", _upgrade_tasks),
+    (4, "journal full-text index", _create_journal_fts),
+    (5, "mood and task rollups", _create_rollups),
+    (6, "planner context summaries", _create_context_summaries),
+)
+
+
+def close_connections():
+    """Close the calling thread's connections (e.g. at the end of a worker)."""
+    for conn in getattr(_local, "conns", {}).values():
+        conn.close()
+    _local.conns = {}
+
+
+def close_pool_connections(pool, workers: int, timeout: float = 30.0):
+    """
+    Run close_connections on each of a ThreadPoolExecutor's `workers` threads,
+    at shutdown: each call waits at a barrier until all are running, so no
+    thread takes two. Closing the last connection checkpoints the WAL.
+    """
+    barrier = threading.Barrier(workers, timeout=timeout)
+
+    def close():
+        barrier.wait()
+        close_connections()
+
+    for future in [pool.submit(close) for _ in range(workers)]:
+        future.result()
+
+
+def init_db(db_path=DEFAULT_DB_PATH):
+    """Open the shared connection and create the schema (once per process)."""
+    get_connection(db_path)
+
+def _upsert_tasks(conn, tasks: list[Task]):
+    rows = [
+        (t.task_id, t.title, t.why, t.priority, t.pillar, t.due.isoformat(), t.status,
+         t.energy, t.duration_est_min, json.dumps(t.steps), json.dumps(t.deps),
+         t.source, t.artifact_link)
+        for t in tasks
+    ]
+    conn.executemany(
+        """INSERT INTO tasks
+           (id, title, why, priority, pillar, due, status,
+            energy, duration_est_min, steps, deps, source, artifact_link)
+           VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
+           ON CONFLICT(id) DO UPDATE SET
+            title=excluded.title, why=excluded.why, priority=excluded.priority,
+            pillar=excluded.pillar, due=excluded.due, status=excluded.status,
+            energy=excluded.energy, duration_est_min=excluded.duration_est_min,
+            steps=excluded.steps, deps=excluded.deps, source=excluded.source,
+            artifact_link=excluded.artifact_link""",
+        rows,
+    )
+
+
+def save_tasks(tasks: list[Task], db_path=DEFAULT_DB_PATH):
+    """Upsert tasks by task_id in one transaction."""
+    if not tasks:
+        return
+    conn = get_connection(db_path)
+    with conn:
+        _upsert_tasks(conn, tasks)
+
+def save_calendar_events(events: list[CalendarEvent], db_path=DEFAULT_DB_PATH):
+    """Upsert scheduled calendar events by event_id in one transaction."""
     if not events:
         return
     
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    
-    for event in events:
-        # Extract date for easier querying
-        event_date = event.start_time.date().isoformat()
-        cur.execute(
+    rows = [
+        (
+            event.event_id,
+            event.task_id,
+            event.title,
+            event.start_time.isoformat(),
+            event.end_time.isoformat(),
+            event.duration_min,
+            event.block_type,
+            event.created_at.isoformat(),
+            # Extract date for easier querying
+            event.start_time.date().isoformat(),
+        )
+        for event in events
+    ]
+    conn = get_connection(db_path)
+    with conn:
+        conn.executemany(
             """INSERT INTO calendar_events 
                (event_id, task_id, title, start_time, end_time, 
                 duration_min, block_type, created_at, date)
-               VALUES (?,?,?,?,?,?,?,?,?)""",
-            (
-                event.event_id,
-                event.task_id,
-                event.title,
-                event.start_time.isoformat(),
-                event.end_time.isoformat(),
-                event.duration_min,
-                event.block_type,
-                event.created_at.isoformat(),
-                event_date
-            )
+               VALUES (?,?,?,?,?,?,?,?,?)
+               ON CONFLICT(event_id) DO UPDATE SET
+                task_id=excluded.task_id, title=excluded.title,
+                start_time=excluded.start_time, end_time=excluded.end_time,
+                duration_min=excluded.duration_min, block_type=excluded.block_type,
+                created_at=excluded.created_at, date=excluded.date""",
+            rows,
         )
-    conn.commit()
-    conn.close()
 
-def get_todays_schedule(db_path="data/store.sqlite") -> list[CalendarEvent]:
+def _decode_datetimes(values) -> list:
+    """
+    Decode a column of ISO timestamps at once. Stored timestamps repeat a lot
+    (created_at per run, slot boundaries), so each distinct value is parsed once.
+    """
+    parsed = {v: datetime.datetime.fromisoformat(v) for v in set(values) if v}
+    return [parsed.get(v) for v in values]
+
+
+_EVENT_COLUMNS = "event_id, task_id, title, start_time, end_time, duration_min, block_type, created_at"
+_TASK_COLUMNS = ("id, title, why, priority, pillar, due, status, energy, duration_est_min, "
+                 "steps, deps, source, artifact_link")
+
+
+_build_event = trusted(CalendarEvent)
+_build_task = trusted(Task)
+
+
+def _events_from_rows(rows: list) -> list[CalendarEvent]:
+    """
+    CalendarEvents for rows we wrote ourselves (save_calendar_events), built
+    without validation: the values were validated before they were stored.
+    """
+    if not rows:
+        return []
+    event_ids, task_ids, titles, starts, ends, durations, block_types, created = zip(*rows)
+    starts, ends, created = _decode_datetimes(starts), _decode_datetimes(ends), _decode_datetimes(created)
+    construct = _build_event
+    return [
+        construct(event_id=e, task_id=t, title=ti, start_time=s, end_time=en,
+                  duration_min=d, block_type=b, created_at=c)
+        for e, t, ti, s, en, d, b, c in zip(event_ids, task_ids, titles, starts, ends,
+                                             durations, block_types, created)
+    ]
+
+
+def _tasks_from_rows(rows: list) -> list[Task]:
+    """Tasks for rows written by save_tasks (no re-validation).
+    Columns added after the original table may be NULL in old rows; they get
+    the planner's defaults."""
+    if not rows:
+        return []
+    dues = _decode_datetimes([r[5] for r in rows])
+    construct = _build_task
+    return [
+        construct(task_id=r[0], title=r[1], why=r[2], priority=r[3], pillar=r[4], due=due,
+                  status=r[6], energy=r[7] or "steady", duration_est_min=r[8] or 30,
+                  steps=json.loads(r[9]) if r[9] else [], deps=json.loads(r[10]) if r[10] else [],
+                  source=r[11] or "goal", artifact_link=r[12])
+        for r, due in zip(rows, dues)
+    ]
+
+
+def get_task(task_id: str, db_path=DEFAULT_DB_PATH) -> Task | None:
+    """One stored task by id, or None."""
+    rows = get_connection(db_path).execute(f"SELECT {_TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchall()
+    return _tasks_from_rows(rows)[0] if rows else None
+
+
+def get_todays_schedule(db_path=DEFAULT_DB_PATH) -> list[CalendarEvent]:
     """Retrieve today's scheduled events from the database."""
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    
-    today = datetime.date.today().isoformat()
-    cur.execute(
-        """SELECT event_id, task_id, title, start_time, end_time, 
-                  duration_min, block_type, created_at
-           FROM calendar_events
-           WHERE date = ?
-           ORDER BY start_time""",
-        (today,)
+    rows = get_connection(db_path).execute(
+        f"SELECT {_EVENT_COLUMNS} FROM calendar_events WHERE date = ? ORDER BY start_time",
+        (datetime.date.today().isoformat(),),
+    ).fetchall()
+    return _events_from_rows(rows)
+
+
+def iter_calendar_events(db_path=DEFAULT_DB_PATH, start_date: datetime.date = None,
+                         end_date: datetime.date = None, batch_size: int = 1000):
+    """
+    Yield stored events with start_date <= date <= end_date (either bound
+    optional), in start order. Rows are fetched and turned into models one
+    batch at a time, so a long history is never materialized at once.
+    """
+    cur = get_connection(db_path).execute(
+        f"""SELECT {_EVENT_COLUMNS} FROM calendar_events
+            WHERE (? IS NULL OR date >= ?) AND (? IS NULL OR date <= ?)
+            ORDER BY date, start_time""",
+        (*(2 * [start_date and start_date.isoformat()]), *(2 * [end_date and end_date.isoformat()])),
     )
-    
-    rows = cur.fetchall()
-    conn.close()
-    
-    events = []
-    for row in rows:
-        events.append(CalendarEvent(
-            event_id=row[0],
-            task_id=row[1],
-            title=row[2],
-            start_time=datetime.datetime.fromisoformat(row[3]),
-            end_time=datetime.datetime.fromisoformat(row[4]),
-            duration_min=row[5],
-            block_type=row[6],
-            created_at=datetime.datetime.fromisoformat(row[7])
-        ))
-    
-    return events
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from _events_from_rows(rows)
+
+
+def iter_tasks(db_path=DEFAULT_DB_PATH, status: str = None, batch_size: int = 1000):
+    """Yield stored tasks (optionally only one status), one fetched batch at a time."""
+    cur = get_connection(db_path).execute(
+        f"SELECT {_TASK_COLUMNS} FROM tasks WHERE (? IS NULL OR status = ?)", (status, status)
+    )
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from _tasks_from_rows(rows)
+
+
+def get_job_runs(db_path=DEFAULT_DB_PATH) -> dict:
+    """(user, job) -> scheduled time (aware datetime) of the last completed run."""
+    rows = get_connection(db_path).execute("SELECT user, job, scheduled_for FROM job_runs").fetchall()
+    return {(user, job): datetime.datetime.fromisoformat(at) for user, job, at in rows}
+
+
+def record_job_run(user: str, job: str, scheduled_for: datetime.datetime, db_path=DEFAULT_DB_PATH):
+    """Mark the run of `job` scheduled for `scheduled_for` as done."""
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute(
+            """INSERT INTO job_runs (user, job, scheduled_for, finished_at) VALUES (?,?,?,?)
+               ON CONFLICT(user, job) DO UPDATE SET
+                scheduled_for=excluded.scheduled_for, finished_at=excluded.finished_at""",
+            (user, job, scheduled_for.isoformat(), datetime.datetime.now().isoformat()),
+        )
+
+
+def save_plan_draft(user: str, date: datetime.date, fingerprint: str, tasks: list[Task],
+                    events: list[CalendarEvent], db_path=DEFAULT_DB_PATH):
+    """Store (or replace) the user's pre-planned tasks and schedule for `date`."""
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute(
+            """INSERT INTO plan_drafts (user, date, fingerprint, tasks, events, created_at)
+               VALUES (?,?,?,?,?,?)
+               ON CONFLICT(user, date) DO UPDATE SET
+                fingerprint=excluded.fingerprint, tasks=excluded.tasks,
+                events=excluded.events, created_at=excluded.created_at""",
+            (user, date.isoformat(), fingerprint,
+             json.dumps([t.model_dump(mode="json") for t in tasks]),
+             json.dumps([e.model_dump(mode="json") for e in events]),
+             datetime.datetime.now().isoformat()),
+        )
+
+
+def load_plan_draft(user: str, date: datetime.date, db_path=DEFAULT_DB_PATH) -> dict | None:
+    """The user's draft for `date` as {"fingerprint", "tasks", "events", "created_at"}, or None."""
+    row = get_connection(db_path).execute(
+        "SELECT fingerprint, tasks, events, created_at FROM plan_drafts WHERE user = ? AND date = ?",
+        (user, date.isoformat()),
+    ).fetchone()
+    if row is None:
+        return None
+    return {
+        "fingerprint": row[0],
+        "tasks": [Task.model_validate(t) for t in json.loads(row[1])],
+        "events": [CalendarEvent.model_validate(e) for e in json.loads(row[2])],
+        "created_at": row[3],
+    }
+
+
+def save_schedule_changes(changes: list[dict], events: list[CalendarEvent], reason: str,
+                          db_path=DEFAULT_DB_PATH, tasks: list[Task] = ()):
+    """
+    Apply a reschedule in one transaction: upsert the changed `tasks` and
+    the new/changed events, delete removed ones and log every change in
+    schedule_changes.
+    """
+    if not changes and not tasks:
+        return
+    iso = lambda t: t.isoformat() if t else None
+    now = datetime.datetime.now().isoformat()
+    conn = get_connection(db_path)
+    with conn:
+        if tasks:
+            _upsert_tasks(conn, tasks)
+        conn.executemany(
+            """INSERT INTO calendar_events
+               (event_id, task_id, title, start_time, end_time, duration_min, block_type, created_at, date)
+               VALUES (?,?,?,?,?,?,?,?,?)
+               ON CONFLICT(event_id) DO UPDATE SET
+                start_time=excluded.start_time, end_time=excluded.end_time,
+                duration_min=excluded.duration_min, date=excluded.date""",
+            [(e.event_id, e.task_id, e.title, e.start_time.isoformat(), e.end_time.isoformat(),
+              e.duration_min, e.block_type, e.created_at.isoformat(), e.start_time.date().isoformat())
+             for e in events],
+        )
+        conn.executemany(
+            "DELETE FROM calendar_events WHERE event_id = ?",
+            [(c["event_id"],) for c in changes if c["change"] == "removed"],
+        )
+        conn.executemany(
+            """INSERT INTO schedule_changes
+               (task_id, event_id, change, old_start, old_end, new_start, new_end, reason, created_at)
+               VALUES (?,?,?,?,?,?,?,?,?)""",
+            [(c["task_id"], c["event_id"], c["change"], iso(c["old_start"]), iso(c["old_end"]),
+              iso(c["new_start"]), iso(c["new_end"]), reason, now) for c in changes],
+        )
+
+
+def get_rollups(period: str, start: datetime.date, end: datetime.date, db_path=DEFAULT_DB_PATH) -> dict:
+    """
+    The `period` ("day", "week" or "month") rollups starting between `start`
+    and `end`, by start date: {"entries", "avg_mood", "mood_sd", "pillars":
+    {pillar: {"tasks", "done", "p1", "p1_done"}}}. Reads only the rollup
+    tables, so the cost does not grow with the history.
+    """
+    conn = get_connection(db_path)
+    bounds = (period, start.isoformat(), end.isoformat())
+    empty = lambda: {"entries": 0, "avg_mood": None, "mood_sd": None, "pillars": {}}
+    rollups = {}
+    for day, entries, moods, total, squares in conn.execute(
+        "SELECT start, entries, moods, mood_sum, mood_sq FROM mood_rollups WHERE period = ? AND start BETWEEN ? AND ?",
+        bounds,
+    ):
+        mean = total / moods if moods else None
+        rollups[day] = {"entries": entries, "avg_mood": mean,
+                        "mood_sd": max(squares / moods - mean * mean, 0.0) ** 0.5 if moods else None,
+                        "pillars": {}}
+    for day, pillar, planned, done, p1, p1_done in conn.execute(
+        """SELECT start, pillar, planned, done, p1_planned, p1_done FROM task_rollups
+           WHERE period = ? AND start BETWEEN ? AND ? AND planned > 0""",
+        bounds,
+    ):
+        rollups.setdefault(day, empty())["pillars"][pillar or None] = {
+            "tasks": planned, "done": done, "p1": p1, "p1_done": p1_done}
+    # Periods whose rows were all deleted keep zero counts
+    return {day: r for day, r in sorted(rollups.items()) if r["entries"] or r["pillars"]}
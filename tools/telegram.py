@@ -1,27 +1,239 @@
 # tools/telegram.py
 import os
+import time
+import atexit
 import asyncio
+import threading
+import collections
 from telegram import Bot
+from telegram.error import BadRequest, NetworkError, RetryAfter
+from telegram.request import HTTPXRequest
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")
 
 MAX_LEN = 4096  # Telegram hard limit
 
+# Telegram bot limits: ~30 messages/s overall, 1/s per chat, 20/min per group
+GLOBAL_RATE = 30.0
+PER_CHAT_RATE = 1.0
+PER_GROUP_RATE = 20 / 60
+MAX_RETRIES = 5
 
-def send_message(text: str):
-    if not TELEGRAM_TOKEN or not CHAT_ID:
+
+def split_markdown(text: str, limit: int = MAX_LEN) -> list[str]:
+    """
+    Split text into chunks of at most `limit` characters on line boundaries.
+
+    A code fence open at a split is closed at the end of the chunk and
+    re-opened (same language tag) at the start of the next, so every chunk is
+    valid Markdown on its own. Lines longer than a chunk are split on spaces.
+    """
+    if len(text) <= limit:
+        return [text]
+
+    close = "\n```"
+    chunks: list[str] = []
+    current = ""
+    fence = None  # opening line of the fence we are inside, e.g. "```python\n"
+
+    def pieces(line: str):
+        room = limit - 2 * len(close) - 32
+        while len(line) > room:
+            cut = line.rfind(" ", 0, room)
+            cut = cut + 1 if cut > 0 else room
+            yield line[:cut]
+            line = line[cut:]
+        yield line
+
+    for line in text.splitlines(keepends=True):
+        for piece in pieces(line):
+            reserve = len(close) if fence else 0
+            if current and len(current) + len(piece) + reserve > limit:
+                chunks.append(current + close if fence else current)
+                current = fence or ""
+            current += piece
+            if piece.lstrip().startswith("```"):
+                fence = None if fence else (piece if piece.endswith("\n") else piece + "\n")
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DeliveryQueue:
+    """
+    Long-lived bot with an async send queue.
+
+    Messages are split with split_markdown and sent by a pool of workers
+    under a global and a per-chat token bucket. Each chat is served by one
+    worker at a time, so its messages keep their order and other chats are
+    never stuck behind it. 429 responses are retried after Telegram's retry_after,
+    network errors with exponential backoff, and chunks Telegram cannot
+    parse as Markdown are re-sent as plain text.
+    """
+
+    def __init__(self, token: str, base_url: str = TELEGRAM_API_URL, workers: int = 32,
+                 global_rate: float = GLOBAL_RATE, per_chat_rate: float = PER_CHAT_RATE,
+                 per_group_rate: float = PER_GROUP_RATE, max_retries: int = MAX_RETRIES):
+        self.bot = Bot(token=token, base_url=base_url,
+                       request=HTTPXRequest(connection_pool_size=workers))
+        self.workers = workers
+        self.global_bucket = TokenBucket(global_rate)  # no bursts: Telegram counts per second
+        self.per_chat_rate = per_chat_rate
+        self.per_group_rate = per_group_rate
+        self.max_retries = max_retries
+        self.stats = {"sent": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+        self._chat_buckets: dict = {}
+        self._pending: dict = {}  # chat_id -> deque of (text, future) not yet sent
+        self._queue: asyncio.Queue = None  # chat ids with pending messages
+        self._tasks: list = []
+        self.loop = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        await self.bot.initialize()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.bot.shutdown()
+
+    def enqueue(self, chat_id, text: str) -> asyncio.Future:
+        """Queue a message; the future resolves when every chunk was delivered."""
+        chat_id = str(chat_id)
+        future = self.loop.create_future()
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            pending = self._pending[chat_id] = collections.deque()
+            self._queue.put_nowait(chat_id)
+        pending.append((text, future))
+        return future
+
+    async def send(self, chat_id, text: str):
+        await self.enqueue(chat_id, text)
+
+    def submit(self, chat_id, text: str):
+        """Thread-safe send from outside the loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(self.send(chat_id, text), self.loop)
+
+    def _bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = self.per_group_rate if chat_id.startswith("-") else self.per_chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate)
+        return bucket
+
+    async def _worker(self):
+        while True:
+            chat_id = await self._queue.get()
+            pending = self._pending[chat_id]
+            try:
+                while pending:
+                    text, future = pending.popleft()
+                    try:
+                        for chunk in split_markdown(text):
+                            await self._send_chunk(chat_id, chunk)
+                        if not future.done():
+                            future.set_result(None)
+                    except Exception as e:
+                        self.stats["failed"] += 1
+                        if not future.done():
+                            future.set_exception(e)
+            finally:
+                del self._pending[chat_id]
+                self._queue.task_done()
+
+    async def _send_chunk(self, chat_id: str, chunk: str):
+        parse_mode = "Markdown"
+        for attempt in range(self.max_retries + 1):
+            await self._bucket(chat_id).acquire()
+            await self.global_bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=chunk, parse_mode=parse_mode)
+                self.stats["sent"] += 1
+                return
+            except RetryAfter as e:
+                self.stats["rate_limited"] += 1
+                delay = e.retry_after
+            except BadRequest as e:
+                if parse_mode and "parse" in str(e).lower():
+                    parse_mode = None  # Telegram rejected the Markdown: send as plain text
+                    continue
+                raise
+            except NetworkError:
+                delay = 0.5 * 2 ** attempt
+            if attempt == self.max_retries:
+                break
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+        raise NetworkError(f"Giving up on chat {chat_id} after {self.max_retries} retries")
+
+
+_deliveries: dict = {}  # (token, base_url) -> DeliveryQueue
+_delivery_lock = threading.Lock()
+
+
+def get_delivery(token: str = None, base_url: str = TELEGRAM_API_URL) -> DeliveryQueue:
+    """
+    The process-wide DeliveryQueue of a bot token (default TELEGRAM_TOKEN),
+    running on its own background event loop. Everything sending as that bot
+    in this process (briefs, bot replies) shares it, and so its rate limits.
+    Use submit() from other threads and event loops.
+    """
+    key = (token or TELEGRAM_TOKEN, base_url)
+    with _delivery_lock:
+        queue = _deliveries.get(key)
+        if queue is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="telegram-delivery", daemon=True).start()
+            queue = DeliveryQueue(*key)
+            asyncio.run_coroutine_threadsafe(queue.start(), loop).result()
+            if not _deliveries:
+                atexit.register(_shutdown_delivery)
+            _deliveries[key] = queue
+        return queue
+
+
+def _shutdown_delivery():
+    for queue in _deliveries.values():
+        asyncio.run_coroutine_threadsafe(queue.stop(), queue.loop).result(timeout=30)
+
+
+def send_message(text: str, chat_id: str = None):
+    """Send text to chat_id (defaults to TELEGRAM_CHAT_ID); blocks until delivered."""
+    chat_id = chat_id or CHAT_ID
+    if not TELEGRAM_TOKEN or not chat_id:
         print("⚠️ Missing Telegram config, printing instead:\n", text)
         return
 
-    async def _send():
-        bot = Bot(token=TELEGRAM_TOKEN)
-        # Split into chunks if longer than Telegram’s max
-        for i in range(0, len(text), MAX_LEN):
-            chunk = text[i:i + MAX_LEN]
-            await bot.send_message(chat_id=CHAT_ID, text=chunk, parse_mode="Markdown")
-
-    asyncio.run(_send())
+    get_delivery().submit(chat_id, text).result()
 
 
 def debug_list_chats():
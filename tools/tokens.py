@@ -0,0 +1,154 @@
+# tools/tokens.py
+import os
+import math
+import time
+import uuid
+import threading
+from tools.storage import get_connection
+
+CHARS_PER_TOKEN = 4          # rough average for English text with OpenAI tokenizers
+MIN_COMPLETION_TOKENS = 128  # below this a call is not worth making
+DEFAULT_MAX_COMPLETION = {"planner": 1500, "reflector": 600}
+
+# One id per process run; set COACH_RUN_ID to group several processes
+RUN_ID = os.getenv("COACH_RUN_ID") or uuid.uuid4().hex[:12]
+
+_spent: dict = {}  # user -> tokens charged this run (prompt + completion, uncached calls only)
+_usage: dict = {}  # user -> {"calls", "cached_calls", "prompt_tokens", "completion_tokens"}
+_lock = threading.Lock()
+
+
+class TokenBudgetExceeded(RuntimeError):
+    """Raised when a call cannot fit in what is left of the run's token budget."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Token estimate for text (~4 characters per token), without loading a tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def token_options(config: dict = None, role: str = "planner") -> dict:
+    """
+    Budget settings for one agent call.
+
+    budget: tokens per run per user from safety.max_tokens_per_run, else
+    COACH_MAX_TOKENS (None = unlimited). max_tokens: completion cap from
+    agents.<role>.max_completion_tokens.
+    """
+    config = config or {}
+    budget = config.get("safety", {}).get("max_tokens_per_run") or os.getenv("COACH_MAX_TOKENS")
+    max_tokens = config.get("agents", {}).get(role, {}).get(
+        "max_completion_tokens", DEFAULT_MAX_COMPLETION.get(role, 1000)
+    )
+    return {
+        "role": role,
+        "user": config.get("user", {}).get("name", "default"),
+        "budget": int(budget) if budget else None,
+        "max_tokens": int(max_tokens),
+        "db_path": config.get("storage", {}).get("database", "data/store.sqlite"),
+    }
+
+
+def start_run(user: str = None):
+    """
+    Start a new budget period for one user, or for everyone (with a new
+    RUN_ID) when user is None. For processes that do several runs, like
+    benchmarks or a long-lived scheduler.
+    """
+    global RUN_ID
+    with _lock:
+        if user is None:
+            RUN_ID = uuid.uuid4().hex[:12]
+            _spent.clear()
+            _usage.clear()
+        else:
+            _spent.pop(user, None)
+            _usage.pop(user, None)
+
+
+def spent(user: str = "default") -> int:
+    with _lock:
+        return _spent.get(user, 0)
+
+
+def prompt_allowance(user: str = "default", budget: int = None, max_tokens: int = 0, **_) -> int | None:
+    """
+    Tokens left for a prompt once the full completion cap is set aside
+    (None when there is no budget). Callers trim their prompt to fit.
+    """
+    if budget is None:
+        return None
+    return budget - spent(user) - max(max_tokens, MIN_COMPLETION_TOKENS)
+
+
+def reserve(prompt: str, user: str = "default", budget: int = None, max_tokens: int = 1000, **_) -> int:
+    """
+    Completion cap for a call with this prompt: max_tokens, lowered to what
+    the budget still allows. Raises TokenBudgetExceeded if that is below
+    MIN_COMPLETION_TOKENS.
+    """
+    if budget is None:
+        return max_tokens
+    left = budget - spent(user) - estimate_tokens(prompt)
+    if left < min(max_tokens, MIN_COMPLETION_TOKENS):
+        raise TokenBudgetExceeded(
+            f"Token budget for {user} exhausted: {spent(user)} of {budget} used this run, "
+            f"prompt needs ~{estimate_tokens(prompt)}"
+        )
+    return min(max_tokens, left)
+
+
+def record_usage(llm, prompt: str, response, role: str = "planner", user: str = "default",
+                 db_path="data/store.sqlite", cached: bool = False, **_):
+    """
+    Record one call's tokens for this run and user (in memory and in llm_usage).
+
+    Uses the provider's usage metadata when the response carries it, else
+    estimates from the text. Cached responses are logged but not charged.
+    """
+    text = getattr(response, "content", response)
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens") or estimate_tokens(prompt)
+    completion_tokens = usage.get("output_tokens") or estimate_tokens(str(text))
+    with _lock:
+        totals = _usage.setdefault(
+            user, {"calls": 0, "cached_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        )
+        if cached:
+            totals["cached_calls"] += 1
+        else:
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            _spent[user] = _spent.get(user, 0) + prompt_tokens + completion_tokens
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute(
+            """INSERT INTO llm_usage (run_id, user, role, model, prompt_tokens, completion_tokens,
+                                      estimated, cached, created_at) VALUES (?,?,?,?,?,?,?,?,?)""",
+            (RUN_ID, user, role, getattr(llm, "model_name", ""), prompt_tokens, completion_tokens,
+             int(not usage), int(cached), time.time()),
+        )
+
+
+def run_usage() -> dict:
+    """Per-user token usage of this run (this process)."""
+    with _lock:
+        return {user: dict(totals) for user, totals in _usage.items()}
+
+
+def usage_summary(db_path="data/store.sqlite", user: str = None, since: float = 0) -> list[dict]:
+    """Charged tokens per user (all runs since `since`, a Unix time) from llm_usage."""
+    rows = get_connection(db_path).execute(
+        """SELECT user, COUNT(DISTINCT run_id), SUM(1 - cached), SUM(cached),
+                  SUM(CASE WHEN cached THEN 0 ELSE prompt_tokens END),
+                  SUM(CASE WHEN cached THEN 0 ELSE completion_tokens END)
+           FROM llm_usage WHERE created_at >= ? AND (? IS NULL OR user = ?)
+           GROUP BY user ORDER BY user""",
+        (since, user, user),
+    ).fetchall()
+    return [
+        {"user": u, "runs": runs, "calls": calls, "cached_calls": cached_calls,
+         "prompt_tokens": p, "completion_tokens": c}
+        for u, runs, calls, cached_calls, p, c in rows
+    ]